@@ -2,6 +2,7 @@
 ASGI config for fitness project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Unless ``ASYNC_VIEWS`` says otherwise, it serves the asynchronous read views.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
@@ -12,5 +13,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'fitness.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.0/ref/settings/
 from pathlib import Path
 from dotenv import load_dotenv
 from os import getenv, path
+from urllib.parse import urlsplit
 
 load_dotenv()
 
@@ -49,7 +50,11 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'fitness_app.profiling.ProfilingMiddleware',
+    'fitness_app.metrics.MetricsMiddleware',
+    'fitness_app.slow_queries.SlowQueryMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'fitness_app.routers.PrimaryPinMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -78,6 +83,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'fitness.wsgi.application'
 
+# Route the read pages and REST endpoints to the views of `fitness_app.async_views`,
+# set by `fitness/asgi.py`, so they run concurrently under an ASGI server.
+ASYNC_VIEWS = getenv('ASYNC_VIEWS', '0') == '1'
+
 
 
 REST_FRAMEWORK = {
@@ -85,29 +94,125 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
+        'fitness_app.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        # 'rest_framework.authentication.TokenAuthentication',
-    ]
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'fitness_app.pagination.KeysetPagination',
+    'DEFAULT_FILTER_BACKENDS': [
+        'fitness_app.filters.WhitelistFilterBackend',
+        'fitness_app.filters.KeysetOrderingFilter',
+    ],
+    'PAGE_SIZE': int(getenv('REST_PAGE_SIZE', '50')),
 }
+SYNC_SETTLE_SECONDS = int(getenv('SYNC_SETTLE_SECONDS', '2'))
+# 7 for time-ordered primary keys, appended to the right edge of the primary key indexes.
+PRIMARY_KEY_UUID_VERSION = int(getenv('PRIMARY_KEY_UUID_VERSION', '4'))
+# Report SQL, template and serializer time of every request in a Server-Timing header and
+# log that share of the requests to the fitness_app.profiling logger.
+REQUEST_PROFILING = getenv('REQUEST_PROFILING', '0') == '1'
+REQUEST_PROFILING_LOG_SAMPLE = float(getenv('REQUEST_PROFILING_LOG_SAMPLE', '0'))
+# Request, cache and pool metrics served to admins at /metrics/. Worker processes of one
+# server share them through files in METRICS_DIR, empty to keep them per process.
+METRICS = getenv('METRICS', '1') == '1'
+METRICS_DIR = getenv('METRICS_DIR', '')
+# Queries taking SLOW_QUERY_MS or more are kept, SLOW_QUERY_LOG_SIZE fingerprints at most, and
+# that share of them explained, 0 turns the capture off.
+SLOW_QUERY_MS = float(getenv('SLOW_QUERY_MS', '200'))
+SLOW_QUERY_EXPLAIN_SAMPLE = float(getenv('SLOW_QUERY_EXPLAIN_SAMPLE', '0.1'))
+SLOW_QUERY_LOG_SIZE = int(getenv('SLOW_QUERY_LOG_SIZE', '100'))
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
+# Every worker process keeps a pool of DB_POOL_MIN_SIZE to DB_POOL_MAX_SIZE connections,
+# a max size of 0 disables pooling. Statements run DB_PREPARE_THRESHOLD times on a connection
+# are prepared on the server, which needs server-side parameter binding.
+DB_POOL_MIN_SIZE = int(getenv('DB_POOL_MIN_SIZE', '2'))
+DB_POOL_MAX_SIZE = int(getenv('DB_POOL_MAX_SIZE', '10'))
+DB_POOL_TIMEOUT = float(getenv('DB_POOL_TIMEOUT', '10'))
+DB_PREPARE_THRESHOLD = int(getenv('DB_PREPARE_THRESHOLD', '5'))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'fitness_app.backends.postgresql',
         'NAME': getenv('POSTGRES_DB'),
         'USER': getenv('POSTGRES_USER'),
         'PASSWORD': getenv('POSTGRES_PASSWORD'),
         'HOST': getenv('POSTGRES_HOST'),
         'PORT': getenv('POSTGRES_PORT'),
-        'OPTIONS': {'options': '-c search_path=public,library'},
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'options': '-c search_path=public,library',
+            'pool': {
+                'min_size': DB_POOL_MIN_SIZE,
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': DB_POOL_TIMEOUT,
+            } if DB_POOL_MAX_SIZE else None,
+            'server_side_binding': getenv('DB_SERVER_SIDE_BINDING', '1') == '1',
+            'prepare_threshold': DB_PREPARE_THRESHOLD,
+        },
         'TEST': {
             'NAME': 'test_db',
         },
     }
 }
 
+# Read replicas as comma separated `host[:port][/name]`, the rest of the settings is shared
+# with the primary. Reads stay on the primary for REPLICA_PIN_SECONDS after a client's write.
+REPLICA_DATABASES = []
+for number, replica in enumerate(filter(None, getenv('POSTGRES_REPLICAS', '').split(',')), 1):
+    location = urlsplit(f'//{replica.strip()}')
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'HOST': location.hostname,
+        'PORT': location.port or DATABASES['default']['PORT'],
+        'NAME': location.path.lstrip('/') or DATABASES['default']['NAME'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(f'replica{number}')
+DATABASE_ROUTERS = ['fitness_app.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = int(getenv('REPLICA_PIN_SECONDS', '5'))
+
+# Cache of page fragments, auth versions and response generations. The default local-memory
+# backend is private to each process, set a Memcached, Redis or file based CACHE_BACKEND to
+# share it between workers.
+# https://docs.djangoproject.com/en/5.0/ref/settings/#caches
+
+CACHES = {
+    'default': {
+        'BACKEND': getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': getenv('CACHE_LOCATION', ''),
+    }
+}
+LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# Seconds a REST list or retrieve response stays cached until a write expires it, 0 disables.
+# Writes expire the responses of every worker through the cache, so without a shared
+# CACHE_BACKEND it is off unless set explicitly, e.g. for a single process.
+RESPONSE_CACHE_TIMEOUT = int(getenv(
+    'RESPONSE_CACHE_TIMEOUT',
+    '0' if CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS else '300',
+))
+# Seconds a token stays cached by a process, 0 checks every token in the database.
+# Revocations reach the other processes only through a shared CACHE_BACKEND, so without one
+# it is off unless set explicitly, e.g. for a single process.
+TOKEN_CACHE_TTL = int(getenv(
+    'TOKEN_CACHE_TTL',
+    '0' if CACHES['default']['BACKEND'] in LOCAL_CACHE_BACKENDS else '60',
+))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'fitness_app.profiling': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from fitness_app.admin import slow_queries_view
+
 urlpatterns = [
+    path('admin/slow-queries/', admin.site.admin_view(slow_queries_view), name='slow-queries'),
     path('admin/', admin.site.urls),
     path('', include('fitness_app.urls')),
 ]
@@ -1,9 +1,11 @@
 """This module contains Django admin configurations for various models in the application."""
 
 from django.contrib import admin
+from django.shortcuts import redirect, render
 
 from .forms import CertificateForm, CoachForm, GymForm
 from .models import Address, Certificate, Coach, Gym, GymCoach, Subscription
+from .slow_queries import clear_slow_queries, slow_queries
 
 
 class GymCoachInline(admin.TabularInline):
@@ -85,3 +87,24 @@ class SubscriptionAdmin(admin.ModelAdmin):
     """
 
     model = Subscription
+
+
+def slow_queries_view(request):
+    """
+    Show the slow query log to staff, or empty it on POST.
+
+    Args:
+        request (HttpRequest): The current request.
+
+    Returns:
+        HttpResponse: The log page, or a redirect to it once emptied.
+    """
+    if request.method == 'POST':
+        clear_slow_queries()
+        return redirect('slow-queries')
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Slow queries',
+        'entries': slow_queries(),
+    }
+    return render(request, 'admin/slow_queries.html', context)
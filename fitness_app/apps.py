@@ -14,3 +14,7 @@ class FitnessAppConfig(AppConfig):
 
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'fitness_app'
+
+    def ready(self):
+        """Connect signal receivers."""
+        from . import signals  # noqa: F401
@@ -0,0 +1,259 @@
+"""
+Asynchronous versions of the read views, served when the app runs under ASGI.
+
+The module has the same names as the read views of `views`: the listing and detail pages
+and the REST viewsets, whose list and retrieve actions are dispatched asynchronously.
+Queries go through the async ORM, so one ASGI worker keeps many requests waiting on the
+database in flight instead of tying a thread to each of them. Writes and the browsable API
+still run the synchronous code in a thread.
+"""
+
+from uuid import uuid4
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.http import HttpResponseBadRequest
+from django.shortcuts import aget_object_or_404, redirect, render
+from django.views.decorators.csrf import csrf_exempt
+
+from . import views
+from .conditional import (BROWSABLE_API_FORMAT, aconditional_response, latest,
+                          make_etag)
+from .metrics import record_cache
+from .models import Certificate, Client, ClientSub, Coach, Gym
+from .pagination import InvalidCursor, akeyset_page
+from .signals import gym_page_key
+
+READ_METHODS = ('get', 'head')
+
+
+class AsyncReadMixin:
+    """
+    Viewset mixin dispatching list and retrieve requests asynchronously.
+
+    Other methods of the same routes are handed to the synchronous view in a thread.
+    """
+
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        """
+        Build the view of a route, asynchronous when it reads with an async action.
+
+        Args:
+            actions (dict): Actions by HTTP method.
+            initkwargs: Attributes of the view instances.
+
+        Returns:
+            Callable: The view.
+        """
+        view = super().as_view(actions, **initkwargs)
+        if actions.get('get') not in cls.async_actions:
+            return view
+        actions = {'head': actions['get'], **actions}
+
+        async def async_view(request, *args, **kwargs):
+            if request.method.lower() not in READ_METHODS:
+                return await sync_to_async(view)(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        async_view.cls = cls
+        async_view.initkwargs = initkwargs
+        async_view.actions = actions
+        return csrf_exempt(async_view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `dispatch` for read actions.
+
+        Authentication, permissions and content negotiation run in a thread, since they may
+        query sessions and tokens.
+
+        Args:
+            request (HttpRequest): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.accepted_renderer.format == BROWSABLE_API_FORMAT:
+                handler = sync_to_async(getattr(self, self.action))
+            else:
+                handler = getattr(self, f'a{self.action}')
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def async_viewset(viewset_class):
+    """
+    Make a viewset dispatch its read actions asynchronously.
+
+    Args:
+        viewset_class (class): The viewset.
+
+    Returns:
+        class: The asynchronous viewset.
+    """
+    return type(viewset_class.__name__, (AsyncReadMixin, viewset_class), {})
+
+
+CoachViewSet = async_viewset(views.CoachViewSet)
+GymViewSet = async_viewset(views.GymViewSet)
+AddressViewSet = async_viewset(views.AddressViewSet)
+CertificateViewSet = async_viewset(views.CertificateViewSet)
+SubscriptionViewSet = async_viewset(views.SubscriptionViewSet)
+
+
+async def gyms_page(request):
+    """
+    Display gym listing page.
+
+    Args:
+        request (ASGIRequest): The current HTTP request object.
+
+    Returns:
+        HttpResponse: Render the gyms template.
+    """
+    gyms = Gym.objects.select_related('address').only(*views.GYM_LIST_FIELDS)
+    try:
+        page, next_cursor = await akeyset_page(
+            gyms, request.GET.get('cursor'), views.GYMS_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return render(
+        request,
+        'gyms.html',
+        {'gyms': page, 'next_cursor': next_cursor, 'is_first_page': 'cursor' not in request.GET},
+    )
+
+
+async def coaches_page(request):
+    """
+    Display coach listing page.
+
+    Args:
+        request (ASGIRequest): The current HTTP request object.
+
+    Returns:
+        HttpResponse: Render the coaches template.
+    """
+    coaches = [coach async for coach in Coach.objects.all()]
+    return render(request, 'coaches.html', {'coaches': coaches})
+
+
+async def gym_page_shared(pk) -> dict:
+    """
+    Asynchronous version of `views.gym_page_shared`.
+
+    Args:
+        pk: The primary key of the gym.
+
+    Returns:
+        dict: Gym name, rendered gym information and subscriptions.
+    """
+    key = gym_page_key(pk)
+    shared = await cache.aget(key)
+    record_cache(views.GYM_PAGE_CACHE, shared is not None)
+    if shared is not None:
+        return shared
+    gym = await aget_object_or_404(views.gym_page_queryset(), id=pk)
+    shared = views.render_gym_page_shared(gym)
+    await cache.aset(key, shared, views.GYM_PAGE_CACHE_TIMEOUT)
+    return shared
+
+
+async def gym_page_state(request, pk) -> dict | None:
+    """
+    Asynchronous version of `views.gym_page_state`.
+
+    Args:
+        request (ASGIRequest): The current HTTP request object.
+        pk: The primary key of the gym.
+
+    Returns:
+        dict | None: Client, owned subscription ids and validators, None for anonymous users.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None
+    client = await Client.objects.filter(user=user).only('id').afirst()
+    if not client:
+        return None
+    client_subs = ClientSub.objects.filter(client=client, sub__gym_id=pk)
+    client_sub_ids = {sub_id async for sub_id in client_subs.values_list('sub_id', flat=True)}
+    return views.build_gym_page_state(
+        client, client_sub_ids, await views.gym_page_modified(pk).afirst(),
+    )
+
+
+async def gym_detail_page(request, pk):
+    """
+    Display detailed information about a specific gym.
+
+    Args:
+        request (ASGIRequest): The current HTTP request object.
+        pk (UUID): The primary key of the gym to display.
+
+    Returns:
+        HttpResponse: Render the gym detail template.
+    """
+    state = await gym_page_state(request, pk)
+    if state is None:
+        return redirect('/login')
+
+    async def render_page():
+        context = {
+            'shared': await gym_page_shared(pk),
+            'client': state['client'],
+            'client_sub_ids': state['client_sub_ids'],
+            'purchase_key': uuid4().hex,
+        }
+        return render(request, 'gym.html', context)
+
+    if state['etag'] is None:
+        return await render_page()
+    return await aconditional_response(
+        request, state['etag'], state['last_modified'], render_page,
+    )
+
+
+async def coach_detail_page(request, pk):
+    """
+    Display detailed information about a specific coach.
+
+    Args:
+        request (ASGIRequest): The current HTTP request object.
+        pk (UUID): The primary key of the coach to display.
+
+    Returns:
+        HttpResponse: Render the coach detail template.
+    """
+    async def render_page():
+        coach = await aget_object_or_404(Coach, id=pk)
+        certfs = [certf async for certf in Certificate.objects.filter(coach=coach)]
+        return render(request, 'coach.html', {'coach': coach, 'certfs': certfs})
+
+    state = await views.coach_page_modified(pk).afirst()
+    if state is None:
+        return await render_page()
+    return await aconditional_response(
+        request, make_etag(*state), latest(*state[:2]), render_page,
+    )
@@ -0,0 +1,120 @@
+"""
+Token authentication with an in-process cache.
+
+Authenticated tokens are kept in memory for `TOKEN_CACHE_TTL` seconds, so most requests
+neither hash a password nor query the database. Each entry remembers the auth version of
+its user, stored in the default Django cache, and signal receivers bump that version when a
+token or a user changes, which revokes cached entries.
+
+The revocation reaches every worker process only when they share that cache, e.g. through
+Memcached, Redis or a file based backend set by `CACHE_BACKEND`. With the default
+local-memory backend `TOKEN_CACHE_TTL` defaults to 0, which checks every token in the
+database, otherwise other processes would keep accepting a revoked token for that long.
+"""
+
+from collections import OrderedDict
+from copy import copy
+from threading import Lock
+from time import monotonic
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from .metrics import record_cache
+
+TOKEN_CACHE_TTL = getattr(settings, 'TOKEN_CACHE_TTL', 0)
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE = 'token'  # noqa: S105 - the label of the cache in the metrics, not a secret
+AUTH_VERSION_KEY = 'auth-version:{0}'
+
+_tokens = OrderedDict()
+_lock = Lock()
+
+
+def auth_version_key(user_id) -> str:
+    """
+    Build the cache key of the auth version of a user.
+
+    Args:
+        user_id: Primary key of the user.
+
+    Returns:
+        str: The cache key.
+    """
+    return AUTH_VERSION_KEY.format(user_id)
+
+
+def get_auth_version(user_id) -> int:
+    """
+    Get the auth version of a user.
+
+    Args:
+        user_id: Primary key of the user.
+
+    Returns:
+        int: The version, 0 if it was never bumped.
+    """
+    return cache.get(auth_version_key(user_id), 0)
+
+
+def bump_auth_version(user_id) -> None:
+    """
+    Invalidate cached tokens of a user in every process.
+
+    Args:
+        user_id: Primary key of the user.
+    """
+    key = auth_version_key(user_id)
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def clear_token_cache() -> None:
+    """Forget every token cached by this process."""
+    with _lock:
+        _tokens.clear()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """`TokenAuthentication` serving repeated tokens from memory."""
+
+    def authenticate_credentials(self, key: str):
+        """
+        Authenticate a token, from the process cache when possible.
+
+        Args:
+            key (str): The token key.
+
+        Raises:
+            AuthenticationFailed: If the token is invalid or its user is inactive.
+
+        Returns:
+            tuple: The user and the token.
+        """
+        now = monotonic()
+        with _lock:
+            entry = _tokens.get(key)
+        if entry is not None:
+            user, token, version, expires = entry
+            if expires > now and get_auth_version(user.pk) == version:
+                record_cache(TOKEN_CACHE, True)
+                return copy(user), token
+            with _lock:
+                _tokens.pop(key, None)
+        record_cache(TOKEN_CACHE, False)
+        model = self.get_model()
+        user_id = model.objects.filter(key=key).values_list('user_id', flat=True).first()
+        if user_id is None:
+            raise AuthenticationFailed('Invalid token.')
+        version = get_auth_version(user_id)
+        user, token = super().authenticate_credentials(key)
+        with _lock:
+            _tokens[key] = (user, token, version, now + TOKEN_CACHE_TTL)
+            while len(_tokens) > TOKEN_CACHE_SIZE:
+                _tokens.popitem(last=False)
+        return copy(user), token
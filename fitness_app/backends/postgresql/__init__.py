@@ -0,0 +1 @@
+"""PostgreSQL backend with a connection pool per worker process."""
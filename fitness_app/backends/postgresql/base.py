@@ -0,0 +1,161 @@
+"""
+PostgreSQL backend borrowing connections from a `psycopg_pool` pool.
+
+Set `OPTIONS['pool']` to the keyword arguments of `ConnectionPool`, for example
+`{'min_size': 2, 'max_size': 10}`, to enable it. Each worker process opens one pool per
+database alias on the first query, a request checks a connection out when it first touches
+the database and puts it back when Django closes the connection at the end of the request,
+so `CONN_MAX_AGE` must stay 0. With `CONN_HEALTH_CHECKS` the pool checks a connection before
+handing it out. Pooled connections live across requests, which lets psycopg keep the
+statements prepared by `prepare_threshold` on the server.
+"""
+
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+try:
+    from psycopg_pool import ConnectionPool
+except ImportError:
+    ConnectionPool = None
+
+POOL_OPTION = 'pool'
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    """Test database creation closing the pool before the test database is dropped."""
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        self.connection.close_pool()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL database wrapper with an optional process-wide connection pool."""
+
+    creation_class = DatabaseCreation
+    pools = {}
+    pools_lock = threading.Lock()
+
+    @property
+    def pool_options(self) -> dict | None:
+        """
+        Get the pool options of the alias.
+
+        Raises:
+            ImproperlyConfigured: If the pool is enabled without psycopg_pool or with
+                persistent connections.
+
+        Returns:
+            dict | None: Keyword arguments of the pool, None if pooling is off.
+        """
+        options = self.settings_dict['OPTIONS'].get(POOL_OPTION)
+        if not options or self.alias == NO_DB_ALIAS:
+            return None
+        if ConnectionPool is None:
+            raise ImproperlyConfigured('Connection pooling requires the psycopg_pool package.')
+        if self.settings_dict['CONN_MAX_AGE'] != 0:
+            raise ImproperlyConfigured('Pooled connections require CONN_MAX_AGE = 0.')
+        return options
+
+    @property
+    def pool(self):
+        """
+        Get the pool of the alias, opening it on first use.
+
+        A pool opened for another database name, as happens when the test runner switches
+        to the test database, is closed and replaced.
+
+        Returns:
+            ConnectionPool | None: The pool, None if pooling is off.
+        """
+        options = self.pool_options
+        if options is None:
+            return None
+        name = self.settings_dict['NAME']
+        with self.pools_lock:
+            pool = self.pools.get(self.alias)
+            if pool is not None and pool.name == name:
+                return pool
+            if pool is not None:
+                pool.close()
+            check = ConnectionPool.check_connection
+            pool = ConnectionPool(
+                kwargs=self.get_connection_params(),
+                name=name,
+                open=False,
+                check=check if self.settings_dict['CONN_HEALTH_CHECKS'] else None,
+                **options,
+            )
+            pool.open()
+            self.pools[self.alias] = pool
+        return pool
+
+    def close_pool(self):
+        """Close the pool of the alias and its connections."""
+        with self.pools_lock:
+            pool = self.pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+    def get_connection_params(self) -> dict:
+        """
+        Get the arguments of `psycopg.connect()` without the pool options.
+
+        Returns:
+            dict: The connection parameters.
+        """
+        params = super().get_connection_params()
+        params.pop(POOL_OPTION, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        """
+        Check a connection out of the pool, or open one if pooling is off.
+
+        Args:
+            conn_params (dict): The connection parameters.
+
+        Returns:
+            psycopg.Connection: The connection.
+        """
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+        connection = pool.getconn()
+        isolation_level = self.settings_dict['OPTIONS'].get('isolation_level')
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = IsolationLevel(isolation_level)
+            connection.isolation_level = self.isolation_level
+        return connection
+
+    def _close(self):
+        """Put the connection back into the pool, or close it if pooling is off."""
+        pool = getattr(self.connection, '_pool', None)
+        if pool is None or pool.closed:
+            return super()._close()
+        with self.wrap_database_errors:
+            pool.putconn(self.connection)
+        self.connection = None
+        return None
+
+
+def pool_stats() -> dict:
+    """
+    Collect the utilization of the pools opened by this process.
+
+    Returns:
+        dict: `ConnectionPool.get_stats()` per database alias, for example `pool_size`,
+            `pool_available`, `requests_waiting` and `requests_wait_ms`.
+    """
+    return {
+        alias: DatabaseWrapper.pools[alias].get_stats()
+        for alias in connections
+        if alias in DatabaseWrapper.pools
+    }
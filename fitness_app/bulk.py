@@ -0,0 +1,353 @@
+"""
+Bulk create, update and delete for the REST viewsets.
+
+Items of a payload are validated one by one with related primary keys resolved by one
+query per model. Valid items are written with `bulk_create`/`bulk_update` in chunks inside
+one transaction, many-to-many links are inserted as through rows, and every item gets
+its own result.
+"""
+
+from collections import defaultdict
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.relations import ManyRelatedField
+from rest_framework.response import Response
+
+from .serializers import RELATED_CACHE, CachedPrimaryKeyRelatedField
+from .signals import bulk_changed
+
+BULK_CHUNK_SIZE = 500
+MAX_BULK_ITEMS = 10000
+ATOMIC_QUERY_PARAM = 'atomic'
+TRUE_VALUES = frozenset(('1', 'true', 'yes'))
+FAILED_DEPENDENCY = 424
+
+
+def to_pk(model_class, value):
+    """
+    Convert a value sent by the client to a primary key.
+
+    Args:
+        model_class (class): Model the primary key belongs to.
+        value: The value sent by the client.
+
+    Returns:
+        Any: The primary key or None if the value is not a valid one.
+    """
+    try:
+        return model_class._meta.pk.to_python(value)
+    except (ValidationError, TypeError, ValueError):
+        return None
+
+
+def resolve_related(serializer, items: list) -> dict:
+    """
+    Load the objects referenced by primary key relations of the items.
+
+    Args:
+        serializer (Serializer): Serializer the items are validated with.
+        items (list): Payload items.
+
+    Returns:
+        dict: Related objects by primary key per model.
+    """
+    wanted = defaultdict(set)
+    querysets = {}
+    for name, field in serializer.fields.items():
+        many = isinstance(field, ManyRelatedField)
+        relation = field.child_relation if many else field
+        if field.read_only or not isinstance(relation, CachedPrimaryKeyRelatedField):
+            continue
+        queryset = relation.get_queryset()
+        querysets[queryset.model] = queryset
+        for item in items:
+            values = item.get(name) if isinstance(item, dict) else None
+            for value in (values if many and isinstance(values, list) else [values]):
+                pk = to_pk(queryset.model, value)
+                if pk is not None:
+                    wanted[queryset.model].add(pk)
+    return {
+        model_class: queryset.in_bulk(wanted[model_class]) if wanted[model_class] else {}
+        for model_class, queryset in querysets.items()
+    }
+
+
+def split_many_to_many(model_class, validated_data: dict) -> tuple[dict, dict]:
+    """
+    Separate many-to-many values from the concrete field values.
+
+    Args:
+        model_class (class): The model.
+        validated_data (dict): Validated data of one item.
+
+    Returns:
+        tuple[dict, dict]: Concrete values and related primary keys by m2m field.
+    """
+    links = {}
+    for field in model_class._meta.many_to_many:
+        if field.name in validated_data:
+            links[field] = {related.pk for related in validated_data.pop(field.name)}
+    return validated_data, links
+
+
+def write_links(field, links: dict, replace: bool) -> None:
+    """
+    Insert through rows of a many-to-many field in bulk.
+
+    Args:
+        field (ManyToManyField): The many-to-many field.
+        links (dict): Sets of related primary keys by primary key of the owner.
+        replace (bool): Whether to remove links missing from `links` first.
+    """
+    if not links:
+        return
+    through = field.remote_field.through
+    source = f'{field.m2m_field_name()}_id'
+    target = f'{field.m2m_reverse_field_name()}_id'
+    existing = set()
+    if replace:
+        rows = through.objects.filter(**{f'{source}__in': list(links)})
+        rows = rows.values_list('pk', source, target)
+        stale = [pk for pk, owner, related in rows if related not in links[owner]]
+        existing = {(owner, related) for _, owner, related in rows}
+        if stale:
+            through.objects.filter(pk__in=stale).delete()
+    created = [
+        through(**{source: owner, target: related})
+        for owner, related_pks in links.items()
+        for related in related_pks
+        if (owner, related) not in existing
+    ]
+    through.objects.bulk_create(created, batch_size=BULK_CHUNK_SIZE)
+    bulk_changed.send(sender=through, instances=created)
+
+
+def item_error(index: int, errors) -> dict:
+    """
+    Build the result of a rejected item.
+
+    Args:
+        index (int): Position of the item in the payload.
+        errors: Validation errors.
+
+    Returns:
+        dict: The result.
+    """
+    return {'index': index, 'status': status.HTTP_400_BAD_REQUEST, 'errors': errors}
+
+
+class BulkMixin:
+    """
+    Viewset mixin adding `POST`, `PUT` and `DELETE` on `<prefix>/bulk/`.
+
+    `POST` takes a list of objects, `PUT` a list of objects with their `id` and `DELETE` a
+    list of ids. Invalid items are reported and skipped, with `?atomic=true` any invalid
+    item aborts the whole batch. The response is `201`/`200` when everything was written,
+    `207` when only some items were and `400` when nothing was.
+    """
+
+    bulk_chunk_size = BULK_CHUNK_SIZE
+
+    @action(detail=False, methods=['post', 'put', 'delete'], url_path='bulk')
+    def bulk(self, request, *args, **kwargs):
+        """
+        Create, update or delete a list of objects.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: Per item results.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items or len(items) > MAX_BULK_ITEMS:
+            return Response(
+                {'detail': f'Expected a list of 1 to {MAX_BULK_ITEMS} items.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        atomic = request.query_params.get(ATOMIC_QUERY_PARAM, '').lower() in TRUE_VALUES
+        handlers = {
+            'POST': (self.bulk_create, status.HTTP_201_CREATED),
+            'PUT': (self.bulk_update, status.HTTP_200_OK),
+            'DELETE': (self.bulk_destroy, status.HTTP_200_OK),
+        }
+        handler, success_status = handlers[request.method]
+        results, valid = handler(items, success_status)
+        failed = len(items) - len(valid)
+        if failed and atomic:
+            for result in results:
+                if result['status'] == success_status:
+                    result['status'] = FAILED_DEPENDENCY
+            valid = []
+        elif valid:
+            with transaction.atomic():
+                self.bulk_write(request.method, valid)
+        if not failed:
+            response_status = success_status
+        elif valid:
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_400_BAD_REQUEST
+        return Response({'results': results}, status=response_status)
+
+    def bulk_serializer_context(self, items: list) -> dict:
+        """
+        Build a serializer context with the related objects of the items preloaded.
+
+        Args:
+            items (list): Payload items.
+
+        Returns:
+            dict: The context.
+        """
+        context = self.get_serializer_context()
+        serializer = self.get_serializer_class()(context=context)
+        context[RELATED_CACHE] = resolve_related(serializer, items)
+        return context
+
+    def bulk_instances(self, items: list, results: list, with_data: bool) -> dict:
+        """
+        Load the objects addressed by the items, reporting missing and repeated ids.
+
+        Args:
+            items (list): Objects with ids or ids.
+            results (list): Per item results, rejected items are appended.
+            with_data (bool): Whether items are objects holding an `id`.
+
+        Returns:
+            dict: Loaded objects by the position of their item.
+        """
+        model_class = self.get_queryset().model
+        pks, seen = {}, set()
+        for index, item in enumerate(items):
+            value = item.get('id') if with_data and isinstance(item, dict) else item
+            pk = None if with_data and not isinstance(item, dict) else to_pk(model_class, value)
+            if pk is None:
+                results.append(item_error(index, {'id': ['A valid id is required.']}))
+            elif pk in seen:
+                results.append(item_error(index, {'id': ['Duplicate id.']}))
+            else:
+                seen.add(pk)
+                pks[index] = pk
+        found = model_class._default_manager.in_bulk(list(pks.values())) if pks else {}
+        instances = {}
+        for index, pk in pks.items():
+            if pk in found:
+                instances[index] = found[pk]
+            else:
+                results.append(item_error(index, {'id': ['Not found.']}))
+        return instances
+
+    def bulk_create(self, items: list, success_status: int) -> tuple[list, list]:
+        """
+        Validate objects to create.
+
+        Args:
+            items (list): Payload items.
+            success_status (int): Status of written items.
+
+        Returns:
+            tuple[list, list]: Per item results and valid items.
+        """
+        model_class = self.get_queryset().model
+        serializer_class = self.get_serializer_class()
+        context = self.bulk_serializer_context(items)
+        results, valid = [], []
+        for index, item in enumerate(items):
+            serializer = serializer_class(data=item, context=context)
+            if not serializer.is_valid():
+                results.append(item_error(index, serializer.errors))
+                continue
+            data, links = split_many_to_many(model_class, dict(serializer.validated_data))
+            instance = model_class(**data)
+            valid.append((instance, None, links))
+            results.append({'index': index, 'status': success_status, 'id': str(instance.pk)})
+        return results, valid
+
+    def bulk_update(self, items: list, success_status: int) -> tuple[list, list]:
+        """
+        Validate objects to update.
+
+        Args:
+            items (list): Payload items.
+            success_status (int): Status of written items.
+
+        Returns:
+            tuple[list, list]: Per item results and valid items.
+        """
+        model_class = self.get_queryset().model
+        serializer_class = self.get_serializer_class()
+        results = []
+        instances = self.bulk_instances(items, results, with_data=True)
+        context = self.bulk_serializer_context([items[index] for index in instances])
+        valid = []
+        for index, instance in instances.items():
+            serializer = serializer_class(instance, data=items[index], context=context)
+            if not serializer.is_valid():
+                results.append(item_error(index, serializer.errors))
+                continue
+            data, links = split_many_to_many(model_class, dict(serializer.validated_data))
+            valid.append((instance, data, links))
+            results.append({'index': index, 'status': success_status, 'id': str(instance.pk)})
+        results.sort(key=lambda result: result['index'])
+        return results, valid
+
+    def bulk_destroy(self, items: list, success_status: int) -> tuple[list, list]:
+        """
+        Validate ids to delete.
+
+        Args:
+            items (list): Payload ids.
+            success_status (int): Status of written items.
+
+        Returns:
+            tuple[list, list]: Per item results and valid items.
+        """
+        results = []
+        instances = self.bulk_instances(items, results, with_data=False)
+        results.extend(
+            {'index': index, 'status': success_status, 'id': str(instance.pk)}
+            for index, instance in instances.items()
+        )
+        results.sort(key=lambda result: result['index'])
+        return results, [(instance, None, {}) for instance in instances.values()]
+
+    def bulk_write(self, method: str, valid: list) -> None:
+        """
+        Write validated items in chunks.
+
+        Args:
+            method (str): HTTP method of the request.
+            valid (list): Triples of an object, its new values on update and its m2m links.
+        """
+        model_class = self.get_queryset().model
+        instances = [instance for instance, _, _ in valid]
+        if method == 'DELETE':
+            pks = [instance.pk for instance in instances]
+            model_class._default_manager.filter(pk__in=pks).delete()
+            return
+        if method == 'POST':
+            model_class._default_manager.bulk_create(instances, batch_size=self.bulk_chunk_size)
+        else:
+            bulk_changed.send(sender=model_class, instances=instances)
+            fields = set()
+            for instance, data, _ in valid:
+                for name, value in data.items():
+                    setattr(instance, name, value)
+                fields.update(data)
+            if fields:
+                model_class._default_manager.bulk_update(
+                    instances, list(fields), batch_size=self.bulk_chunk_size,
+                )
+        links = defaultdict(dict)
+        for instance, _, instance_links in valid:
+            for field, related_pks in instance_links.items():
+                links[field][instance.pk] = related_pks
+        for field, field_links in links.items():
+            write_links(field, field_links, replace=method == 'PUT')
+        bulk_changed.send(sender=model_class, instances=instances)
@@ -0,0 +1,329 @@
+"""
+This module contains conditional GET (ETag / Last-Modified) support.
+
+Validators are read from one row found through an index, so a client holding a fresh copy
+gets `304 Not Modified` before anything is serialized or rendered. A list depends on the
+latest `modified_datetime` of its model and on its latest `Tombstone`, which stay cheap to
+read on large tables, unlike counting the listed rows. An object depends on its own
+`modified_datetime`.
+"""
+
+from datetime import datetime
+from hashlib import sha256
+
+from django.core.exceptions import ValidationError
+from django.db.models import DateTimeField, Subquery, Value
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import Tombstone
+
+BROWSABLE_API_FORMAT = 'api'
+
+
+def make_etag(*parts) -> str:
+    """
+    Build a strong ETag from the values the representation depends on.
+
+    Args:
+        parts: Values the representation depends on.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    digest = sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def latest(*moments) -> datetime | None:
+    """
+    Get the latest of the given datetimes.
+
+    Args:
+        moments: Datetimes, None values are ignored.
+
+    Returns:
+        datetime | None: The latest datetime, if any.
+    """
+    return max((moment for moment in moments if moment), default=None)
+
+
+def list_rows(queryset):
+    """
+    Select the last modification and the last deletion of the rows of a list.
+
+    Rows filtered out of the list count as well, so a row leaving the filters changes them.
+    Rows with no `modified_datetime` are skipped, Postgres sorts them first in a descending
+    order and they would hide every later modification.
+
+    Args:
+        queryset (QuerySet): Queryset of a model with `modified_datetime`.
+
+    Returns:
+        QuerySet: Values list of the latest row of the model.
+    """
+    model_class = queryset.model
+    tombstones = Tombstone.objects.filter(model=model_class._meta.model_name)
+    last_deleted = tombstones.order_by('-deleted_datetime', '-id').values('deleted_datetime')[:1]
+    rows = model_class._default_manager.filter(modified_datetime__isnull=False)
+    return rows.order_by('-modified_datetime').values_list(
+        'modified_datetime', Subquery(last_deleted),
+    )
+
+
+def object_rows(queryset):
+    """
+    Select the last modification of an object.
+
+    Args:
+        queryset (QuerySet): Queryset narrowed down to the object.
+
+    Returns:
+        QuerySet: Values list of the object, with no deletion.
+    """
+    return queryset.order_by().values_list(
+        'modified_datetime', Value(None, output_field=DateTimeField()),
+    )
+
+
+def modified_state(rows) -> tuple[datetime | None, datetime | None]:
+    """
+    Read the last modification and the last deletion a representation depends on.
+
+    Args:
+        rows (QuerySet): Values list built by `list_rows` or `object_rows`.
+
+    Returns:
+        tuple[datetime | None, datetime | None]: Last modified and last deleted datetimes.
+    """
+    return rows.first() or (None, None)
+
+
+async def amodified_state(rows) -> tuple[datetime | None, datetime | None]:
+    """
+    Asynchronous version of `modified_state`.
+
+    Args:
+        rows (QuerySet): Values list built by `list_rows` or `object_rows`.
+
+    Returns:
+        tuple[datetime | None, datetime | None]: Last modified and last deleted datetimes.
+    """
+    return await rows.afirst() or (None, None)
+
+
+def subquery_aggregate(queryset, aggregate) -> Subquery:
+    """
+    Turn an aggregate over a correlated queryset into a scalar subquery.
+
+    Args:
+        queryset (QuerySet): Queryset filtered by an `OuterRef`.
+        aggregate (Aggregate): The aggregate to compute.
+
+    Returns:
+        Subquery: The scalar subquery.
+    """
+    grouped = queryset.order_by().annotate(group_key=Value(1)).values('group_key')
+    return Subquery(grouped.annotate(result=aggregate).values('result')[:1])
+
+
+def conditional_response(request, etag: str, last_modified: datetime | None, render):
+    """
+    Answer with `304 Not Modified` or render the response and attach validators.
+
+    Args:
+        request (HttpRequest): The current request.
+        etag (str): The ETag of the representation.
+        last_modified (datetime | None): Last modification time of the representation.
+        render (Callable): Builds the full response.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = render()
+    return with_validators(response, etag, timestamp)
+
+
+async def aconditional_response(request, etag: str, last_modified: datetime | None, render):
+    """
+    Asynchronous version of `conditional_response`.
+
+    Args:
+        request (HttpRequest): The current request.
+        etag (str): The ETag of the representation.
+        last_modified (datetime | None): Last modification time of the representation.
+        render (Callable): Coroutine function building the full response.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = await render()
+    return with_validators(response, etag, timestamp)
+
+
+def with_validators(response, etag: str, timestamp: int | None):
+    """
+    Attach validators to a full or a `304 Not Modified` response.
+
+    Args:
+        response (HttpResponse): The response.
+        etag (str): The ETag of the representation.
+        timestamp (int | None): Last modification time as a POSIX timestamp.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    if response.status_code in {200, 304}:
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+    return response
+
+
+class ConditionalGetMixin:
+    """Viewset mixin answering list and retrieve requests conditionally."""
+
+    def representation_etag(self, request, *moments) -> str:
+        """
+        Build the ETag of a read response.
+
+        Args:
+            request (Request): The current request.
+            moments: Last modification and last deletion times of the rows.
+
+        Returns:
+            str: The ETag.
+        """
+        return make_etag(
+            *(moment and moment.isoformat() for moment in moments),
+            request.get_full_path(), request.accepted_media_type,
+        )
+
+    def lookup_queryset(self):
+        """
+        Narrow the queryset down to the object of a retrieve request.
+
+        Returns:
+            QuerySet | None: The queryset, None if the lookup value is invalid.
+        """
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        try:
+            return self.filter_queryset(self.get_queryset()).filter(**lookup)
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def conditional(self, request, rows, render):
+        """
+        Answer a read request for the given rows conditionally.
+
+        Args:
+            request (Request): The current request.
+            rows (QuerySet): Values list built by `list_rows` or `object_rows`.
+            render (Callable): Builds the full response.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if request.accepted_renderer.format == BROWSABLE_API_FORMAT:
+            return render()
+        state = modified_state(rows)
+        etag = self.representation_etag(request, *state)
+        return conditional_response(request, etag, latest(*state), render)
+
+    async def aconditional(self, request, rows, render):
+        """
+        Asynchronous version of `conditional`.
+
+        Args:
+            request (Request): The current request.
+            rows (QuerySet): Values list built by `list_rows` or `object_rows`.
+            render (Callable): Coroutine function building the full response.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if request.accepted_renderer.format == BROWSABLE_API_FORMAT:
+            return await render()
+        state = await amodified_state(rows)
+        etag = self.representation_etag(request, *state)
+        return await aconditional_response(request, etag, latest(*state), render)
+
+    def list(self, request, *args, **kwargs):
+        """
+        List objects unless the client already has them.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        def render():
+            return super(ConditionalGetMixin, self).list(request, *args, **kwargs)
+
+        return self.conditional(request, list_rows(self.get_queryset()), render)
+
+    async def alist(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `list`.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        async def render():
+            return await super(ConditionalGetMixin, self).alist(request, *args, **kwargs)
+
+        return await self.aconditional(request, list_rows(self.get_queryset()), render)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve an object unless the client already has it.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        def render():
+            return super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+
+        queryset = self.lookup_queryset()
+        if queryset is None:
+            return render()
+        return self.conditional(request, object_rows(queryset), render)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `retrieve`.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        async def render():
+            return await super(ConditionalGetMixin, self).aretrieve(request, *args, **kwargs)
+
+        queryset = self.lookup_queryset()
+        if queryset is None:
+            return await render()
+        return await self.aconditional(request, object_rows(queryset), render)
@@ -0,0 +1,433 @@
+"""
+Streaming exports of whole tables as NDJSON or CSV.
+
+Rows are read with `values().iterator(chunk_size=...)`, which uses a server-side cursor on
+Postgres, and written to the response chunk by chunk, so memory does not grow with the
+table. Filters are applied in SQL. Under ASGI the response streams from an asynchronous
+iterator fetching the chunks with `aiterator()`, since Django buffers a synchronous one
+there before sending anything.
+"""
+
+import csv
+import json
+from datetime import datetime, time
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import permissions, renderers
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.views import APIView
+
+from .models import Address, ClientSub, Coach, Gym, Subscription
+
+EXPORT_CHUNK_SIZE = 2000
+NDJSON = 'ndjson'
+CSV = 'csv'
+CONTENT_TYPES = {NDJSON: 'application/x-ndjson', CSV: 'text/csv'}
+GYM_PARAM = 'gym'
+EXPIRE_FROM_PARAM = 'expire_from'
+EXPIRE_TO_PARAM = 'expire_to'
+MODIFIED_SINCE_PARAM = 'modified_since'
+FILTER_PARAMS = (GYM_PARAM, EXPIRE_FROM_PARAM, EXPIRE_TO_PARAM, MODIFIED_SINCE_PARAM)
+
+
+class ExportError(ValueError):
+    """Raised when an export or its filters are invalid."""
+
+
+class Export:
+    """Description of an exported table."""
+
+    def __init__(self, model_class, columns, gym_lookup, expire_field=None, modified_field=None):
+        """
+        Describe an export.
+
+        Args:
+            model_class (class): The exported model.
+            columns (Iterable[str | tuple[str, str]]): Columns or pairs of a name and a lookup.
+            gym_lookup (str): Lookup filtering rows by gym.
+            expire_field (str | None): Lookup of the subscription expire date, if any.
+            modified_field (str | None): Lookup of the modification datetime, if any.
+        """
+        self.model_class = model_class
+        self.fields = [column for column in columns if isinstance(column, str)]
+        aliases = [column for column in columns if not isinstance(column, str)]
+        self.expressions = {name: F(lookup) for name, lookup in aliases}
+        self.header = [column if isinstance(column, str) else column[0] for column in columns]
+        self.gym_lookup = gym_lookup
+        self.expire_field = expire_field
+        self.modified_field = modified_field
+
+
+TIMESTAMPS = ('created_datetime', 'modified_datetime')
+EXPORTS = {
+    'subscription': Export(
+        Subscription,
+        ('id', 'gym_id', 'price', 'expire_date', 'description', *TIMESTAMPS),
+        gym_lookup='gym_id',
+        expire_field='expire_date',
+        modified_field='modified_datetime',
+    ),
+    'client_sub': Export(
+        ClientSub,
+        (
+            'id',
+            ('gym_id', 'sub__gym_id'),
+            'sub_id',
+            'client_id',
+            ('username', 'client__user__username'),
+            ('expire_date', 'sub__expire_date'),
+        ),
+        gym_lookup='sub__gym_id',
+        expire_field='sub__expire_date',
+    ),
+    'gym': Export(
+        Gym,
+        ('id', 'gym_name', 'address_id', *TIMESTAMPS),
+        gym_lookup='id',
+        modified_field='modified_datetime',
+    ),
+    'coach': Export(
+        Coach,
+        ('id', 'first_name', 'last_name', 'spec', *TIMESTAMPS),
+        gym_lookup='gymcoach__gym_id',
+        modified_field='modified_datetime',
+    ),
+    'address': Export(
+        Address,
+        (
+            'id', 'city_name', 'street_name', 'house_number', 'apartment_number', 'body',
+            *TIMESTAMPS,
+        ),
+        gym_lookup='gym__id',
+        modified_field='modified_datetime',
+    ),
+}
+
+
+def get_export(name: str) -> Export:
+    """
+    Find an export by name.
+
+    Args:
+        name (str): Name of the export.
+
+    Raises:
+        ExportError: If there is no such export.
+
+    Returns:
+        Export: The export.
+    """
+    try:
+        return EXPORTS[name]
+    except KeyError:
+        raise ExportError(f'Unknown export {name}, expected one of: {", ".join(EXPORTS)}.')
+
+
+def parse_moment(value: str) -> datetime:
+    """
+    Parse a date or a datetime, naive values are taken in the current timezone.
+
+    Args:
+        value (str): ISO 8601 date or datetime.
+
+    Raises:
+        ExportError: If the value can not be parsed.
+
+    Returns:
+        datetime: An aware datetime.
+    """
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            moment = datetime.combine(day, time.min) if day else None
+    except ValueError:
+        moment = None
+    if moment is None:
+        raise ExportError(f'Invalid datetime {value}.')
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+def parse_day(value: str):
+    """
+    Parse a date.
+
+    Args:
+        value (str): ISO 8601 date.
+
+    Raises:
+        ExportError: If the value can not be parsed.
+
+    Returns:
+        date: The date.
+    """
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ExportError(f'Invalid date {value}.')
+    return day
+
+
+def build_queryset(export: Export, filters: dict):
+    """
+    Build the queryset of an export with its filters pushed into SQL.
+
+    Args:
+        export (Export): The export.
+        filters (dict): Filter values by parameter name, empty values are ignored.
+
+    Raises:
+        ExportError: If a filter is invalid or not supported by the export.
+
+    Returns:
+        QuerySet: The `values()` queryset in primary key order.
+    """
+    lookups = {}
+    if filters.get(GYM_PARAM):
+        try:
+            lookups[export.gym_lookup] = Gym._meta.pk.to_python(filters[GYM_PARAM])
+        except DjangoValidationError:
+            raise ExportError(f'Invalid gym {filters[GYM_PARAM]}.')
+    for param, suffix in ((EXPIRE_FROM_PARAM, 'gte'), (EXPIRE_TO_PARAM, 'lte')):
+        if filters.get(param):
+            if export.expire_field is None:
+                raise ExportError(f'{param} is not supported by this export.')
+            lookups[f'{export.expire_field}__{suffix}'] = parse_day(filters[param])
+    if filters.get(MODIFIED_SINCE_PARAM):
+        if export.modified_field is None:
+            raise ExportError(f'{MODIFIED_SINCE_PARAM} is not supported by this export.')
+        lookups[f'{export.modified_field}__gte'] = parse_moment(filters[MODIFIED_SINCE_PARAM])
+    queryset = export.model_class.objects.filter(**lookups).order_by('pk')
+    return queryset.values(*export.fields, **export.expressions)
+
+
+def _csv_value(value):
+    """
+    Convert a value to its CSV cell.
+
+    Args:
+        value: The value.
+
+    Returns:
+        Any: The cell value.
+    """
+    if value is None:
+        return ''
+    return value.isoformat() if hasattr(value, 'isoformat') else value
+
+
+class _Lines:
+    """File-like object collecting what `csv.writer` writes."""
+
+    def __init__(self):
+        """Start with no lines."""
+        self.lines = []
+
+    def write(self, line: str) -> None:
+        """
+        Collect a line.
+
+        Args:
+            line (str): The line.
+        """
+        self.lines.append(line)
+
+    def flush(self) -> str:
+        """
+        Take the collected lines.
+
+        Returns:
+            str: The lines joined.
+        """
+        text = ''.join(self.lines)
+        self.lines = []
+        return text
+
+
+def render_header(export: Export, output: str) -> str:
+    """
+    Render what precedes the rows of an export.
+
+    Args:
+        export (Export): The export.
+        output (str): `ndjson` or `csv`.
+
+    Returns:
+        str: The CSV header, nothing for NDJSON.
+    """
+    if output != CSV:
+        return ''
+    lines = _Lines()
+    csv.writer(lines).writerow(export.header)
+    return lines.flush()
+
+
+def render_chunk(export: Export, rows: list, output: str) -> str:
+    """
+    Render a chunk of rows of an export.
+
+    Args:
+        export (Export): The export.
+        rows (list): The `values()` rows.
+        output (str): `ndjson` or `csv`.
+
+    Returns:
+        str: The rendered rows.
+    """
+    if output == CSV:
+        lines = _Lines()
+        writer = csv.writer(lines)
+        for row in rows:
+            writer.writerow([_csv_value(row[column]) for column in export.header])
+        return lines.flush()
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    return ''.join(
+        encoder.encode({column: row[column] for column in export.header}) + '\n' for row in rows
+    )
+
+
+def stream_rows(export: Export, queryset, output: str, chunk_size: int | None = None):
+    """
+    Render the rows of an export chunk by chunk.
+
+    Args:
+        export (Export): The export.
+        queryset (QuerySet): The `values()` queryset of the export.
+        output (str): `ndjson` or `csv`.
+        chunk_size (int | None): Rows fetched and yielded at once, `EXPORT_CHUNK_SIZE` by default.
+
+    Yields:
+        str: Rendered chunks, the first one starting with the header.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    header, chunk = render_header(export, output), []
+    for row in queryset.iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield header + render_chunk(export, chunk, output)
+            header, chunk = '', []
+    if header or chunk:
+        yield header + render_chunk(export, chunk, output)
+
+
+async def astream_rows(export: Export, queryset, output: str, chunk_size: int | None = None):
+    """
+    Asynchronous version of `stream_rows`.
+
+    Args:
+        export (Export): The export.
+        queryset (QuerySet): The `values()` queryset of the export.
+        output (str): `ndjson` or `csv`.
+        chunk_size (int | None): Rows fetched and yielded at once, `EXPORT_CHUNK_SIZE` by default.
+
+    Yields:
+        str: Rendered chunks, the first one starting with the header.
+    """
+    chunk_size = chunk_size or EXPORT_CHUNK_SIZE
+    header, chunk = render_header(export, output), []
+    async for row in queryset.aiterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield header + render_chunk(export, chunk, output)
+            header, chunk = '', []
+    if header or chunk:
+        yield header + render_chunk(export, chunk, output)
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Renderer selecting NDJSON exports, other data is rendered as one JSON line."""
+
+    media_type = CONTENT_TYPES[NDJSON]
+    format = NDJSON
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None) -> bytes:
+        """
+        Render error details as a JSON line.
+
+        Args:
+            data: Response data.
+            accepted_media_type (str | None): The accepted media type.
+            renderer_context (dict | None): The renderer context.
+
+        Returns:
+            bytes: The rendered data.
+        """
+        if data is None:
+            return b''
+        return (json.dumps(data, cls=DjangoJSONEncoder) + '\n').encode()
+
+
+class CSVRenderer(NDJSONRenderer):
+    """Renderer selecting CSV exports."""
+
+    media_type = CONTENT_TYPES[CSV]
+    format = CSV
+
+
+class IsSuperuser(permissions.BasePermission):
+    """Allow superusers only."""
+
+    def has_permission(self, request, view) -> bool:
+        """
+        Check that the user is a superuser.
+
+        Args:
+            request (Request): The current request.
+            view (APIView): The view.
+
+        Returns:
+            bool: True if the user is a superuser.
+        """
+        return bool(request.user and request.user.is_superuser)
+
+
+class ExportView(APIView):
+    """
+    Stream an export, `?format=csv` or `Accept: text/csv` selects CSV instead of NDJSON.
+
+    Filters: `gym`, `expire_from`, `expire_to` and `modified_since`.
+    """
+
+    permission_classes = [IsSuperuser]
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request, name: str):
+        """
+        Stream the rows of an export.
+
+        Args:
+            request (Request): The current request.
+            name (str): Name of the export.
+
+        Raises:
+            NotFound: If there is no such export.
+            ValidationError: If a filter is invalid.
+
+        Returns:
+            StreamingHttpResponse: The streamed rows, from an asynchronous iterator under ASGI.
+        """
+        try:
+            export = get_export(name)
+        except ExportError as error:
+            raise NotFound(str(error))
+        filters = {param: request.query_params.get(param) for param in FILTER_PARAMS}
+        try:
+            queryset = build_queryset(export, filters)
+        except ExportError as error:
+            raise ValidationError({'detail': str(error)})
+        output = request.accepted_renderer.format
+        stream = astream_rows if isinstance(request._request, ASGIRequest) else stream_rows
+        response = StreamingHttpResponse(
+            stream(export, queryset, output), content_type=CONTENT_TYPES[output],
+        )
+        response['Content-Disposition'] = f'attachment; filename="{name}.{output}"'
+        return response
@@ -0,0 +1,484 @@
+"""
+Sparse fieldsets and read serializers working on `values()` rows.
+
+`?fields=` limits both the selected columns and the keys of the output. Reads of
+serializers made of plain fields and primary key relations skip model instantiation:
+rows come from `values()`, many-to-many ids from one query over the through table, and
+every value goes through the `to_representation` of its DRF field, so the output is the
+same as the one of the model serializer.
+"""
+
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import ForeignKey, ManyToManyField
+from django.http import Http404
+from django.shortcuts import aget_object_or_404
+from django.utils import timezone
+from rest_framework import ISO_8601
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField, UUIDField
+from rest_framework.generics import get_object_or_404
+from rest_framework.relations import (ManyRelatedField, PrimaryKeyRelatedField,
+                                      RelatedField)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+FIELDS_QUERY_PARAM = 'fields'
+FIELDS_SEPARATOR = ','
+UTC_SUFFIX = '+00:00'
+
+
+class UnsupportedField(Exception):
+    """Raised when a serializer field can not be rendered from `values()` rows."""
+
+
+def parse_fields(value: str | None, serializer_class) -> list | None:
+    """
+    Parse the `fields` query parameter.
+
+    Args:
+        value (str | None): The raw parameter.
+        serializer_class (class): Serializer the fields belong to.
+
+    Raises:
+        ValidationError: If a field is not rendered by the serializer.
+
+    Returns:
+        list | None: Requested field names in serializer order, None for all of them.
+    """
+    if value is None:
+        return None
+    requested = {name.strip() for name in value.split(FIELDS_SEPARATOR) if name.strip()}
+    readable = [
+        name for name, field in serializer_class().fields.items() if not field.write_only
+    ]
+    unknown = requested.difference(readable)
+    if unknown:
+        message = f'Unknown fields: {", ".join(sorted(unknown))}.'
+        raise ValidationError({FIELDS_QUERY_PARAM: [message]})
+    return [name for name in readable if name in requested]
+
+
+def datetime_converter(field: DateTimeField):
+    """
+    Build the conversion of an ISO 8601 datetime field with its timezone resolved once.
+
+    Args:
+        field (DateTimeField): The serializer field.
+
+    Returns:
+        Callable: The conversion, equal to `field.to_representation`.
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    if output_format is None or output_format.lower() != ISO_8601 or field_timezone is None:
+        return field.to_representation
+
+    def convert(moment):
+        if not timezone.is_aware(moment):
+            return field.to_representation(moment)
+        text = moment.astimezone(field_timezone).isoformat()
+        return f'{text[:-len(UTC_SUFFIX)]}Z' if text.endswith(UTC_SUFFIX) else text
+
+    return convert
+
+
+def converter(field):
+    """
+    Get the conversion of a plain serializer field.
+
+    Args:
+        field (Field): The serializer field.
+
+    Returns:
+        Callable: The conversion, equal to `field.to_representation`.
+    """
+    if isinstance(field, DateTimeField):
+        return datetime_converter(field)
+    if isinstance(field, UUIDField) and field.uuid_format == 'hex_verbose':
+        return str
+    return field.to_representation
+
+
+class ValuesSerializer:
+    """Render rows of `values()` querysets the way a model serializer renders instances."""
+
+    def __init__(self, serializer_class, field_names=None):
+        """
+        Plan the columns and conversions of a serializer.
+
+        Args:
+            serializer_class (class): The model serializer.
+            field_names (Iterable[str] | None): Rendered fields, all of them by default.
+
+        Raises:
+            UnsupportedField: If a field can not be rendered from values.
+        """
+        self.model = serializer_class.Meta.model
+        self.columns = ['id']
+        self.names = []
+        self.scalars = []
+        self.many = []
+        for name, field in serializer_class().fields.items():
+            if field.write_only or (field_names is not None and name not in field_names):
+                continue
+            model_field = self.model_field(field)
+            self.names.append(name)
+            if isinstance(field, ManyRelatedField):
+                if not isinstance(model_field, ManyToManyField):
+                    raise UnsupportedField(name)
+                self.check_pk_relation(field.child_relation, name)
+                self.many.append((name, model_field, self.pk_converter(field.child_relation)))
+            elif isinstance(field, RelatedField):
+                if not isinstance(model_field, ForeignKey):
+                    raise UnsupportedField(name)
+                self.check_pk_relation(field, name)
+                self.scalars.append((name, model_field.attname, self.pk_converter(field)))
+            else:
+                if model_field is None or model_field.is_relation:
+                    raise UnsupportedField(name)
+                self.scalars.append((name, model_field.attname, converter(field)))
+        self.columns.extend(column for _, column, _ in self.scalars if column not in self.columns)
+
+    def model_field(self, field):
+        """
+        Find the model field a serializer field reads.
+
+        Args:
+            field (Field): The serializer field.
+
+        Returns:
+            Field | None: The model field, None if the source is not a model field.
+        """
+        if field.source == '*' or '.' in field.source:
+            return None
+        try:
+            return self.model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+    @staticmethod
+    def check_pk_relation(relation, name: str) -> None:
+        """
+        Make sure a relation renders primary keys only.
+
+        Args:
+            relation (RelatedField): The relation.
+            name (str): Name of the serializer field.
+
+        Raises:
+            UnsupportedField: If the relation renders more than the primary key.
+        """
+        if not isinstance(relation, PrimaryKeyRelatedField):
+            raise UnsupportedField(name)
+        if not relation.use_pk_only_optimization():
+            raise UnsupportedField(name)
+
+    @staticmethod
+    def pk_converter(relation):
+        """
+        Get the conversion of related primary keys.
+
+        Args:
+            relation (PrimaryKeyRelatedField): The relation.
+
+        Returns:
+            Callable | None: The conversion, None if the key is rendered as it is.
+        """
+        return relation.pk_field.to_representation if relation.pk_field is not None else None
+
+    def values(self, queryset, *extra_columns):
+        """
+        Select the columns the serializer needs.
+
+        Args:
+            queryset (QuerySet): Queryset of the serializer model.
+            extra_columns (str): Additional columns, for example the ordering field.
+
+        Returns:
+            QuerySet: The `values()` queryset.
+        """
+        columns = self.columns + [column for column in extra_columns if column not in self.columns]
+        return queryset.select_related(None).prefetch_related(None).values(*columns)
+
+    def related_ids(self, rows: list) -> dict:
+        """
+        Load ids of many-to-many relations of the rows.
+
+        Args:
+            rows (list): The `values()` rows.
+
+        Returns:
+            dict: Related ids by row id per field name.
+        """
+        related = {}
+        ids = [row['id'] for row in rows]
+        for name, field, _ in self.many:
+            links = defaultdict(list)
+            if ids:
+                for owner, related_id in self.links(field, ids):
+                    links[owner].append(related_id)
+            related[name] = links
+        return related
+
+    async def arelated_ids(self, rows: list) -> dict:
+        """
+        Asynchronous version of `related_ids`.
+
+        Args:
+            rows (list): The `values()` rows.
+
+        Returns:
+            dict: Related ids by row id per field name.
+        """
+        related = {}
+        ids = [row['id'] for row in rows]
+        for name, field, _ in self.many:
+            links = defaultdict(list)
+            if ids:
+                async for owner, related_id in self.links(field, ids):
+                    links[owner].append(related_id)
+            related[name] = links
+        return related
+
+    @staticmethod
+    def links(field: ManyToManyField, ids: list):
+        """
+        Select the links of a many-to-many relation from the through table.
+
+        Args:
+            field (ManyToManyField): The relation.
+            ids (list): Ids of the owners.
+
+        Returns:
+            QuerySet: Pairs of owner and related ids.
+        """
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+        through = field.remote_field.through.objects.filter(**{f'{source}__in': ids})
+        return through.values_list(source, target)
+
+    def serialize(self, rows) -> list:
+        """
+        Render the rows.
+
+        Args:
+            rows (Iterable[dict]): The `values()` rows.
+
+        Returns:
+            list: Rendered rows.
+        """
+        rows = list(rows)
+        return self.render(rows, self.related_ids(rows) if self.many else {})
+
+    async def aserialize(self, rows: list) -> list:
+        """
+        Asynchronous version of `serialize`.
+
+        Args:
+            rows (list): The `values()` rows.
+
+        Returns:
+            list: Rendered rows.
+        """
+        return self.render(rows, await self.arelated_ids(rows) if self.many else {})
+
+    def render(self, rows: list, related: dict) -> list:
+        """
+        Render rows with their many-to-many ids.
+
+        Args:
+            rows (list): The `values()` rows.
+            related (dict): Related ids by row id per field name.
+
+        Returns:
+            list: Rendered rows.
+        """
+        rendered = []
+        for row in rows:
+            item = {}
+            for name, column, convert in self.scalars:
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            for name, _, convert in self.many:
+                ids = related[name].get(row['id'], [])
+                item[name] = [convert(pk) for pk in ids] if convert else ids
+            rendered.append({name: item[name] for name in self.names})
+        return rendered
+
+
+class SparseFieldsMixin:
+    """Viewset mixin adding `?fields=` and the `values()` read path to list and retrieve."""
+
+    fields_query_param = FIELDS_QUERY_PARAM
+    fast_read = True
+
+    def requested_fields(self) -> list | None:
+        """
+        Get the fields requested with `?fields=`.
+
+        Returns:
+            list | None: Requested field names, None for all of them.
+        """
+        if not hasattr(self, '_requested_fields'):
+            value = self.request.query_params.get(self.fields_query_param)
+            self._requested_fields = parse_fields(value, self.get_serializer_class())
+        return self._requested_fields
+
+    def values_serializer(self) -> ValuesSerializer | None:
+        """
+        Build the `values()` serializer of the request if the serializer allows one.
+
+        Returns:
+            ValuesSerializer | None: The serializer, None to use the model serializer.
+        """
+        if not self.fast_read:
+            return None
+        try:
+            return ValuesSerializer(self.get_serializer_class(), self.requested_fields())
+        except UnsupportedField:
+            return None
+
+    def get_serializer(self, *args, **kwargs):
+        """
+        Drop fields the client did not ask for from read serializers.
+
+        Args:
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Serializer: The serializer.
+        """
+        serializer = super().get_serializer(*args, **kwargs)
+        field_names = self.requested_fields() if self.request.method == 'GET' else None
+        if field_names is not None:
+            fields = getattr(serializer, 'child', serializer).fields
+            for name in [name for name in fields if name not in field_names]:
+                fields.pop(name)
+        return serializer
+
+    def ordering_columns(self, request) -> list:
+        """
+        Get the columns keyset pagination reads besides the serialized ones.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            list: The ordering column, if the paginator has one.
+        """
+        get_ordering = getattr(self.paginator, 'get_ordering', None)
+        return [get_ordering(request)[0]] if get_ordering else []
+
+    async def apaginate_queryset(self, queryset) -> list | None:
+        """
+        Asynchronous version of `paginate_queryset`.
+
+        Args:
+            queryset (QuerySet): Queryset to paginate.
+
+        Returns:
+            list | None: Rows of the page, None if pagination is off.
+        """
+        if self.paginator is None:
+            return None
+        apaginate = getattr(self.paginator, 'apaginate_queryset', None)
+        if apaginate is None:
+            return await sync_to_async(self.paginate_queryset)(queryset)
+        return await apaginate(queryset, self.request, view=self)
+
+    def list(self, request, *args, **kwargs):
+        """
+        List objects from `values()` rows when possible.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        fast = self.values_serializer()
+        if fast is None:
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = fast.values(queryset, *self.ordering_columns(request))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(fast.serialize(queryset))
+        return self.get_paginated_response(fast.serialize(page))
+
+    async def alist(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `list`, model serializers are run in a thread.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        fast = self.values_serializer()
+        if fast is None:
+            return await sync_to_async(super().list)(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = fast.values(queryset, *self.ordering_columns(request))
+        page = await self.apaginate_queryset(queryset)
+        if page is None:
+            return Response(await fast.aserialize([row async for row in queryset]))
+        return self.get_paginated_response(await fast.aserialize(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve an object from a `values()` row when possible.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        fast = self.values_serializer()
+        if fast is None:
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = fast.values(self.filter_queryset(self.get_queryset()))
+        row = get_object_or_404(queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]})
+        return Response(fast.serialize([row])[0])
+
+    async def aretrieve(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `retrieve`, model serializers are run in a thread.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Raises:
+            Http404: If the object does not exist or the lookup value is invalid.
+
+        Returns:
+            Response: The response.
+        """
+        fast = self.values_serializer()
+        if fast is None:
+            return await sync_to_async(super().retrieve)(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = fast.values(self.filter_queryset(self.get_queryset()))
+        try:
+            row = await aget_object_or_404(
+                queryset, **{self.lookup_field: kwargs[lookup_url_kwarg]},
+            )
+        except (TypeError, ValueError, DjangoValidationError) as error:
+            raise Http404 from error
+        return Response((await fast.aserialize([row]))[0])
@@ -0,0 +1,111 @@
+"""
+Whitelisted filtering and ordering for the REST viewsets.
+
+Viewsets declare `filter_fields`, query parameters mapped to ORM lookups, and
+`ordering_fields`, the columns clients may sort by. Every allowed filter finds its rows
+through an index, and every allowed ordering walks one in the listed order, anything else is
+rejected instead of becoming a sequential scan. A filter with the default order walks its
+composite index too. Other combinations, such as `gym` with `ordering=expire_date`, `spec`
+with `ordering=last_name` or the `city` of gyms, which joins the addresses, sort the
+matching rows only.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models.constants import LOOKUP_SEP
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+ORDERING_PARAM = 'ordering'
+KEYSET_ORDERING = 'keyset_ordering'
+DESCENDING_PREFIX = '-'
+
+
+def lookup_field(model_class, lookup: str):
+    """
+    Find the model field a lookup ends at.
+
+    Args:
+        model_class (class): Model the lookup starts from.
+        lookup (str): The lookup, for example `address__city_name` or `price__gte`.
+
+    Returns:
+        Field: The model field.
+    """
+    field = None
+    for part in lookup.split(LOOKUP_SEP):
+        if field is not None and field.is_relation:
+            model_class = field.related_model
+        try:
+            field = model_class._meta.get_field(part)
+        except FieldDoesNotExist:
+            break
+    return field
+
+
+class WhitelistFilterBackend(BaseFilterBackend):
+    """Apply the `filter_fields` of a viewset, parsing values with their model fields."""
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Filter the queryset by the whitelisted query parameters.
+
+        Args:
+            request (Request): The current request.
+            queryset (QuerySet): The queryset.
+            view (APIView): The view.
+
+        Raises:
+            ValidationError: If a value is invalid.
+
+        Returns:
+            QuerySet: The filtered queryset.
+        """
+        lookups, errors = {}, {}
+        for param, lookup in getattr(view, 'filter_fields', {}).items():
+            value = request.query_params.get(param)
+            if value in {None, ''}:
+                continue
+            try:
+                lookups[lookup] = lookup_field(queryset.model, lookup).to_python(value)
+            except DjangoValidationError as error:
+                errors[param] = error.messages
+        if errors:
+            raise ValidationError(errors)
+        return queryset.filter(**lookups) if lookups else queryset
+
+
+class KeysetOrderingFilter(BaseFilterBackend):
+    """
+    Order by one of the `ordering_fields` of a viewset with `?ordering=[-]field`.
+
+    The choice is kept on the request, so keyset pagination walks the `(field, id)` index.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """
+        Order the queryset by the requested field.
+
+        Args:
+            request (Request): The current request.
+            queryset (QuerySet): The queryset.
+            view (APIView): The view.
+
+        Raises:
+            ValidationError: If ordering by the field is not allowed.
+
+        Returns:
+            QuerySet: The ordered queryset.
+        """
+        value = request.query_params.get(ORDERING_PARAM)
+        if not value:
+            return queryset
+        field = value.removeprefix(DESCENDING_PREFIX)
+        allowed = getattr(view, 'ordering_fields', ())
+        if field not in allowed:
+            message = f'Ordering is allowed by: {", ".join(allowed)}.'
+            raise ValidationError({ORDERING_PARAM: [message]})
+        descending = value.startswith(DESCENDING_PREFIX)
+        setattr(request, KEYSET_ORDERING, (field, descending))
+        prefix = DESCENDING_PREFIX if descending else ''
+        return queryset.order_by(f'{prefix}{field}', f'{prefix}id')
@@ -0,0 +1,455 @@
+"""
+Bulk import of addresses, gyms, coaches, certificates and their links from CSV or NDJSON.
+
+Rows are streamed from the input and handled in batches. Every row is validated with the
+field validators of its model, such as `check_positive` and `check_body`, and the row checks
+of the import, such as `check_address_len`, without the per-object queries of `full_clean`.
+Rows refer to each other by natural keys, a gym to its address by the city, street, house
+and apartment, a certificate to its coach by the first and last name. The keys are resolved
+through in-memory maps, loaded with one query per model and extended as rows are imported,
+and a row whose natural key is already known updates that row. On PostgreSQL a batch is
+loaded with `COPY` into a temporary staging table and merged into the table with one
+`INSERT ... ON CONFLICT`, other databases use an upserting `bulk_create`.
+"""
+
+import csv
+import json
+from time import perf_counter
+
+from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+from .models import (Address, Certificate, Coach, Gym, GymCoach,
+                     check_address_len)
+from .signals import bulk_changed
+
+IMPORT_BATCH_SIZE = 5000
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = {'.csv': CSV, '.ndjson': NDJSON, '.jsonl': NDJSON}
+STAGING_PREFIX = 'import_'
+
+
+class ImportDataError(ValueError):
+    """Raised when an import or its input is invalid."""
+
+
+def check_full_address(address: Address) -> None:
+    """
+    Check the length of the written out address.
+
+    Args:
+        address (Address): The address to check.
+
+    Raises:
+        ValidationError: If the address is too short.
+    """
+    check_address_len(f'{address.city_name}, {address.street_name}, {address.house_number}')
+
+
+class Import:
+    """Description of an imported table."""
+
+    def __init__(self, model_class, fields, natural_key, relations=None, checks=()):
+        """
+        Describe an import.
+
+        Args:
+            model_class (class): The imported model.
+            fields (Iterable[str]): Fields read from the input as they are.
+            natural_key (Iterable[str]): Fields identifying a row, relations included.
+            relations (dict | None): Imports of the rows referred to, by foreign key field.
+                The input refers to them by the fields of their natural keys.
+            checks (Iterable[Callable]): Checks of a whole row raising `ValidationError`.
+        """
+        meta = model_class._meta
+        self.model_class = model_class
+        self.fields = [meta.get_field(name) for name in fields]
+        self.relations = {
+            meta.get_field(name): target for name, target in (relations or {}).items()
+        }
+        self.natural_key = [meta.get_field(name).attname for name in natural_key]
+        self.checks = tuple(checks)
+        self.update_fields = [
+            field.name for field in meta.concrete_fields
+            if not field.primary_key and field.attname not in self.natural_key
+            and field.name != 'created_datetime'
+        ]
+
+    def key_of(self, instance) -> tuple:
+        """
+        Get the natural key of an object.
+
+        Args:
+            instance (Model): The object.
+
+        Returns:
+            tuple: Values of the natural key fields.
+        """
+        return tuple(getattr(instance, attname) for attname in self.natural_key)
+
+
+IMPORTS = {
+    'address': Import(
+        Address,
+        ('city_name', 'street_name', 'house_number', 'apartment_number', 'body'),
+        natural_key=('city_name', 'street_name', 'house_number', 'apartment_number'),
+        checks=(check_full_address,),
+    ),
+    'gym': Import(
+        Gym, ('gym_name',), natural_key=('gym_name',), relations={'address': 'address'},
+    ),
+    'coach': Import(
+        Coach, ('first_name', 'last_name', 'spec'), natural_key=('first_name', 'last_name'),
+    ),
+    'certificate': Import(
+        Certificate,
+        ('certf_name', 'description'),
+        natural_key=('coach', 'certf_name'),
+        relations={'coach': 'coach'},
+    ),
+    'gym_coach': Import(
+        GymCoach, (), natural_key=('gym', 'coach'), relations={'gym': 'gym', 'coach': 'coach'},
+    ),
+}
+
+
+def get_import(name: str) -> Import:
+    """
+    Find an import by name.
+
+    Args:
+        name (str): Name of the import.
+
+    Raises:
+        ImportDataError: If there is no such import.
+
+    Returns:
+        Import: The import.
+    """
+    try:
+        return IMPORTS[name]
+    except KeyError:
+        raise ImportDataError(f'Unknown import {name}, expected one of: {", ".join(IMPORTS)}.')
+
+
+def detect_format(path: str) -> str:
+    """
+    Detect the input format by the file extension.
+
+    Args:
+        path (str): Path of the input file.
+
+    Raises:
+        ImportDataError: If the extension is unknown.
+
+    Returns:
+        str: `csv` or `ndjson`.
+    """
+    for extension, input_format in FORMATS.items():
+        if path.lower().endswith(extension):
+            return input_format
+    raise ImportDataError(f'Unknown format of {path}, expected one of: {", ".join(FORMATS)}.')
+
+
+def read_rows(source, input_format: str):
+    """
+    Stream the rows of an input.
+
+    Args:
+        source (Iterable[str]): Lines of the input.
+        input_format (str): `csv` or `ndjson`.
+
+    Raises:
+        ImportDataError: If an NDJSON line is not a JSON object.
+
+    Yields:
+        tuple[int, dict]: Line numbers and rows.
+    """
+    if input_format == CSV:
+        reader = csv.DictReader(source)
+        for row in reader:
+            yield reader.line_num, row
+        return
+    for number, line in enumerate(source, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        if not isinstance(row, dict):
+            raise ImportDataError(f'Line {number} is not a JSON object.')
+        yield number, row
+
+
+def clean_value(field, value):
+    """
+    Convert an input value of a field and run the field validators.
+
+    Args:
+        field (Field): The model field.
+        value: The input value, empty strings are missing values.
+
+    Raises:
+        ValidationError: If the value is invalid.
+
+    Returns:
+        Any: The Python value.
+    """
+    if isinstance(value, str):
+        value = value.strip()
+    if value in (None, ''):
+        value = None if field.null else ''
+    return field.clean(value, None)
+
+
+class ImportResult:
+    """Counters of an import."""
+
+    def __init__(self, name: str):
+        """
+        Start with nothing imported.
+
+        Args:
+            name (str): Name of the import.
+        """
+        self.name = name
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+        self.elapsed = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        """
+        Get the throughput of the import.
+
+        Returns:
+            float: Input rows per second.
+        """
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict:
+        """
+        Summarize the import.
+
+        Returns:
+            dict: The counters.
+        """
+        return {
+            'name': self.name,
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'invalid': len(self.errors),
+            'seconds': self.elapsed,
+            'rows_per_second': self.rows_per_second,
+        }
+
+
+class Importer:
+    """Import runs sharing the natural key maps, so later inputs can refer to earlier ones."""
+
+    def __init__(self, using: str = DEFAULT_DB_ALIAS, batch_size: int | None = None):
+        """
+        Initialize the importer.
+
+        Args:
+            using (str): The database alias.
+            batch_size (int | None): Rows written at once, `IMPORT_BATCH_SIZE` by default.
+        """
+        self.using = using
+        self.batch_size = batch_size or IMPORT_BATCH_SIZE
+        self.keys = {}
+
+    def key_map(self, name: str) -> dict:
+        """
+        Get the primary keys of the rows of an import by natural key, loading them once.
+
+        Args:
+            name (str): Name of the import.
+
+        Returns:
+            dict: Primary keys by natural key.
+        """
+        if name not in self.keys:
+            spec = IMPORTS[name]
+            rows = spec.model_class._default_manager.using(self.using).values_list(
+                *spec.natural_key, 'pk',
+            )
+            self.keys[name] = {
+                tuple(row[:-1]): row[-1] for row in rows.iterator(chunk_size=self.batch_size)
+            }
+        return self.keys[name]
+
+    def resolve(self, field, target: str, row: dict):
+        """
+        Find the primary key of the row a foreign key refers to.
+
+        Args:
+            field (ForeignKey): The foreign key.
+            target (str): Name of the import of the referred rows.
+            row (dict): The input row.
+
+        Raises:
+            ValidationError: If the reference is invalid or unknown.
+
+        Returns:
+            Any: The primary key, None for a missing optional reference.
+        """
+        spec = IMPORTS[target]
+        meta = spec.model_class._meta
+        raw = [row.get(attname) for attname in spec.natural_key]
+        if field.null and all(value in (None, '') for value in raw):
+            return None
+        key = tuple(
+            clean_value(meta.get_field(attname), value)
+            for attname, value in zip(spec.natural_key, raw)
+        )
+        try:
+            return self.key_map(target)[key]
+        except KeyError:
+            raise ValidationError(f'Unknown {target} {", ".join(map(str, key))}.')
+
+    def build(self, spec: Import, row: dict):
+        """
+        Validate an input row and build its object.
+
+        Args:
+            spec (Import): The import.
+            row (dict): The input row.
+
+        Raises:
+            ValidationError: If the row is invalid, with messages by field.
+
+        Returns:
+            Model: The object with a new primary key.
+        """
+        values = {}
+        errors = {}
+        for field in spec.fields:
+            try:
+                values[field.attname] = clean_value(field, row.get(field.name))
+            except ValidationError as error:
+                errors[field.name] = error.messages
+        for field, target in spec.relations.items():
+            try:
+                values[field.attname] = self.resolve(field, target, row)
+            except ValidationError as error:
+                errors[field.name] = error.messages
+        if errors:
+            raise ValidationError(errors)
+        instance = spec.model_class(**values)
+        for check in spec.checks:
+            check(instance)
+        return instance
+
+    def run(self, name: str, rows) -> ImportResult:
+        """
+        Import rows in batches, invalid rows are skipped and reported.
+
+        Args:
+            name (str): Name of the import.
+            rows (Iterable[tuple[int, dict]]): Line numbers and input rows.
+
+        Raises:
+            ImportDataError: If there is no such import or the input is malformed.
+
+        Returns:
+            ImportResult: The counters and the errors by line.
+        """
+        spec = get_import(name)
+        keys = self.key_map(name)
+        result = ImportResult(name)
+        started = perf_counter()
+        batch = {}
+        for line, row in rows:
+            result.rows += 1
+            try:
+                instance = self.build(spec, row)
+            except ValidationError as error:
+                result.errors.append((line, error.messages))
+                continue
+            key = spec.key_of(instance)
+            if key in keys:
+                instance.pk = keys[key]
+                result.updated += 1
+            else:
+                keys[key] = instance.pk
+                result.created += 1
+            batch[instance.pk] = instance
+            if len(batch) >= self.batch_size:
+                self.write(spec, list(batch.values()))
+                batch = {}
+        if batch:
+            self.write(spec, list(batch.values()))
+        result.elapsed = perf_counter() - started
+        return result
+
+    def write(self, spec: Import, instances: list) -> None:
+        """
+        Insert new objects and update known ones in one transaction.
+
+        Args:
+            spec (Import): The import.
+            instances (list): Objects with their primary keys, each at most once.
+        """
+        connection = connections[self.using]
+        with transaction.atomic(using=self.using):
+            if connection.vendor == 'postgresql':
+                copy_merge(connection, spec, instances)
+            else:
+                spec.model_class._default_manager.using(self.using).bulk_create(
+                    instances,
+                    batch_size=self.batch_size,
+                    update_conflicts=bool(spec.update_fields),
+                    ignore_conflicts=not spec.update_fields,
+                    unique_fields=['id'] if spec.update_fields else None,
+                    update_fields=spec.update_fields or None,
+                )
+            bulk_changed.send(sender=spec.model_class, instances=instances)
+
+
+def copy_merge(connection, spec: Import, instances: list) -> None:
+    """
+    Load objects with `COPY` into a staging table and merge them into their table.
+
+    The staging table is dropped after the merge, so the next batch of a surrounding
+    transaction creates it again. Rows with a known primary key update their non-key columns,
+    except the creation datetime.
+
+    Args:
+        connection (DatabaseWrapper): A PostgreSQL connection inside a transaction.
+        spec (Import): The import.
+        instances (list): Objects with their primary keys, each at most once.
+    """
+    meta = spec.model_class._meta
+    quote = connection.ops.quote_name
+    table = quote(meta.db_table)
+    staging = quote(f'{STAGING_PREFIX}{meta.model_name}')
+    fields = meta.concrete_fields
+    # Every identifier is quoted from the model metadata, values only travel through COPY.
+    columns = ', '.join(quote(field.column) for field in fields)
+    if spec.update_fields:
+        assignments = ', '.join(
+            f'{column} = EXCLUDED.{column}'
+            for column in (quote(meta.get_field(name).column) for name in spec.update_fields)
+        )
+        conflict = f'({quote(meta.pk.column)}) DO UPDATE SET {assignments}'  # noqa: S608
+    else:
+        conflict = 'DO NOTHING'
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TEMPORARY TABLE {staging} (LIKE {table} INCLUDING DEFAULTS)')
+        with cursor.copy(f'COPY {staging} ({columns}) FROM STDIN') as copy:
+            for instance in instances:
+                copy.write_row([
+                    field.get_db_prep_save(getattr(instance, field.attname), connection)
+                    for field in fields
+                ])
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} '  # noqa: S608
+            f'ON CONFLICT {conflict}',
+        )
+        cursor.execute(f'DROP TABLE {staging}')
@@ -0,0 +1,194 @@
+"""
+This module contains the client balance ledger.
+
+Every change of a balance is an inserted `BalanceEntry`, the current balance is the latest
+`BalanceSnapshot` plus the entries after it. Credits are plain inserts, they only take the
+shared `FOR KEY SHARE` lock on the client row that their foreign key check takes anyway, so
+they never block each other. Debits and snapshots take the exclusive row lock, which waits
+for in-flight credits, so the balance a debit keeps above zero and the balance a snapshot
+stores are final. The upper bound of a credit is checked against the balance read before
+the insert, concurrent credits may pass it together. `Client.net_worth` is a cached copy of
+the balance refreshed when a snapshot is taken or the balance is read, not on every write.
+"""
+
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Sum
+
+from .models import BalanceEntry, BalanceSnapshot, Client, check_money
+
+SNAPSHOT_INTERVAL = 50
+
+
+class InsufficientFunds(Exception):
+    """Raised when a debit exceeds the client balance."""
+
+
+def _share_lock(client_id) -> None:
+    """
+    Take a lock on the client row that only conflicts with debits and snapshots.
+
+    Taken before the entry gets its id, so a snapshot never misses an entry with a lower id
+    committed after it.
+
+    Args:
+        client_id: Primary key of the client.
+    """
+    if connection.features.has_select_for_update:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT 1 FROM {Client._meta.db_table} WHERE id = %s FOR KEY SHARE',  # noqa: S608
+                [client_id],
+            )
+
+
+def lock_balance(client_id) -> None:
+    """
+    Take the exclusive lock on the client row until the end of the transaction.
+
+    Callers inserting other rows referencing the client before a debit must take it
+    first, otherwise two such transactions deadlock on their shared locks.
+
+    Args:
+        client_id: Primary key of the client.
+    """
+    list(Client.objects.select_for_update().filter(id=client_id).values_list('id'))
+
+
+def _read_balance(client_id) -> tuple[Decimal, int, int]:
+    """
+    Read the balance from the latest snapshot and the entries after it.
+
+    Args:
+        client_id: Primary key of the client.
+
+    Returns:
+        tuple[Decimal, int, int]: Balance, id of the last entry and length of the tail.
+    """
+    snapshot = BalanceSnapshot.objects.filter(client_id=client_id).order_by(
+        '-last_entry_id',
+    ).values_list('balance', 'last_entry_id').first()
+    balance, last_entry_id = snapshot or (Decimal(0), 0)
+    tail = BalanceEntry.objects.filter(client_id=client_id, id__gt=last_entry_id).aggregate(
+        total=Sum('amount'), length=Count('id'), last=Max('id'),
+    )
+    return balance + (tail['total'] or 0), tail['last'] or last_entry_id, tail['length']
+
+
+def _refresh_net_worth(client_id, balance: Decimal) -> None:
+    """
+    Refresh the cached balance of a client, writing the row only when it is stale.
+
+    Args:
+        client_id: Primary key of the client.
+        balance (Decimal): Current balance.
+    """
+    Client.objects.filter(id=client_id).exclude(net_worth=balance).update(net_worth=balance)
+
+
+def _store_snapshot(client_id, balance: Decimal, last_entry_id: int) -> None:
+    """
+    Store a snapshot and refresh the cached balance, the row must be locked.
+
+    Args:
+        client_id: Primary key of the client.
+        balance (Decimal): Current balance.
+        last_entry_id (int): Id of the last entry included in the balance.
+    """
+    BalanceSnapshot.objects.create(
+        client_id=client_id, balance=balance, last_entry_id=last_entry_id,
+    )
+    _refresh_net_worth(client_id, balance)
+
+
+def take_snapshot(client_id) -> Decimal:
+    """
+    Store a snapshot of the client balance.
+
+    Args:
+        client_id: Primary key of the client.
+
+    Returns:
+        Decimal: The balance.
+    """
+    with transaction.atomic():
+        lock_balance(client_id)
+        balance, last_entry_id, _ = _read_balance(client_id)
+        _store_snapshot(client_id, balance, last_entry_id)
+    return balance
+
+
+def get_balance(client_id, net_worth: Decimal | None = None) -> Decimal:
+    """
+    Get the current balance of a client.
+
+    Reads one snapshot and at most about `SNAPSHOT_INTERVAL` entries, a longer tail is
+    folded into a new snapshot. The cached `Client.net_worth` is refreshed if it is stale.
+
+    Args:
+        client_id: Primary key of the client.
+        net_worth (Decimal | None): Cached balance already loaded by the caller, the row is
+            not written when it is current.
+
+    Returns:
+        Decimal: The balance.
+    """
+    balance, _, tail_length = _read_balance(client_id)
+    if tail_length >= SNAPSHOT_INTERVAL:
+        return take_snapshot(client_id)
+    if net_worth != balance:
+        _refresh_net_worth(client_id, balance)
+    return balance
+
+
+def credit(client_id, amount: Decimal, kind: str = BalanceEntry.TOP_UP) -> BalanceEntry:
+    """
+    Add money to a client balance.
+
+    Args:
+        client_id: Primary key of the client.
+        amount (Decimal): Positive amount of money.
+        kind (str): Kind of the entry.
+
+    Raises:
+        ValidationError: If the balance would exceed the allowed amount of money.
+
+    Returns:
+        BalanceEntry: The inserted entry.
+    """
+    check_money(_read_balance(client_id)[0] + amount)
+    with transaction.atomic():
+        _share_lock(client_id)
+        return BalanceEntry.objects.create(client_id=client_id, amount=amount, kind=kind)
+
+
+def debit(
+    client_id, amount: Decimal, kind: str = BalanceEntry.PURCHASE, client_sub=None,
+) -> BalanceEntry:
+    """
+    Take money from a client balance.
+
+    Args:
+        client_id: Primary key of the client.
+        amount (Decimal): Positive amount of money.
+        kind (str): Kind of the entry.
+        client_sub (ClientSub): Purchased subscription, if any.
+
+    Raises:
+        InsufficientFunds: If the balance is lower than the amount.
+
+    Returns:
+        BalanceEntry: The inserted entry.
+    """
+    with transaction.atomic():
+        lock_balance(client_id)
+        balance, _, tail_length = _read_balance(client_id)
+        if balance < amount:
+            raise InsufficientFunds(f'Client {client_id} can not afford {amount}')
+        entry = BalanceEntry.objects.create(
+            client_id=client_id, amount=-amount, kind=kind, client_sub=client_sub,
+        )
+        if tail_length >= SNAPSHOT_INTERVAL:
+            _store_snapshot(client_id, balance - amount, entry.id)
+    return entry
@@ -0,0 +1,352 @@
+"""
+Benchmark of the read endpoints served by the WSGI and the ASGI handler.
+
+Requests are sent in-process: the WSGI handler is called from a pool of threads, like the
+threaded development server, and the ASGI handler from concurrent tasks of one event loop,
+like a single ASGI worker. Under `--server both` each handler runs in its own process with
+the views it is deployed with, the synchronous ones for WSGI and `async_views` for ASGI.
+"""
+
+import asyncio
+import json
+import os
+import subprocess  # noqa: S404 - runs this command again in a child process
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from importlib import import_module
+from math import ceil
+from string import Formatter
+from time import perf_counter
+from urllib.parse import urlsplit
+from uuid import uuid4
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+
+from fitness_app.models import Client, Coach, Gym
+
+SERVERS = ('wsgi', 'asgi')
+BOTH = 'both'
+DEFAULT_PATHS = (
+    '/gyms/',
+    '/coaches/',
+    '/gyms/{gym}/',
+    '/coaches/{coach}/',
+    '/rest/gym/',
+    '/rest/subscription/?ordering=price',
+)
+HOST = 'localhost'
+AUTH_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+COLUMNS = (
+    ('path', -36), ('server', 8), ('req/s', 10), ('p50 ms', 10), ('p99 ms', 10), ('errors', 8),
+)
+
+
+def percentile(values: list, share: float) -> float:
+    """
+    Get the nearest-rank percentile of the values.
+
+    Args:
+        values (list): The values.
+        share (float): The percentile as a share, for example 0.99.
+
+    Returns:
+        float: The percentile, 0 for no values.
+    """
+    if not values:
+        return 0
+    ordered = sorted(values)
+    return ordered[max(ceil(share * len(ordered)) - 1, 0)]
+
+
+def summarize(path: str, server: str, results: list, elapsed: float) -> dict:
+    """
+    Summarize the requests of one path.
+
+    Args:
+        path (str): The requested path.
+        server (str): The handler, `wsgi` or `asgi`.
+        results (list): Latency in seconds and status code of every request.
+        elapsed (float): Wall time of all requests in seconds.
+
+    Returns:
+        dict: Requests per second, median and p99 latency in milliseconds and errors.
+    """
+    latencies = [latency for latency, _ in results]
+    return {
+        'path': path,
+        'server': server,
+        'requests': len(results),
+        'rps': len(results) / elapsed if elapsed else 0,
+        'p50': percentile(latencies, 0.5) * 1000,
+        'p99': percentile(latencies, 0.99) * 1000,
+        'errors': sum(status >= 400 for _, status in results),
+    }
+
+
+def open_session(user: User):
+    """
+    Open a session of the user.
+
+    Args:
+        user (User): The user.
+
+    Returns:
+        SessionBase: The saved session.
+    """
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = AUTH_BACKEND
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session
+
+
+def call_wsgi(handler: WSGIHandler, url: str, cookie: str) -> tuple[float, int]:
+    """
+    Send one request to the WSGI handler.
+
+    Args:
+        handler (WSGIHandler): The handler.
+        url (str): Path and query string.
+        cookie (str): The `Cookie` header.
+
+    Returns:
+        tuple[float, int]: Latency in seconds and status code.
+    """
+    parts = urlsplit(url)
+    environ = {
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'HTTP_HOST': HOST,
+        'SERVER_NAME': HOST,
+        'HTTP_COOKIE': cookie,
+    }
+    setup_testing_defaults(environ)
+    statuses = []
+    started = perf_counter()
+    response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    for _ in response:
+        pass
+    response.close()
+    return perf_counter() - started, int(statuses[0].split()[0])
+
+
+async def call_asgi(handler: ASGIHandler, url: str, cookie: str) -> tuple[float, int]:
+    """
+    Send one request to the ASGI handler.
+
+    Args:
+        handler (ASGIHandler): The handler.
+        url (str): Path and query string.
+        cookie (str): The `Cookie` header.
+
+    Returns:
+        tuple[float, int]: Latency in seconds and status code.
+    """
+    parts = urlsplit(url)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', HOST.encode()), (b'cookie', cookie.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (HOST, 80),
+    }
+    received = asyncio.Event()
+    finished = asyncio.Event()
+    statuses = []
+
+    async def receive():
+        if received.is_set():
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+        received.set()
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    started = perf_counter()
+    await handler(scope, receive, send)
+    finished.set()
+    return perf_counter() - started, statuses[0]
+
+
+def run_wsgi(url: str, cookie: str, requests: int, concurrency: int) -> tuple[list, float]:
+    """
+    Send requests to the WSGI handler from a pool of threads.
+
+    Args:
+        url (str): Path and query string.
+        cookie (str): The `Cookie` header.
+        requests (int): Number of requests.
+        concurrency (int): Number of threads.
+
+    Returns:
+        tuple[list, float]: Latencies and status codes, wall time in seconds.
+    """
+    handler = WSGIHandler()
+    call_wsgi(handler, url, cookie)
+    started = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda _: call_wsgi(handler, url, cookie), range(requests)))
+    return results, perf_counter() - started
+
+
+async def run_asgi(url: str, cookie: str, requests: int, concurrency: int) -> tuple[list, float]:
+    """
+    Send requests to the ASGI handler from concurrent tasks.
+
+    Args:
+        url (str): Path and query string.
+        cookie (str): The `Cookie` header.
+        requests (int): Number of requests.
+        concurrency (int): Number of requests in flight.
+
+    Returns:
+        tuple[list, float]: Latencies and status codes, wall time in seconds.
+    """
+    handler = ASGIHandler()
+    await call_asgi(handler, url, cookie)
+    slots = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with slots:
+            return await call_asgi(handler, url, cookie)
+
+    started = perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(requests)))
+    return list(results), perf_counter() - started
+
+
+class Command(BaseCommand):
+    """Compare requests per second and p99 latency of the WSGI and the ASGI setup."""
+
+    help = 'Benchmark the read pages and REST endpoints under WSGI and ASGI.'
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            'paths', nargs='*', default=DEFAULT_PATHS,
+            help='Paths to request, {gym} and {coach} are replaced with existing ids.',
+        )
+        parser.add_argument('--server', choices=(*SERVERS, BOTH), default=BOTH)
+        parser.add_argument('--requests', type=int, default=500, help='Requests per path.')
+        parser.add_argument('--concurrency', type=int, default=50, help='Requests in flight.')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+
+    def handle(self, *args, **options):
+        """
+        Run the benchmark.
+
+        Args:
+            args: Positional arguments.
+            options: Command options.
+
+        Raises:
+            CommandError: If the requests or the concurrency are not positive.
+        """
+        if options['requests'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--requests and --concurrency must be positive.')
+        if options['server'] == BOTH:
+            results = [row for server in SERVERS for row in self.spawn(server, options)]
+        else:
+            results = self.measure(options['server'], options)
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(''.join(
+            f'{title:>{width}}' if width > 0 else f'{title:<{-width}}' for title, width in COLUMNS
+        ))
+        for row in sorted(results, key=lambda row: row['path']):
+            self.stdout.write(
+                f'{row["path"]:<36}{row["server"]:>8}{row["rps"]:>10.0f}'
+                f'{row["p50"]:>10.1f}{row["p99"]:>10.1f}{row["errors"]:>8}',
+            )
+
+    def spawn(self, server: str, options: dict) -> list:
+        """
+        Run the benchmark of one handler in a process deployed like that handler.
+
+        Args:
+            server (str): The handler, `wsgi` or `asgi`.
+            options (dict): Command options.
+
+        Raises:
+            CommandError: If the process fails.
+
+        Returns:
+            list: Results per path.
+        """
+        command = [
+            sys.executable, '-m', 'django', 'bench_http', *options['paths'],
+            '--server', server, '--json',
+            '--requests', str(options['requests']),
+            '--concurrency', str(options['concurrency']),
+        ]
+        env = {**os.environ, 'ASYNC_VIEWS': '1' if server == 'asgi' else '0'}
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        finished = subprocess.run(  # noqa: S603 - fixed argv of this command, no shell
+            command, cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=False,
+        )
+        if finished.returncode:
+            raise CommandError(f'{server} benchmark failed:\n{finished.stderr}')
+        return json.loads(finished.stdout)
+
+    def measure(self, server: str, options: dict) -> list:
+        """
+        Benchmark every path with one handler as a temporary client.
+
+        Args:
+            server (str): The handler, `wsgi` or `asgi`.
+            options (dict): Command options.
+
+        Raises:
+            CommandError: If a path needs a gym or a coach and there is none.
+
+        Returns:
+            list: Results per path.
+        """
+        ids = {
+            'gym': Gym.objects.values_list('id', flat=True).first(),
+            'coach': Coach.objects.values_list('id', flat=True).first(),
+        }
+        user = User.objects.create_user(username=f'bench-{uuid4().hex[:12]}')
+        Client.objects.create(user=user)
+        session = open_session(user)
+        cookie = f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+        try:
+            results = []
+            for path in options['paths']:
+                names = {name for _, name, _, _ in Formatter().parse(path) if name}
+                missing = names.difference(name for name, pk in ids.items() if pk is not None)
+                if missing:
+                    raise CommandError(f'No {", ".join(sorted(missing))} to request {path}.')
+                args = (path.format(**ids), cookie, options['requests'], options['concurrency'])
+                if server == 'wsgi':
+                    timings, elapsed = run_wsgi(*args)
+                else:
+                    timings, elapsed = asyncio.run(run_asgi(*args))
+                results.append(summarize(path, server, timings, elapsed))
+            return results
+        finally:
+            session.delete()
+            user.delete()
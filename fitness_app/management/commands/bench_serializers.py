@@ -0,0 +1,151 @@
+"""Benchmark of the model serializers against the `values()` read serializers."""
+
+from datetime import date
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from fitness_app.fast_serializers import ValuesSerializer
+from fitness_app.models import Address, Certificate, Coach, Gym, GymCoach, Subscription
+from fitness_app.planner import plan_queryset
+from fitness_app.serializers import (AddressSerializer, CertificateSerializer,
+                                     CoachSerializer, GymSerializer,
+                                     SubscriptionSerializer)
+
+SERIALIZERS = (
+    AddressSerializer,
+    GymSerializer,
+    CoachSerializer,
+    CertificateSerializer,
+    SubscriptionSerializer,
+)
+COACHES_PER_GYM = 3
+CHUNK_SIZE = 1000
+COLUMNS = (
+    ('serializer', -24), ('rows', 8), ('model rows/s', 16), ('values rows/s', 16), ('speedup', 10),
+)
+
+
+def seed(rows: int) -> None:
+    """
+    Create `rows` objects of every benchmarked model.
+
+    Args:
+        rows (int): Number of objects per model.
+    """
+    addresses = Address.objects.bulk_create(
+        [
+            Address(city_name='City', street_name='Street', house_number=number + 1)
+            for number in range(rows)
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+    gyms = Gym.objects.bulk_create(
+        [
+            Gym(gym_name=f'Gym {number}', address=address)
+            for number, address in enumerate(addresses)
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+    coaches = Coach.objects.bulk_create(
+        [Coach(first_name='First', last_name='Last', spec='Spec') for _ in range(rows)],
+        batch_size=CHUNK_SIZE,
+    )
+    GymCoach.objects.bulk_create(
+        [
+            GymCoach(gym=gym, coach=coaches[(number + shift) % rows])
+            for number, gym in enumerate(gyms)
+            for shift in range(min(COACHES_PER_GYM, rows))
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+    Certificate.objects.bulk_create(
+        [Certificate(coach=coach, certf_name='Certificate') for coach in coaches],
+        batch_size=CHUNK_SIZE,
+    )
+    Subscription.objects.bulk_create(
+        [
+            Subscription(price=number, expire_date=date(2050, 1, 1), gym=gym)
+            for number, gym in enumerate(gyms)
+        ],
+        batch_size=CHUNK_SIZE,
+    )
+
+
+def best_time(function, repeat: int) -> float:
+    """
+    Run a function several times.
+
+    Args:
+        function (Callable): The function.
+        repeat (int): Number of runs.
+
+    Returns:
+        float: The fastest run in seconds.
+    """
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        function()
+        timings.append(perf_counter() - started)
+    return min(timings)
+
+
+class Command(BaseCommand):
+    """Compare rows per second of the model and `values()` serializers."""
+
+    help = 'Benchmark the REST serializers against the values() read serializers.'
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument('--rows', type=int, default=2000, help='Objects per model.')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement.')
+        parser.add_argument(
+            '--seed', action='store_true', help='Create the objects in a rolled back transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """
+        Run the benchmark.
+
+        Args:
+            args: Positional arguments.
+            options: Command options.
+        """
+        with transaction.atomic():
+            if options['seed']:
+                seed(options['rows'])
+            self.measure(options['rows'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def measure(self, rows: int, repeat: int) -> None:
+        """
+        Print rows per second of both serializers for every model.
+
+        Args:
+            rows (int): Maximal number of rows per model.
+            repeat (int): Runs per measurement.
+        """
+        self.stdout.write(''.join(
+            f'{title:>{width}}' if width > 0 else f'{title:<{-width}}' for title, width in COLUMNS
+        ))
+        for serializer_class in SERIALIZERS:
+            model_class = serializer_class.Meta.model
+            queryset = model_class.objects.order_by('id')[:rows]
+            fast = ValuesSerializer(serializer_class)
+            planned = plan_queryset(queryset, serializer_class)
+            model_time = best_time(lambda: serializer_class(planned.all(), many=True).data, repeat)
+            values_time = best_time(lambda: fast.serialize(fast.values(queryset)), repeat)
+            total = queryset.count()
+            if not total:
+                continue
+            self.stdout.write(
+                f'{serializer_class.__name__:<24}{total:>8}{total / model_time:>16.0f}'
+                f'{total / values_time:>16.0f}{model_time / values_time:>9.1f}x',
+            )
@@ -0,0 +1,140 @@
+"""
+Benchmark of random and time-ordered UUID primary keys on PostgreSQL.
+
+Rows are inserted in batches into a scratch table per key version, shaped like the
+`UUIDMixin` tables: a `uuid` primary key and a short text column. The insert throughput and
+the final size of the table and its primary key index are reported, random keys split index
+pages all over the B-tree and leave them half empty, time-ordered keys fill them in order.
+"""
+
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from fitness_app.uuids import UUID_FACTORIES
+
+TABLE_PREFIX = 'bench_uuid_v'
+MEGABYTE = 1024 * 1024
+COLUMNS = (
+    ('version', -8), ('rows', 10), ('rows/s', 12), ('table MB', 10), ('index MB', 10),
+    ('index B/row', 12),
+)
+
+
+def insert_rows(table: str, factory, rows: int, batch: int) -> float:
+    """
+    Insert rows with keys from a factory in batches.
+
+    Args:
+        table (str): The quoted table name.
+        factory (Callable): The key factory.
+        rows (int): Number of rows.
+        batch (int): Rows per statement.
+
+    Returns:
+        float: Wall time in seconds.
+    """
+    # The table name is quoted by measure() from a constant prefix and a version number.
+    statement = (
+        f'INSERT INTO {table} (id, name) '  # noqa: S608
+        'SELECT * FROM unnest(%s::uuid[], %s::text[])'
+    )
+    started = perf_counter()
+    with connection.cursor() as cursor:
+        for offset in range(0, rows, batch):
+            size = min(batch, rows - offset)
+            cursor.execute(
+                statement,
+                [
+                    [factory() for _ in range(size)],
+                    [f'Row {number}' for number in range(offset, offset + size)],
+                ],
+            )
+    return perf_counter() - started
+
+
+def measure(version: int, rows: int, batch: int) -> dict:
+    """
+    Benchmark one key version in a scratch table.
+
+    Args:
+        version (int): The UUID version.
+        rows (int): Number of rows.
+        batch (int): Rows per statement.
+
+    Returns:
+        dict: Insert throughput and sizes.
+    """
+    table = connection.ops.quote_name(f'{TABLE_PREFIX}{version}')
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        cursor.execute(f'CREATE TABLE {table} (id uuid PRIMARY KEY, name text NOT NULL)')
+    try:
+        elapsed = insert_rows(table, UUID_FACTORIES[version], rows, batch)
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {table}')
+            cursor.execute(
+                'SELECT pg_table_size(%s::regclass), pg_indexes_size(%s::regclass)', [table, table],
+            )
+            table_size, index_size = cursor.fetchone()
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+    return {
+        'version': version,
+        'rows': rows,
+        'rows_per_second': rows / elapsed if elapsed else 0,
+        'table_bytes': table_size,
+        'index_bytes': index_size,
+    }
+
+
+class Command(BaseCommand):
+    """Compare insert throughput and index size of version 4 and version 7 primary keys."""
+
+    help = 'Benchmark random and time-ordered UUID primary keys on PostgreSQL.'
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument('--rows', type=int, default=200000, help='Rows per key version.')
+        parser.add_argument('--batch', type=int, default=1000, help='Rows per INSERT.')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+
+    def handle(self, *args, **options):
+        """
+        Run the benchmark.
+
+        Args:
+            args: Positional arguments.
+            options: Command options.
+
+        Raises:
+            CommandError: If the database is not PostgreSQL or the sizes are not positive.
+        """
+        if connection.vendor != 'postgresql':
+            raise CommandError('The benchmark measures PostgreSQL indexes.')
+        if options['rows'] < 1 or options['batch'] < 1:
+            raise CommandError('--rows and --batch must be positive.')
+        results = [
+            measure(version, options['rows'], options['batch'])
+            for version in sorted(UUID_FACTORIES)
+        ]
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(''.join(
+            f'{title:>{width}}' if width > 0 else f'{title:<{-width}}' for title, width in COLUMNS
+        ))
+        for row in results:
+            self.stdout.write(
+                f'{row["version"]:<8}{row["rows"]:>10}{row["rows_per_second"]:>12.0f}'
+                f'{row["table_bytes"] / MEGABYTE:>10.1f}{row["index_bytes"] / MEGABYTE:>10.1f}'
+                f'{row["index_bytes"] / row["rows"]:>12.1f}',
+            )
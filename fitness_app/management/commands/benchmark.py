@@ -0,0 +1,296 @@
+"""
+Benchmark of the ORM paths behind the key pages and endpoints at several dataset sizes.
+
+For every scale a seeded dataset is inserted in a transaction which is rolled back
+afterwards, so the database is left as it was. The views are called in-process with
+requests built by a request factory, without the middleware, and each path is timed over
+several runs after a warm-up run. The cached part of the gym page is dropped before every
+run, so its queries and rendering are measured. Results are stored as JSON together with
+the current commit, and `--compare` prints the change against an earlier result file.
+"""
+
+import json
+import shutil
+import subprocess  # noqa: S404 - only runs git to record the commit
+from datetime import datetime, timezone
+from statistics import median
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from fitness_app import views
+from fitness_app.models import Client, Coach, Gym
+from fitness_app.seeding import scaled_counts, seed_dataset
+from fitness_app.signals import gym_page_key
+
+DEFAULT_SCALES = (1.0, 5.0)
+HOST = 'localhost'
+COLUMNS = (
+    ('path', -20), ('scale', 8), ('queries', 9), ('best ms', 10), ('median ms', 11),
+    ('change', 9),
+)
+
+
+class Fixture:
+    """Objects the benchmarked requests are about."""
+
+    def __init__(self):
+        """Pick the busiest client, gym and coach of the dataset."""
+        self.client = Client.objects.select_related('user').annotate(
+            total=Count('clientsub'),
+        ).order_by('-total', 'id').first()
+        self.gym = Gym.objects.annotate(
+            total=Count('subscription'),
+        ).order_by('-total', 'id').first()
+        self.coach = Coach.objects.annotate(
+            total=Count('certificate'),
+        ).order_by('-total', 'id').first()
+        self.factory = RequestFactory(HTTP_HOST=HOST)
+        self.api_factory = APIRequestFactory(HTTP_HOST=HOST)
+        self.subscription_list = views.SubscriptionViewSet.as_view({'get': 'list'})
+
+    def get(self, path: str):
+        """
+        Build a GET request of the client.
+
+        Args:
+            path (str): Path and query string.
+
+        Returns:
+            WSGIRequest: The request.
+        """
+        request = self.factory.get(path)
+        request.user = self.client.user
+        return request
+
+
+def gym_detail(fixture: Fixture):
+    """
+    Render the detail page of the busiest gym.
+
+    Args:
+        fixture (Fixture): The benchmarked objects.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    cache.delete(gym_page_key(fixture.gym.pk))
+    return views.gym_detail_page(fixture.get(f'/gyms/{fixture.gym.pk}/'), pk=fixture.gym.pk)
+
+
+def profile(fixture: Fixture):
+    """
+    Render the profile page of the client owning most subscriptions.
+
+    Args:
+        fixture (Fixture): The benchmarked objects.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    return views.profile(fixture.get('/accounts/profile/'))
+
+
+def subscription_list(fixture: Fixture):
+    """
+    Render the first page of subscriptions of the REST API ordered by price.
+
+    Args:
+        fixture (Fixture): The benchmarked objects.
+
+    Returns:
+        Response: The rendered response.
+    """
+    request = fixture.api_factory.get('/rest/subscription/', {'ordering': 'price'})
+    force_authenticate(request, user=fixture.client.user)
+    return fixture.subscription_list(request).render()
+
+
+def coach_detail(fixture: Fixture):
+    """
+    Render the detail page of the coach holding most certificates.
+
+    Args:
+        fixture (Fixture): The benchmarked objects.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    return views.coach_detail_page(
+        fixture.get(f'/coaches/{fixture.coach.pk}/'), pk=fixture.coach.pk,
+    )
+
+
+PATHS = {
+    'gym_detail': gym_detail,
+    'profile': profile,
+    'subscription_list': subscription_list,
+    'coach_detail': coach_detail,
+}
+
+
+def measure(name: str, fixture: Fixture, repeat: int) -> dict:
+    """
+    Time one path.
+
+    Args:
+        name (str): Name of the path.
+        fixture (Fixture): The benchmarked objects.
+        repeat (int): Timed runs after the warm-up run.
+
+    Raises:
+        CommandError: If the path does not respond with 200.
+
+    Returns:
+        dict: Queries of one run, best and median wall time in milliseconds.
+    """
+    path = PATHS[name]
+    with CaptureQueriesContext(connection) as queries:
+        response = path(fixture)
+    if response.status_code != 200:
+        raise CommandError(f'{name} responded with {response.status_code}.')
+    timings = []
+    for _ in range(repeat):
+        started = perf_counter()
+        path(fixture)
+        timings.append((perf_counter() - started) * 1000)
+    return {
+        'path': name,
+        'queries': len(queries),
+        'best_ms': min(timings),
+        'median_ms': median(timings),
+    }
+
+
+def current_commit() -> str | None:
+    """
+    Get the commit of the working tree.
+
+    Returns:
+        str | None: The commit hash, None outside a git checkout or without git.
+    """
+    git = shutil.which('git')
+    if git is None:
+        return None
+    try:
+        return subprocess.run(  # noqa: S603 - fixed arguments, no shell
+            [git, 'rev-parse', 'HEAD'],
+            cwd=settings.BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    """Time the gym detail, profile, subscription list and coach detail paths."""
+
+    help = 'Benchmark the ORM paths of the key pages at several dataset sizes.'
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--scales', type=float, nargs='+', default=list(DEFAULT_SCALES),
+            help='Multiples of the default dataset, see seed_data.',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='The random seed.')
+        parser.add_argument('--repeat', type=int, default=20, help='Timed runs per path.')
+        parser.add_argument(
+            '--paths', nargs='+', choices=list(PATHS), default=list(PATHS), help='Timed paths.',
+        )
+        parser.add_argument('--output-file', help='File to store the results as JSON.')
+        parser.add_argument('--compare', help='Results of an earlier run to compare with.')
+
+    def handle(self, *args, **options):
+        """
+        Run the benchmark.
+
+        Args:
+            args: Positional arguments.
+            options: Command options.
+
+        Raises:
+            CommandError: If the options are invalid or the dataset of the seed exists.
+        """
+        if options['repeat'] < 1 or min(options['scales']) <= 0:
+            raise CommandError('--repeat and --scales must be positive.')
+        baseline = self.load_baseline(options['compare'])
+        results = []
+        for scale in options['scales']:
+            with transaction.atomic():
+                try:
+                    seed_dataset(scaled_counts(scale), options['seed'])
+                except IntegrityError:
+                    raise CommandError(f'A dataset of seed {options["seed"]} already exists.')
+                fixture = Fixture()
+                for name in options['paths']:
+                    results.append({'scale': scale, **measure(name, fixture, options['repeat'])})
+                transaction.set_rollback(True)
+        report = {
+            'commit': current_commit(),
+            'created': datetime.now(timezone.utc).isoformat(),
+            'database': connection.vendor,
+            'seed': options['seed'],
+            'repeat': options['repeat'],
+            'results': results,
+        }
+        self.print_results(results, baseline)
+        if options['output_file']:
+            with open(options['output_file'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2)
+
+    def load_baseline(self, path: str | None) -> dict:
+        """
+        Read the results of an earlier run.
+
+        Args:
+            path (str | None): The result file.
+
+        Raises:
+            CommandError: If the file can not be read.
+
+        Returns:
+            dict: Results by path and scale.
+        """
+        if not path:
+            return {}
+        try:
+            with open(path, encoding='utf-8') as source:
+                report = json.load(source)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Can not read {path}: {error}')
+        return {(result['path'], result['scale']): result for result in report['results']}
+
+    def print_results(self, results: list, baseline: dict) -> None:
+        """
+        Print the results with the change of the median against the baseline.
+
+        Args:
+            results (list): The results.
+            baseline (dict): Earlier results by path and scale.
+        """
+        self.stdout.write(''.join(
+            f'{title:>{width}}' if width > 0 else f'{title:<{-width}}' for title, width in COLUMNS
+        ))
+        for result in results:
+            previous = baseline.get((result['path'], result['scale']))
+            change = ''
+            if previous and previous['median_ms']:
+                change = f'{(result["median_ms"] / previous["median_ms"] - 1) * 100:+.0f}%'
+                if result['queries'] != previous['queries']:
+                    change += f' ({result["queries"] - previous["queries"]:+d}q)'
+            self.stdout.write(
+                f'{result["path"]:<20}{result["scale"]:>8g}{result["queries"]:>9}'
+                f'{result["best_ms"]:>10.2f}{result["median_ms"]:>11.2f}{change:>9}',
+            )
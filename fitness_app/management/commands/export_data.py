@@ -0,0 +1,53 @@
+"""Stream a table export to a file or the standard output."""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fitness_app.export import (CSV, EXPORTS, NDJSON, ExportError,
+                                build_queryset, get_export, stream_rows)
+
+
+class Command(BaseCommand):
+    """Export subscriptions, clients of subscriptions, gyms, coaches or addresses."""
+
+    help = 'Stream a table as NDJSON or CSV without loading it into memory.'
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument('name', choices=list(EXPORTS), help='The exported table.')
+        parser.add_argument('--format', choices=(NDJSON, CSV), default=NDJSON, dest='output')
+        parser.add_argument('--output-file', help='File to write, the standard output by default.')
+        parser.add_argument('--chunk-size', type=int, help='Rows fetched and written at once.')
+        parser.add_argument('--gym', help='Only rows of this gym.')
+        parser.add_argument('--expire-from', help='Subscriptions expiring on or after this date.')
+        parser.add_argument('--expire-to', help='Subscriptions expiring on or before this date.')
+        parser.add_argument('--modified-since', help='Rows modified at or after this datetime.')
+
+    def handle(self, *args, **options):
+        """
+        Run the export.
+
+        Args:
+            args: Positional arguments.
+            options: Command options.
+
+        Raises:
+            CommandError: If a filter is invalid.
+        """
+        export = get_export(options['name'])
+        try:
+            queryset = build_queryset(export, options)
+        except ExportError as error:
+            raise CommandError(str(error))
+        chunks = stream_rows(export, queryset, options['output'], options['chunk_size'])
+        if not options['output_file']:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
+            return
+        with open(options['output_file'], 'w', encoding='utf-8', newline='') as output:
+            for chunk in chunks:
+                output.write(chunk)
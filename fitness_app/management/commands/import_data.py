@@ -0,0 +1,100 @@
+"""Bulk import addresses, gyms, coaches, certificates and their links from files."""
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+from fitness_app.imports import (FORMATS, IMPORTS, ImportDataError, Importer,
+                                 detect_format, read_rows)
+
+
+def parse_source(value: str) -> tuple[str, str]:
+    """
+    Split a source argument into the import name and the file path.
+
+    Args:
+        value (str): `name=path`.
+
+    Raises:
+        CommandError: If the argument is malformed or the import is unknown.
+
+    Returns:
+        tuple[str, str]: The name and the path.
+    """
+    name, separator, path = value.partition('=')
+    if not separator or not path:
+        raise CommandError(f'Expected name=path, got {value}.')
+    if name not in IMPORTS:
+        raise CommandError(f'Unknown import {name}, expected one of: {", ".join(IMPORTS)}.')
+    return name, path
+
+
+class Command(BaseCommand):
+    """Import tables in dependency order, so later files can refer to rows of earlier ones."""
+
+    help = (
+        'Stream CSV or NDJSON files into the database in batches, for example '
+        'address=addresses.csv gym=gyms.csv coach=coaches.ndjson gym_coach=links.csv.'
+    )
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            'sources', nargs='+', metavar='name=path',
+            help=f'Imported files by table, tables: {", ".join(IMPORTS)}.',
+        )
+        parser.add_argument(
+            '--format', choices=sorted(set(FORMATS.values())), dest='input_format',
+            help='Format of every file, detected by the extension by default.',
+        )
+        parser.add_argument('--batch-size', type=int, help='Rows validated and written at once.')
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='The database alias.')
+        parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+
+    def handle(self, *args, **options):
+        """
+        Run the imports.
+
+        Args:
+            args: Positional arguments.
+            options: Command options.
+
+        Raises:
+            CommandError: If an input is malformed or has invalid rows.
+        """
+        if options['batch_size'] is not None and options['batch_size'] < 1:
+            raise CommandError('--batch-size must be positive.')
+        order = list(IMPORTS)
+        sources = sorted(
+            (parse_source(value) for value in options['sources']),
+            key=lambda source: order.index(source[0]),
+        )
+        importer = Importer(using=options['database'], batch_size=options['batch_size'])
+        results = []
+        for name, path in sources:
+            try:
+                input_format = options['input_format'] or detect_format(path)
+                with open(path, encoding='utf-8', newline='') as source:
+                    result = importer.run(name, read_rows(source, input_format))
+            except (ImportDataError, OSError) as error:
+                raise CommandError(f'{path}: {error}')
+            for line, messages in result.errors:
+                self.stderr.write(f'{path}:{line}: {" ".join(messages)}')
+            results.append(result)
+            if not options['json']:
+                self.stdout.write(
+                    f'{name}: {result.rows} rows, {result.created} created, '
+                    f'{result.updated} updated, {len(result.errors)} invalid '
+                    f'in {result.elapsed:.2f}s ({result.rows_per_second:.0f} rows/s)',
+                )
+        if options['json']:
+            self.stdout.write(json.dumps([result.as_dict() for result in results]))
+        invalid = sum(len(result.errors) for result in results)
+        if invalid:
+            raise CommandError(f'{invalid} invalid rows were skipped.')
@@ -0,0 +1,67 @@
+"""Insert a seeded synthetic dataset for benchmarks and load tests."""
+
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError
+
+from fitness_app.seeding import DEFAULT_COUNTS, scaled_counts, seed_dataset
+
+SIZE_OPTIONS = {
+    'address': '--addresses',
+    'gym': '--gyms',
+    'coach': '--coaches',
+    'certificate': '--certificates',
+    'subscription': '--subscriptions',
+    'client': '--clients',
+    'client_sub': '--client-subs',
+}
+
+
+class Command(BaseCommand):
+    """Generate addresses, gyms, coaches, certificates, subscriptions, clients and their links."""
+
+    help = 'Insert a reproducible synthetic dataset with bulk inserts.'
+
+    def add_arguments(self, parser):
+        """
+        Add command arguments.
+
+        Args:
+            parser (ArgumentParser): The argument parser.
+        """
+        parser.add_argument(
+            '--scale', type=float, default=1.0, help='Multiple of the default row counts.',
+        )
+        parser.add_argument('--seed', type=int, default=0, help='The random seed.')
+        for name, count in DEFAULT_COUNTS.items():
+            parser.add_argument(
+                SIZE_OPTIONS[name], type=int, dest=name,
+                help=f'Exact number of {name} rows, {count} times the scale by default.',
+            )
+
+    def handle(self, *args, **options):
+        """
+        Insert the dataset.
+
+        Args:
+            args: Positional arguments.
+            options: Command options.
+
+        Raises:
+            CommandError: If a size is negative or the dataset of the seed exists.
+        """
+        counts = scaled_counts(
+            options['scale'], **{name: options[name] for name in DEFAULT_COUNTS},
+        )
+        if options['scale'] < 0 or min(counts.values()) < 0:
+            raise CommandError('Sizes must not be negative.')
+        started = perf_counter()
+        try:
+            created = seed_dataset(counts, options['seed'])
+        except IntegrityError:
+            raise CommandError(f'A dataset of seed {options["seed"]} already exists.')
+        elapsed = perf_counter() - started
+        for name, count in created.items():
+            self.stdout.write(f'{name}: {count}')
+        self.stdout.write(f'{sum(created.values())} rows in {elapsed:.2f}s')
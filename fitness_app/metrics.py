@@ -0,0 +1,804 @@
+"""
+Request, cache and connection pool metrics served in the Prometheus text format.
+
+`MetricsMiddleware` counts the requests of every view by method and status and records
+their wall time in a fixed-bucket histogram. Views are named after their function or class,
+`gym_detail_page` or `ExportView`, and the router viewsets after their basename and action,
+`gym.list` or `coach.retrieve`. Lookups of the gym page, token and REST response caches are
+counted as hits and misses, and the statistics of the connection pools of every worker
+process are kept as gauges. Admins read everything at `/metrics/`.
+
+Each process updates its own values under a lock that is only contended by its own threads.
+Without `METRICS_DIR` the values stay in memory and `/metrics/` reports the process that
+serves it. With `METRICS_DIR` every process keeps its values in a memory-mapped file of that
+directory and `/metrics/` sums the counters and histograms of all the files, including those
+of processes that have exited, and reports the gauges of the live processes labelled by
+pid. Empty the directory before the server starts, as Prometheus expects counters to restart
+from zero with the server.
+"""
+
+import glob
+import json
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from time import monotonic, perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .backends.postgresql.base import pool_stats
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+GAUGE_INTERVAL = 1.0
+FILE_PATTERN = 'metrics-{0}.db'
+FILE_INITIAL_SIZE = 1 << 16
+HEADER = struct.Struct('<Q')
+KEY_LENGTH = struct.Struct('<I')
+VALUE = struct.Struct('<d')
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+HIT = 'hit'
+MISS = 'miss'
+UNMATCHED = 'unmatched'
+
+
+def metrics_dir() -> str:
+    """
+    Get the directory shared by the processes.
+
+    Returns:
+        str: The directory, empty to keep the values in memory.
+    """
+    return getattr(settings, 'METRICS_DIR', '')
+
+
+def sample_key(name: str, labels: tuple) -> str:
+    """
+    Build the storage key of a sample.
+
+    Args:
+        name (str): The sample name.
+        labels (tuple): Pairs of label names and values.
+
+    Returns:
+        str: The key.
+    """
+    return json.dumps([name, labels])
+
+
+def parse_key(key: str) -> tuple:
+    """
+    Split a storage key.
+
+    Args:
+        key (str): The key.
+
+    Returns:
+        tuple: The sample name and the label pairs.
+    """
+    name, labels = json.loads(key)
+    return name, tuple(tuple(label) for label in labels)
+
+
+class MemoryValues:
+    """Values of this process kept in memory."""
+
+    def __init__(self):
+        """Start with no values."""
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, key: str, amount: float) -> None:
+        """
+        Add to a value.
+
+        Args:
+            key (str): The sample key.
+            amount (float): The increment.
+        """
+        with self.lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def set(self, key: str, value: float) -> None:
+        """
+        Replace a value.
+
+        Args:
+            key (str): The sample key.
+            value (float): The value.
+        """
+        with self.lock:
+            self.values[key] = value
+
+    def items(self) -> list:
+        """
+        Read the values.
+
+        Returns:
+            list: Pairs of keys and values.
+        """
+        with self.lock:
+            return list(self.values.items())
+
+
+def read_entries(data, used: int):
+    """
+    Read the entries of a values file.
+
+    An entry is the length of its key, the key padded to 8 bytes, and a double.
+
+    Args:
+        data (bytes | mmap.mmap): The content of the file.
+        used (int): Length of the written part.
+
+    Yields:
+        tuple: The key, the value and the offset of the value.
+    """
+    offset = HEADER.size
+    while offset < used:
+        length = KEY_LENGTH.unpack_from(data, offset)[0]
+        start = offset + KEY_LENGTH.size
+        position = start + length + (-(KEY_LENGTH.size + length) % 8)
+        key = bytes(data[start:start + length]).decode()
+        yield key, VALUE.unpack_from(data, position)[0], position
+        offset = position + VALUE.size
+
+
+class FileValues:
+    """Values of this process in a memory-mapped file, read by every process."""
+
+    def __init__(self, path: str):
+        """
+        Open the file of the process, keeping the values it already holds.
+
+        Args:
+            path (str): The file.
+        """
+        self.lock = threading.Lock()
+        self.file = open(path, 'a+b')
+        size = os.fstat(self.file.fileno()).st_size
+        if size < FILE_INITIAL_SIZE:
+            self.file.truncate(FILE_INITIAL_SIZE)
+            size = FILE_INITIAL_SIZE
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.used = HEADER.unpack_from(self.map, 0)[0] or HEADER.size
+        self.positions = {key: position for key, _, position in read_entries(self.map, self.used)}
+
+    def position(self, key: str) -> int:
+        """
+        Find the offset of a value, appending an entry set to 0 for a new key.
+
+        The length in the header is updated after the entry is written, so readers never
+        see a partial entry.
+
+        Args:
+            key (str): The sample key.
+
+        Returns:
+            int: The offset of the value.
+        """
+        position = self.positions.get(key)
+        if position is not None:
+            return position
+        encoded = key.encode()
+        position = self.used + KEY_LENGTH.size + len(encoded)
+        position += -(KEY_LENGTH.size + len(encoded)) % 8
+        end = position + VALUE.size
+        if end > len(self.map):
+            size = len(self.map)
+            while size < end:
+                size *= 2
+            self.file.truncate(size)
+            self.map.close()
+            self.map = mmap.mmap(self.file.fileno(), size)
+        KEY_LENGTH.pack_into(self.map, self.used, len(encoded))
+        start = self.used + KEY_LENGTH.size
+        self.map[start:start + len(encoded)] = encoded
+        VALUE.pack_into(self.map, position, 0.0)
+        HEADER.pack_into(self.map, 0, end)
+        self.used = end
+        self.positions[key] = position
+        return position
+
+    def inc(self, key: str, amount: float) -> None:
+        """
+        Add to a value.
+
+        Args:
+            key (str): The sample key.
+            amount (float): The increment.
+        """
+        with self.lock:
+            position = self.position(key)
+            VALUE.pack_into(self.map, position, VALUE.unpack_from(self.map, position)[0] + amount)
+
+    def set(self, key: str, value: float) -> None:
+        """
+        Replace a value.
+
+        Args:
+            key (str): The sample key.
+            value (float): The value.
+        """
+        with self.lock:
+            VALUE.pack_into(self.map, self.position(key), value)
+
+    def items(self) -> list:
+        """
+        Read the values.
+
+        Returns:
+            list: Pairs of keys and values.
+        """
+        with self.lock:
+            return [(key, value) for key, value, _ in read_entries(self.map, self.used)]
+
+
+def read_file(path: str) -> list:
+    """
+    Read the values of a process from its file.
+
+    Args:
+        path (str): The file.
+
+    Returns:
+        list: Pairs of keys and values.
+    """
+    with open(path, 'rb') as source:
+        data = source.read()
+    if len(data) < HEADER.size:
+        return []
+    used = min(HEADER.unpack_from(data, 0)[0], len(data))
+    return [(key, value) for key, value, _ in read_entries(data, used)]
+
+
+def process_alive(pid: int) -> bool:
+    """
+    Check whether a process of this host is running.
+
+    Args:
+        pid (int): The process id.
+
+    Returns:
+        bool: True if it runs.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def format_value(value: float) -> str:
+    """
+    Format a sample value.
+
+    Args:
+        value (float): The value.
+
+    Returns:
+        str: The value in the text format.
+    """
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def format_labels(labels: tuple) -> str:
+    """
+    Format the labels of a sample.
+
+    Args:
+        labels (tuple): Pairs of label names and values.
+
+    Returns:
+        str: The labels in braces, empty without labels.
+    """
+    if not labels:
+        return ''
+    escaped = (
+        (name, str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"'))
+        for name, value in labels
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+class Metric:
+    """A metric family with its labels."""
+
+    kind = None
+
+    def __init__(self, registry, name: str, documentation: str, labelnames: tuple):
+        """
+        Describe a metric.
+
+        Args:
+            registry (Registry): The registry storing the values.
+            name (str): The metric name.
+            documentation (str): The help text.
+            labelnames (tuple): Names of the labels.
+        """
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def labels(self, values: dict) -> tuple:
+        """
+        Order the labels of a sample.
+
+        Args:
+            values (dict): Label values by name.
+
+        Raises:
+            ValueError: If labels are missing or unknown.
+
+        Returns:
+            tuple: Pairs of label names and values.
+        """
+        if set(values) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes the labels {", ".join(self.labelnames)}.')
+        return tuple((name, str(values[name])) for name in self.labelnames)
+
+    def sample_names(self) -> tuple:
+        """
+        Get the names of the samples of the metric.
+
+        Returns:
+            tuple: The sample names.
+        """
+        return (self.name,)
+
+    def render(self, samples: list) -> list:
+        """
+        Render the samples of the metric.
+
+        Args:
+            samples (list): Triples of sample names, label pairs and values.
+
+        Returns:
+            list: Lines of the text format.
+        """
+        return [
+            f'{name}{format_labels(labels)} {format_value(value)}'
+            for name, labels, value in sorted(samples)
+        ]
+
+
+class Counter(Metric):
+    """A total that only goes up."""
+
+    kind = COUNTER
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        """
+        Increase the total.
+
+        Args:
+            amount (float): The increment.
+            labels: Label values.
+        """
+        self.registry.values().inc(sample_key(self.name, self.labels(labels)), amount)
+
+
+class Gauge(Metric):
+    """A value of a process that can go up and down."""
+
+    kind = GAUGE
+
+    def set(self, value: float, **labels) -> None:
+        """
+        Replace the value.
+
+        Args:
+            value (float): The value.
+            labels: Label values.
+        """
+        self.registry.values().set(sample_key(self.name, self.labels(labels)), value)
+
+
+class Histogram(Metric):
+    """Counts of observations in fixed buckets, with their count and sum."""
+
+    kind = HISTOGRAM
+
+    def __init__(self, registry, name: str, documentation: str, labelnames: tuple,
+                 buckets: tuple = LATENCY_BUCKETS):
+        """
+        Describe a histogram.
+
+        Args:
+            registry (Registry): The registry storing the values.
+            name (str): The metric name.
+            documentation (str): The help text.
+            labelnames (tuple): Names of the labels.
+            buckets (tuple): Increasing upper bounds of the buckets, without `+Inf`.
+        """
+        super().__init__(registry, name, documentation, labelnames)
+        self.buckets = (*buckets, float('inf'))
+
+    def sample_names(self) -> tuple:
+        """
+        Get the names of the samples of the metric.
+
+        Returns:
+            tuple: The bucket, count and sum sample names.
+        """
+        return (f'{self.name}_bucket', f'{self.name}_count', f'{self.name}_sum')
+
+    def observe(self, value: float, **labels) -> None:
+        """
+        Record an observation.
+
+        Only the bucket of the value is increased, the buckets are made cumulative when
+        rendered.
+
+        Args:
+            value (float): The observation.
+            labels: Label values.
+        """
+        pairs = self.labels(labels)
+        bound = next(bound for bound in self.buckets if value <= bound)
+        values = self.registry.values()
+        values.inc(sample_key(f'{self.name}_bucket', (*pairs, ('le', format_value(bound)))), 1)
+        values.inc(sample_key(f'{self.name}_count', pairs), 1)
+        values.inc(sample_key(f'{self.name}_sum', pairs), value)
+
+    def render(self, samples: list) -> list:
+        """
+        Render the samples of the metric with cumulative buckets.
+
+        Args:
+            samples (list): Triples of sample names, label pairs and values.
+
+        Returns:
+            list: Lines of the text format.
+        """
+        buckets = defaultdict(dict)
+        totals = []
+        for name, labels, value in samples:
+            if name.endswith('_bucket'):
+                buckets[labels[:-1]][labels[-1][1]] = value
+            else:
+                totals.append((name, labels, value))
+        lines = []
+        for labels in sorted(buckets):
+            cumulative = 0.0
+            for bound in self.buckets:
+                cumulative += buckets[labels].get(format_value(bound), 0.0)
+                pairs = (*labels, ('le', format_value(bound)))
+                lines.append(f'{self.name}_bucket{format_labels(pairs)} {format_value(cumulative)}')
+        return lines + super().render(totals)
+
+
+class Registry:
+    """Metrics of the app and the values of this process."""
+
+    def __init__(self):
+        """Start with no metrics."""
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.store = None
+        self.pid = None
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric.
+
+        Args:
+            metric (Metric): The metric.
+
+        Returns:
+            Metric: The metric.
+        """
+        for name in metric.sample_names():
+            self.metrics[name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()) -> Counter:
+        """
+        Add a counter.
+
+        Args:
+            name (str): The metric name, ending with `_total`.
+            documentation (str): The help text.
+            labelnames (tuple): Names of the labels.
+
+        Returns:
+            Counter: The counter.
+        """
+        return self.register(Counter(self, name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: tuple = ()) -> Gauge:
+        """
+        Add a gauge.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text.
+            labelnames (tuple): Names of the labels.
+
+        Returns:
+            Gauge: The gauge.
+        """
+        return self.register(Gauge(self, name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: tuple = (),
+                  buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        """
+        Add a histogram.
+
+        Args:
+            name (str): The metric name.
+            documentation (str): The help text.
+            labelnames (tuple): Names of the labels.
+            buckets (tuple): Increasing upper bounds of the buckets.
+
+        Returns:
+            Histogram: The histogram.
+        """
+        return self.register(Histogram(self, name, documentation, labelnames, buckets))
+
+    def values(self):
+        """
+        Get the values of this process, opening them after a fork.
+
+        Returns:
+            MemoryValues | FileValues: The values.
+        """
+        pid = os.getpid()
+        if self.pid == pid:
+            return self.store
+        with self.lock:
+            if self.pid != pid:
+                directory = metrics_dir()
+                if directory:
+                    self.store = FileValues(os.path.join(directory, FILE_PATTERN.format(pid)))
+                else:
+                    self.store = MemoryValues()
+                self.pid = pid
+        return self.store
+
+    def reset(self) -> None:
+        """Forget the values of this process, for tests and a changed `METRICS_DIR`."""
+        with self.lock:
+            self.store = None
+            self.pid = None
+
+    def collect(self) -> dict:
+        """
+        Gather the values of every process.
+
+        Returns:
+            dict: Values by sample name and label pairs, gauges labelled by pid.
+        """
+        directory = metrics_dir()
+        if directory:
+            self.values()
+            sources = []
+            for path in glob.glob(os.path.join(directory, FILE_PATTERN.format('*'))):
+                pid = int(os.path.basename(path)[len('metrics-'):-len('.db')])
+                sources.append((pid, read_file(path)))
+        else:
+            sources = [(os.getpid(), self.values().items())]
+        collected = defaultdict(float)
+        for pid, items in sources:
+            for key, value in items:
+                name, labels = parse_key(key)
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                if metric.kind == GAUGE:
+                    if process_alive(pid):
+                        collected[(name, (*labels, ('pid', str(pid))))] = value
+                else:
+                    collected[(name, labels)] += value
+        return dict(collected)
+
+    def render(self, extra: list = ()) -> str:
+        """
+        Render every metric in the Prometheus text format.
+
+        Args:
+            extra (list): Further metrics as triples of a metric, its kind and its samples.
+
+        Returns:
+            str: The exposition.
+        """
+        samples = defaultdict(list)
+        for (name, labels), value in self.collect().items():
+            samples[self.metrics[name]].append((name, labels, value))
+        families = [(metric, metric.kind, samples[metric]) for metric in self.families()]
+        lines = []
+        for metric, kind, metric_samples in (*families, *extra):
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {kind}')
+            lines.extend(metric.render(metric_samples))
+        return '\n'.join(lines) + '\n'
+
+    def families(self) -> list:
+        """
+        List the metrics once each, in registration order.
+
+        Returns:
+            list: The metrics.
+        """
+        return list(dict.fromkeys(self.metrics.values()))
+
+
+REGISTRY = Registry()
+REQUESTS = REGISTRY.counter(
+    'fitness_http_requests_total', 'Requests by view, method and status code.',
+    ('view', 'method', 'status'),
+)
+REQUEST_DURATION = REGISTRY.histogram(
+    'fitness_http_request_duration_seconds', 'Wall time of the requests by view.', ('view',),
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'fitness_cache_requests_total', 'Cache lookups by cache and result.', ('cache', 'result'),
+)
+DB_POOL = REGISTRY.gauge(
+    'fitness_db_pool', 'ConnectionPool.get_stats() of the worker processes by database alias.',
+    ('alias', 'stat'),
+)
+CACHE_HIT_RATIO = Metric(
+    REGISTRY, 'fitness_cache_hit_ratio', 'Share of the cache lookups that hit, by cache.',
+    ('cache',),
+)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    """
+    Count a cache lookup.
+
+    Args:
+        name (str): The cache, `gym_page`, `token` or `response`.
+        hit (bool): Whether the value was found.
+    """
+    CACHE_REQUESTS.inc(cache=name, result=HIT if hit else MISS)
+
+
+def record_pool_stats() -> None:
+    """Store the statistics of the connection pools of this process."""
+    for alias, stats in pool_stats().items():
+        for stat, value in stats.items():
+            DB_POOL.set(value, alias=alias, stat=stat)
+
+
+def cache_hit_ratios(collected: dict) -> list:
+    """
+    Compute the hit ratio of every cache from the lookup counters.
+
+    Args:
+        collected (dict): Values by sample name and label pairs.
+
+    Returns:
+        list: Triples of sample names, label pairs and values.
+    """
+    lookups = defaultdict(lambda: {HIT: 0.0, MISS: 0.0})
+    for (name, labels), value in collected.items():
+        if name == CACHE_REQUESTS.name:
+            labels = dict(labels)
+            lookups[labels['cache']][labels['result']] += value
+    return [
+        (CACHE_HIT_RATIO.name, (('cache', cache),), counts[HIT] / (counts[HIT] + counts[MISS]))
+        for cache, counts in lookups.items()
+        if counts[HIT] + counts[MISS]
+    ]
+
+
+def render_metrics() -> str:
+    """
+    Render the metrics of every process with the cache hit ratios.
+
+    Returns:
+        str: The exposition.
+    """
+    record_pool_stats()
+    ratios = cache_hit_ratios(REGISTRY.collect())
+    return REGISTRY.render(extra=[(CACHE_HIT_RATIO, GAUGE, ratios)])
+
+
+def view_name(request) -> str:
+    """
+    Name the view of a request for the labels.
+
+    Args:
+        request (HttpRequest): The request.
+
+    Returns:
+        str: `basename.action` for viewsets, else the function or class name of the view,
+            `unmatched` if no URL matched.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED
+    actions = getattr(match.func, 'actions', None)
+    if actions:
+        method = request.method.lower()
+        basename = match.func.initkwargs.get('basename', match.url_name)
+        return f'{basename}.{actions.get(method, method)}'
+    return getattr(match.func, 'view_class', match.func).__name__
+
+
+class MetricsMiddleware:
+    """Count the requests of every view and record their wall time."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Initialize the middleware.
+
+        Args:
+            get_response (Callable): The next handler.
+
+        Raises:
+            MiddlewareNotUsed: If `METRICS` is off.
+        """
+        if not getattr(settings, 'METRICS', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pool_recorded = 0.0
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Measure a request.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = perf_counter()
+        response = self.get_response(request)
+        return self.finish(started, request, response)
+
+    async def __acall__(self, request):
+        """
+        Asynchronous version of `__call__`.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        started = perf_counter()
+        response = await self.get_response(request)
+        return self.finish(started, request, response)
+
+    def finish(self, started: float, request, response):
+        """
+        Record the request, and the pool statistics at most every `GAUGE_INTERVAL` seconds.
+
+        Args:
+            started (float): `perf_counter()` when the request started.
+            request (HttpRequest): The request.
+            response (HttpResponse): The response.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        view = view_name(request)
+        REQUEST_DURATION.observe(perf_counter() - started, view=view)
+        REQUESTS.inc(view=view, method=request.method, status=response.status_code)
+        now = monotonic()
+        if now - self.pool_recorded >= GAUGE_INTERVAL:
+            self.pool_recorded = now
+            record_pool_stats()
+        return response
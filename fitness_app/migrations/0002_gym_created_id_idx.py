@@ -0,0 +1,17 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='gym',
+            index=models.Index(fields=['created_datetime', 'id'], name='gym_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0002_gym_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clientsub',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, unique=True),
+        ),
+    ]
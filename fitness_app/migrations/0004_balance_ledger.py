@@ -0,0 +1,59 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:34
+
+import django.db.models.deletion
+import django.utils.timezone
+import fitness_app.models
+from django.db import migrations, models
+
+
+def open_balances(apps, schema_editor):
+    """Move current client balances into opening ledger entries."""
+    client_model = apps.get_model('fitness_app', 'Client')
+    entry_model = apps.get_model('fitness_app', 'BalanceEntry')
+    entry_model.objects.bulk_create(
+        (
+            entry_model(client_id=client_id, amount=net_worth, kind='opening')
+            for client_id, net_worth in client_model.objects.values_list('id', 'net_worth').iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0003_clientsub_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BalanceEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_datetime', models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True, validators=[fitness_app.models.check_datetime])),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=11)),
+                ('kind', models.CharField(choices=[('opening', 'Opening balance'), ('top_up', 'Top up'), ('purchase', 'Purchase')], max_length=20)),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_entries', to='fitness_app.client')),
+                ('client_sub', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='fitness_app.clientsub')),
+            ],
+            options={
+                'db_table': '"balance_entry"',
+                'indexes': [models.Index(fields=['client', 'id'], name='balance_entry_client_id_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BalanceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_datetime', models.DateTimeField(blank=True, default=django.utils.timezone.now, null=True, validators=[fitness_app.models.check_datetime])),
+                ('balance', models.DecimalField(decimal_places=2, max_digits=11)),
+                ('last_entry_id', models.BigIntegerField()),
+                ('client', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='fitness_app.client')),
+            ],
+            options={
+                'db_table': '"balance_snapshot"',
+                'indexes': [models.Index(fields=['client', '-last_entry_id'], name='balance_snapshot_client_idx')],
+            },
+        ),
+        migrations.RunPython(open_balances, migrations.RunPython.noop),
+    ]
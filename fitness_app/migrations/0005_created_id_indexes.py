@@ -0,0 +1,29 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0004_balance_ledger'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['created_datetime', 'id'], name='address_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['created_datetime', 'id'], name='certf_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coach',
+            index=models.Index(fields=['created_datetime', 'id'], name='coach_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['created_datetime', 'id'], name='subscription_created_id_idx'),
+        ),
+    ]
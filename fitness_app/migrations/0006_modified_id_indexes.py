@@ -0,0 +1,33 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0005_created_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['modified_datetime', 'id'], name='address_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['modified_datetime', 'id'], name='certf_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coach',
+            index=models.Index(fields=['modified_datetime', 'id'], name='coach_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gym',
+            index=models.Index(fields=['modified_datetime', 'id'], name='gym_modified_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['modified_datetime', 'id'], name='subscription_modified_id_idx'),
+        ),
+    ]
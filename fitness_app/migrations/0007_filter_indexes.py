@@ -0,0 +1,57 @@
+# Generated by Django 5.0.3 on 2026-10-18 09:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0006_modified_id_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['city_name', 'id'], name='address_city_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['city_name', 'created_datetime', 'id'], name='address_city_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='certificate',
+            index=models.Index(fields=['coach', 'created_datetime', 'id'], name='certf_coach_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coach',
+            index=models.Index(fields=['last_name', 'id'], name='coach_last_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coach',
+            index=models.Index(fields=['spec', 'created_datetime', 'id'], name='coach_spec_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gym',
+            index=models.Index(fields=['gym_name', 'id'], name='gym_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gym',
+            index=models.Index(fields=['address', 'created_datetime', 'id'], name='gym_address_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['gym', 'created_datetime', 'id'], name='subscription_gym_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['gym', 'price', 'id'], name='subscription_gym_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['price', 'id'], name='subscription_price_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['expire_date', 'id'], name='subscription_expire_id_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:08
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models.functions import Coalesce, Now
+
+SYNCED_MODELS = ('Address', 'Gym', 'Coach', 'Certificate', 'Subscription')
+
+
+def fill_modified(apps, schema_editor):
+    """Give rows without a modified datetime one, so delta sync reads them."""
+    for name in SYNCED_MODELS:
+        apps.get_model('fitness_app', name).objects.filter(modified_datetime__isnull=True).update(
+            modified_datetime=Coalesce('created_datetime', Now()),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0007_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=50)),
+                ('object_id', models.UUIDField()),
+                ('deleted_datetime', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': '"tombstone"',
+                'indexes': [models.Index(fields=['deleted_datetime', 'id'], name='tombstone_deleted_id_idx')],
+            },
+        ),
+        migrations.RunPython(fill_modified, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,128 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:13
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import (AddConstraintNotValid,
+                                                AddIndexConcurrently,
+                                                NotInTransactionMixin,
+                                                RemoveIndexConcurrently,
+                                                ValidateConstraint)
+from django.db import migrations, models
+
+
+class AlterForeignKeyIndexConcurrently(NotInTransactionMixin, migrations.AlterField):
+    """Alter `db_index` of a foreign key, building or dropping its index concurrently."""
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        self.alter_index(app_label, schema_editor, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        self.alter_index(app_label, schema_editor, to_state)
+
+    def alter_index(self, app_label, schema_editor, state):
+        self._ensure_not_in_transaction(schema_editor)
+        model = state.apps.get_model(app_label, self.model_name)
+        field = model._meta.get_field(self.name)
+        table = model._meta.db_table
+        index = schema_editor.quote_name(
+            schema_editor._create_index_name(table, [field.column], suffix=''),
+        )
+        if field.db_index:
+            schema_editor.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index} '
+                f'ON {schema_editor.quote_name(table)} ({schema_editor.quote_name(field.column)})',
+            )
+        else:
+            schema_editor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS {index}')
+
+    def describe(self):
+        return f'Concurrently alter the index of {self.name} on {self.model_name}'
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('fitness_app', '0008_tombstone'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='subscription',
+            index=models.Index(fields=['gym', 'price', 'id'], include=('expire_date',), name='subscription_gym_active_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='subscription',
+            name='subscription_gym_price_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='clientsub',
+            index=models.Index(fields=['client', 'sub'], name='client_sub_client_sub_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='gymcoach',
+            index=models.Index(fields=['coach', 'gym'], name='gym_coach_coach_gym_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='balanceentry',
+            index=models.Index(condition=models.Q(('client_sub__isnull', False)), fields=['client_sub'], name='balance_entry_client_sub_idx'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='balanceentry',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='balance_entries', to='fitness_app.client'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='balanceentry',
+            name='client_sub',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='fitness_app.clientsub'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='balancesnapshot',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='balance_snapshots', to='fitness_app.client'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='certificate',
+            name='coach',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='fitness_app.coach'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='clientsub',
+            name='client',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='fitness_app.client'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='clientsub',
+            name='sub',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='fitness_app.subscription'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='gym',
+            name='address',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to='fitness_app.address'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='gymcoach',
+            name='coach',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='fitness_app.coach'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='gymcoach',
+            name='gym',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='fitness_app.gym'),
+        ),
+        AlterForeignKeyIndexConcurrently(
+            model_name='subscription',
+            name='gym',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='fitness_app.gym'),
+        ),
+        AddConstraintNotValid(
+            model_name='client',
+            constraint=models.CheckConstraint(check=models.Q(('net_worth__gte', 0)), name='client_net_worth_non_negative'),
+        ),
+        ValidateConstraint(
+            model_name='client',
+            name='client_net_worth_non_negative',
+        ),
+    ]
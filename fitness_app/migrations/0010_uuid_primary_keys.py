@@ -0,0 +1,54 @@
+# Generated by Django 5.0.3 on 2026-10-18 10:16
+
+import fitness_app.uuids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fitness_app', '0009_index_pass'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='address',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='certificate',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='client',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='clientsub',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='coach',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='gym',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='gymcoach',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='subscription',
+            name='id',
+            field=models.UUIDField(default=fitness_app.uuids.generate_id, editable=False, primary_key=True, serialize=False),
+        ),
+    ]
@@ -4,17 +4,20 @@ This module defines various utility functions and Django models for managing.
 addresses, gyms, coaches, certificates, and subscriptions.
 """
 
-from uuid import uuid4
-
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 
+from .uuids import generate_id
+
 ADDRESS_NAME_LEN = 256
 DESCRIPTION_MAX_LENGTH = 1024
 MAX_AMOUNT_OF_MONEY = 10000000
 MAX_NAME_LENGTH = 50
+IDEMPOTENCY_KEY_LENGTH = 100
+BALANCE_MAX_DIGITS = 11
 
 
 def check_money(money: int | float) -> None:
@@ -135,6 +138,67 @@ class CreatedMixin(models.Model):
         abstract = True
 
 
+class ModifiedQuerySet(models.QuerySet):
+    """QuerySet bumping `modified_datetime` on bulk updates."""
+
+    def update(self, **kwargs) -> int:
+        """
+        Update rows and set their modified datetime.
+
+        Args:
+            kwargs: Field values to set.
+
+        Returns:
+            int: Number of updated rows.
+        """
+        kwargs.setdefault('modified_datetime', timezone.now())
+        return super().update(**kwargs)
+
+    def bulk_update(self, objs, fields, batch_size=None) -> int:
+        """
+        Update given fields of the objects and set their modified datetime.
+
+        Args:
+            objs (Iterable[Model]): Objects to update.
+            fields (Iterable[str]): Names of the updated fields.
+            batch_size (int | None): Number of objects per query.
+
+        Returns:
+            int: Number of updated rows.
+        """
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.modified_datetime = now
+        fields = [*fields, 'modified_datetime'] if 'modified_datetime' not in fields else fields
+        return super().bulk_update(objs, fields, batch_size=batch_size)
+
+    def bulk_create(self, objs, *args, update_conflicts=False, update_fields=None, **kwargs):
+        """
+        Create the objects with a fresh modified datetime, upserts also set it on conflicting rows.
+
+        Args:
+            objs (Iterable[Model]): Objects to create.
+            args: Positional arguments of `QuerySet.bulk_create`.
+            update_conflicts (bool): Whether to update rows that already exist.
+            update_fields (Iterable[str] | None): Fields updated on conflict.
+            kwargs: Keyword arguments of `QuerySet.bulk_create`.
+
+        Returns:
+            list: The created objects.
+        """
+        objs = list(objs)
+        now = timezone.now()
+        for obj in objs:
+            obj.modified_datetime = now
+        if update_conflicts and update_fields is not None:
+            if 'modified_datetime' not in update_fields:
+                update_fields = [*update_fields, 'modified_datetime']
+        return super().bulk_create(
+            objs, *args, update_conflicts=update_conflicts, update_fields=update_fields, **kwargs,
+        )
+
+
 class ModifiedMixin(models.Model):
     """Mixin for automatically setting modified datetime."""
 
@@ -147,6 +211,16 @@ class ModifiedMixin(models.Model):
         ],
     )
 
+    objects = ModifiedQuerySet.as_manager()
+
+    def save(self, *args, **kwargs):
+        """Save and set the modified datetime."""
+        self.modified_datetime = timezone.now()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'modified_datetime' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'modified_datetime']
+        super().save(*args, **kwargs)
+
     class Meta:
         """Metadata for ModifiedMixin."""
 
@@ -154,9 +228,9 @@ class ModifiedMixin(models.Model):
 
 
 class UUIDMixin(models.Model):
-    """Mixin for using UUID as primary key."""
+    """Mixin for using UUID as primary key, of the version set by `PRIMARY_KEY_UUID_VERSION`."""
 
-    id = models.UUIDField(primary_key=True, editable=False, default=uuid4)
+    id = models.UUIDField(primary_key=True, editable=False, default=generate_id)
 
     class Meta:
         """Metadata for UUIDMixin."""
@@ -186,13 +260,24 @@ class Address(UUIDMixin, CreatedMixin, ModifiedMixin):
 
         db_table = '"address"'
         verbose_name = "address"
+        indexes = [
+            models.Index(fields=['created_datetime', 'id'], name='address_created_id_idx'),
+            models.Index(fields=['modified_datetime', 'id'], name='address_modified_id_idx'),
+            models.Index(fields=['city_name', 'id'], name='address_city_id_idx'),
+            models.Index(
+                fields=['city_name', 'created_datetime', 'id'],
+                name='address_city_created_idx',
+            ),
+        ]
 
 
 class Gym(UUIDMixin, CreatedMixin, ModifiedMixin):
     """Model representing a gym."""
 
     gym_name = models.CharField(max_length=100, null=False, blank=False)
-    address = models.ForeignKey(Address, blank=True, null=True, on_delete=models.CASCADE)
+    address = models.ForeignKey(
+        Address, blank=True, null=True, on_delete=models.CASCADE, db_index=False,
+    )
     coaches = models.ManyToManyField('Coach', through='GymCoach')
 
     def __str__(self) -> str:
@@ -208,6 +293,15 @@ class Gym(UUIDMixin, CreatedMixin, ModifiedMixin):
 
         db_table = '"gym"'
         verbose_name = "gym"
+        indexes = [
+            models.Index(fields=['created_datetime', 'id'], name='gym_created_id_idx'),
+            models.Index(fields=['modified_datetime', 'id'], name='gym_modified_id_idx'),
+            models.Index(fields=['gym_name', 'id'], name='gym_name_id_idx'),
+            models.Index(
+                fields=['address', 'created_datetime', 'id'],
+                name='gym_address_created_idx',
+            ),
+        ]
 
 
 class Coach(UUIDMixin, CreatedMixin, ModifiedMixin):
@@ -224,12 +318,18 @@ class Coach(UUIDMixin, CreatedMixin, ModifiedMixin):
 
         db_table = '"coach"'
         verbose_name = "coach"
+        indexes = [
+            models.Index(fields=['created_datetime', 'id'], name='coach_created_id_idx'),
+            models.Index(fields=['modified_datetime', 'id'], name='coach_modified_id_idx'),
+            models.Index(fields=['last_name', 'id'], name='coach_last_name_id_idx'),
+            models.Index(fields=['spec', 'created_datetime', 'id'], name='coach_spec_created_idx'),
+        ]
 
 
 class Certificate(UUIDMixin, CreatedMixin, ModifiedMixin):
     """Model representing a certificate."""
 
-    coach = models.ForeignKey(Coach, on_delete=models.CASCADE)
+    coach = models.ForeignKey(Coach, on_delete=models.CASCADE, db_index=False)
     certf_name = models.CharField(max_length=MAX_NAME_LENGTH, null=False, blank=False)
     description = models.TextField(max_length=1000, blank=True)
 
@@ -237,19 +337,30 @@ class Certificate(UUIDMixin, CreatedMixin, ModifiedMixin):
         """Metadata for Certificate model."""
 
         db_table = '"certf"'
+        indexes = [
+            models.Index(fields=['created_datetime', 'id'], name='certf_created_id_idx'),
+            models.Index(fields=['modified_datetime', 'id'], name='certf_modified_id_idx'),
+            models.Index(
+                fields=['coach', 'created_datetime', 'id'],
+                name='certf_coach_created_idx',
+            ),
+        ]
 
 
 class GymCoach(UUIDMixin):
     """Model representing a gym-coach relationship."""
 
-    gym = models.ForeignKey(Gym, on_delete=models.CASCADE)
-    coach = models.ForeignKey(Coach, on_delete=models.CASCADE)
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, db_index=False)
+    coach = models.ForeignKey(Coach, on_delete=models.CASCADE, db_index=False)
 
     class Meta:
         """Metadata for GymCoach model."""
 
         db_table = '"gym_coach"'
         unique_together = (('gym', 'coach'))
+        indexes = [
+            models.Index(fields=['coach', 'gym'], name='gym_coach_coach_gym_idx'),
+        ]
 
 
 class Client(UUIDMixin):
@@ -284,6 +395,11 @@ class Client(UUIDMixin):
         """Metadata for Client model."""
 
         db_table = '"client"'
+        constraints = [
+            models.CheckConstraint(
+                check=Q(net_worth__gte=0), name='client_net_worth_non_negative',
+            ),
+        ]
 
 
 class Subscription(UUIDMixin, CreatedMixin, ModifiedMixin):
@@ -293,23 +409,125 @@ class Subscription(UUIDMixin, CreatedMixin, ModifiedMixin):
     expire_date = models.DateField(null=False, blank=False, validators=[check_date])
     description = models.TextField(null=True, blank=True, max_length=DESCRIPTION_MAX_LENGTH)
 
-    gym = models.ForeignKey(Gym, on_delete=models.CASCADE)
+    gym = models.ForeignKey(Gym, on_delete=models.CASCADE, db_index=False)
     clients = models.ManyToManyField('Client', through='ClientSub')
 
     class Meta:
         """Metadata for Subscription model."""
 
         db_table = '"subscription"'
+        indexes = [
+            models.Index(fields=['created_datetime', 'id'], name='subscription_created_id_idx'),
+            models.Index(fields=['modified_datetime', 'id'], name='subscription_modified_id_idx'),
+            models.Index(
+                fields=['gym', 'created_datetime', 'id'],
+                name='subscription_gym_created_idx',
+            ),
+            models.Index(
+                fields=['gym', 'price', 'id'],
+                include=['expire_date'],
+                name='subscription_gym_active_idx',
+            ),
+            models.Index(fields=['price', 'id'], name='subscription_price_id_idx'),
+            models.Index(fields=['expire_date', 'id'], name='subscription_expire_id_idx'),
+        ]
 
 
 class ClientSub(UUIDMixin):
     """Model representing a client-subscription relationship."""
 
-    client = models.ForeignKey(Client, on_delete=models.CASCADE)
-    sub = models.ForeignKey(Subscription, on_delete=models.CASCADE)
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, db_index=False)
+    sub = models.ForeignKey(Subscription, on_delete=models.CASCADE, db_index=False)
+    idempotency_key = models.CharField(
+        max_length=IDEMPOTENCY_KEY_LENGTH,
+        null=True,
+        blank=True,
+        unique=True,
+        editable=False,
+    )
 
     class Meta:
         """Metadata for ClientSub model."""
 
         db_table = '"client_sub"'
         unique_together = (('sub', 'client'))
+        indexes = [
+            models.Index(fields=['client', 'sub'], name='client_sub_client_sub_idx'),
+        ]
+
+
+class BalanceEntry(CreatedMixin):
+    """Model representing an append-only credit or debit of a client balance.
+
+    Entries use the auto incremented primary key instead of `UUIDMixin`, its order is
+    the order in which snapshots consume them.
+    """
+
+    OPENING = 'opening'
+    TOP_UP = 'top_up'
+    PURCHASE = 'purchase'
+    KIND_CHOICES = (
+        (OPENING, 'Opening balance'),
+        (TOP_UP, 'Top up'),
+        (PURCHASE, 'Purchase'),
+    )
+
+    client = models.ForeignKey(
+        Client, on_delete=models.CASCADE, related_name='balance_entries', db_index=False,
+    )
+    amount = models.DecimalField(max_digits=BALANCE_MAX_DIGITS, decimal_places=2)
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    client_sub = models.ForeignKey(
+        ClientSub, null=True, blank=True, on_delete=models.SET_NULL, db_index=False,
+    )
+
+    class Meta:
+        """Metadata for BalanceEntry model."""
+
+        db_table = '"balance_entry"'
+        indexes = [
+            models.Index(fields=['client', 'id'], name='balance_entry_client_id_idx'),
+            models.Index(
+                fields=['client_sub'],
+                condition=Q(client_sub__isnull=False),
+                name='balance_entry_client_sub_idx',
+            ),
+        ]
+
+
+class BalanceSnapshot(CreatedMixin):
+    """Model representing a client balance after all entries up to `last_entry_id`."""
+
+    client = models.ForeignKey(
+        Client, on_delete=models.CASCADE, related_name='balance_snapshots', db_index=False,
+    )
+    balance = models.DecimalField(max_digits=BALANCE_MAX_DIGITS, decimal_places=2)
+    last_entry_id = models.BigIntegerField()
+
+    class Meta:
+        """Metadata for BalanceSnapshot model."""
+
+        db_table = '"balance_snapshot"'
+        indexes = [
+            models.Index(fields=['client', '-last_entry_id'], name='balance_snapshot_client_idx'),
+        ]
+
+
+class Tombstone(models.Model):
+    """Model representing the deletion of a row of a `ModifiedMixin` model.
+
+    The log lets clients syncing by `modified_datetime` learn about rows which are gone.
+    Entries use the auto incremented primary key to break ties of `deleted_datetime`.
+    """
+
+    model = models.CharField(max_length=MAX_NAME_LENGTH)
+    object_id = models.UUIDField()
+    deleted_datetime = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        """Metadata for Tombstone model."""
+
+        db_table = '"tombstone"'
+        indexes = [
+            models.Index(fields=['deleted_datetime', 'id'], name='tombstone_deleted_id_idx'),
+        ]
@@ -0,0 +1,428 @@
+"""
+Keyset (seek) pagination helpers.
+
+Pages are addressed by an opaque cursor holding the ordering value and the primary key
+of the last row of the previous page, so fetching a page costs the same whatever its depth.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from .filters import KEYSET_ORDERING
+
+DEFAULT_ORDERING_FIELD = 'created_datetime'
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor can not be decoded."""
+
+
+def _get_value(row, name: str):
+    """
+    Read a value from a model instance or a `values()` row.
+
+    Args:
+        row: Model instance or dict.
+        name (str): Attribute name.
+
+    Returns:
+        Any: The attribute value.
+    """
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def encode_cursor(row, field: str = DEFAULT_ORDERING_FIELD) -> str:
+    """
+    Build a cursor pointing right after the given row.
+
+    Args:
+        row: Last row of the current page.
+        field (str): Name of the ordering field.
+
+    Returns:
+        str: An url-safe cursor string.
+    """
+    value = _get_value(row, field)
+    if value is not None:
+        value = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    payload = json.dumps([value, str(_get_value(row, 'id'))], separators=(',', ':'))
+    return urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, model_class, field: str = DEFAULT_ORDERING_FIELD) -> tuple:
+    """
+    Decode a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor string.
+        model_class (class): Model the cursor belongs to.
+        field (str): Name of the ordering field.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+
+    Returns:
+        tuple: The ordering value and the primary key.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(urlsafe_b64decode(padded.encode()))
+        if value is not None:
+            value = model_class._meta.get_field(field).to_python(value)
+        return value, model_class._meta.pk.to_python(pk)
+    except (BinasciiError, UnicodeDecodeError, TypeError, ValueError, ValidationError) as error:
+        raise InvalidCursor('Invalid cursor') from error
+
+
+def _segments(queryset, field: str, cursor, descending: bool) -> list:
+    """
+    Split the keyset scan into index-friendly querysets.
+
+    Rows with NULL in the ordering field are read in a separate segment, so that every
+    segment is a plain range scan over a `(field, id)` index.
+
+    Args:
+        queryset (QuerySet): Base queryset.
+        field (str): Name of the ordering field.
+        cursor (tuple | None): Decoded cursor.
+        descending (bool): Whether to walk the ordering backwards.
+
+    Returns:
+        list: Querysets to read in order.
+    """
+    nullable = queryset.model._meta.get_field(field).null
+    prefix = '-' if descending else ''
+    values = queryset.filter(**{f'{field}__isnull': False}) if nullable else queryset
+    values = values.order_by(f'{prefix}{field}', f'{prefix}id')
+    nulls = queryset.filter(**{f'{field}__isnull': True}).order_by(f'{prefix}id')
+    if cursor is None:
+        if not nullable:
+            return [values]
+        return [nulls, values] if descending else [values, nulls]
+
+    value, pk = cursor
+    after = 'lt' if descending else 'gt'
+    if value is None:
+        nulls = nulls.filter(**{f'id__{after}': pk})
+        return [nulls, values] if descending else [nulls]
+
+    bound = 'lte' if descending else 'gte'
+    values = values.filter(
+        Q(**{f'{field}__{after}': value}) | Q(**{field: value, f'id__{after}': pk}),
+        **{f'{field}__{bound}': value},
+    )
+    if descending or not nullable:
+        return [values]
+    return [values, nulls]
+
+
+def keyset_page(queryset, cursor: str | None, size: int, field: str = DEFAULT_ORDERING_FIELD,
+                descending: bool = False) -> tuple[list, str | None]:
+    """
+    Fetch one page ordered by `(field, id)` starting after the cursor.
+
+    Args:
+        queryset (QuerySet): Queryset to paginate, may be a `values()` queryset.
+        cursor (str | None): Cursor returned for the previous page.
+        size (int): Page size.
+        field (str): Name of the ordering field.
+        descending (bool): Whether to order descending.
+
+    Returns:
+        tuple[list, str | None]: Rows of the page and the cursor of the next page.
+    """
+    decoded = decode_cursor(cursor, queryset.model, field) if cursor else None
+    rows = []
+    for segment in _segments(queryset, field, decoded, descending):
+        rows.extend(segment[:size + 1 - len(rows)])
+        if len(rows) > size:
+            break
+    return _page(rows, size, field)
+
+
+async def akeyset_page(queryset, cursor: str | None, size: int,
+                       field: str = DEFAULT_ORDERING_FIELD,
+                       descending: bool = False) -> tuple[list, str | None]:
+    """
+    Asynchronous version of `keyset_page`.
+
+    Args:
+        queryset (QuerySet): Queryset to paginate, may be a `values()` queryset.
+        cursor (str | None): Cursor returned for the previous page.
+        size (int): Page size.
+        field (str): Name of the ordering field.
+        descending (bool): Whether to order descending.
+
+    Returns:
+        tuple[list, str | None]: Rows of the page and the cursor of the next page.
+    """
+    decoded = decode_cursor(cursor, queryset.model, field) if cursor else None
+    rows = []
+    for segment in _segments(queryset, field, decoded, descending):
+        rows.extend([row async for row in segment[:size + 1 - len(rows)]])
+        if len(rows) > size:
+            break
+    return _page(rows, size, field)
+
+
+def _page(rows: list, size: int, field: str) -> tuple[list, str | None]:
+    """
+    Cut the rows read for a page, one more than its size, into the page and the next cursor.
+
+    Args:
+        rows (list): Rows read for the page.
+        size (int): Page size.
+        field (str): Name of the ordering field.
+
+    Returns:
+        tuple[list, str | None]: Rows of the page and the cursor of the next page.
+    """
+    if len(rows) > size:
+        rows = rows[:size]
+        return rows, encode_cursor(rows[-1], field)
+    return rows, None
+
+
+def estimate_count(queryset) -> int:
+    """
+    Estimate the number of rows of a queryset without `COUNT(*)`.
+
+    On Postgres an unfiltered table is estimated from `pg_class.reltuples` and any other
+    queryset from the row estimate of its query plan. Other databases fall back to `count()`.
+
+    Args:
+        queryset (QuerySet): The queryset to estimate.
+
+    Returns:
+        int: Approximate number of rows.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    if not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table],
+            )
+            reltuples = cursor.fetchone()[0]
+        if reltuples >= 0:
+            return reltuples
+    plan = json.loads(queryset.order_by().values('pk').explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination over the `(created_datetime, id)` keyset.
+
+    `KeysetOrderingFilter` may pick another indexed field for the request.
+
+    The page size is taken from the `page_size` query parameter, limited by `MAX_PAGE_SIZE`,
+    and defaults to the `PAGE_SIZE` REST framework setting. A total is only computed when
+    asked for with `count=exact` or the cheap planner based `count=estimate`.
+    """
+
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    count_query_param = 'count'
+    max_page_size = MAX_PAGE_SIZE
+    ordering_field = DEFAULT_ORDERING_FIELD
+    descending = False
+
+    def get_page_size(self, request) -> int:
+        """
+        Get the page size of the request.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            int: The page size.
+        """
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size,
+            )
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE or DEFAULT_PAGE_SIZE
+
+    def get_ordering(self, request) -> tuple[str, bool]:
+        """
+        Get the keyset ordering of the request.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            tuple[str, bool]: The ordering field and whether it is descending.
+        """
+        return getattr(request, KEYSET_ORDERING, (self.ordering_field, self.descending))
+
+    def get_count(self, queryset, request) -> int | None:
+        """
+        Count the rows of the queryset if the client asked for it.
+
+        Args:
+            queryset (QuerySet): The paginated queryset.
+            request (Request): The current request.
+
+        Returns:
+            int | None: The total, if requested.
+        """
+        mode = request.query_params.get(self.count_query_param)
+        if mode == COUNT_EXACT:
+            return queryset.count()
+        if mode == COUNT_ESTIMATE:
+            return estimate_count(queryset)
+        return None
+
+    async def aget_count(self, queryset, request) -> int | None:
+        """
+        Asynchronous version of `get_count`.
+
+        Args:
+            queryset (QuerySet): The paginated queryset.
+            request (Request): The current request.
+
+        Returns:
+            int | None: The total, if requested.
+        """
+        mode = request.query_params.get(self.count_query_param)
+        if mode == COUNT_EXACT:
+            return await queryset.acount()
+        if mode == COUNT_ESTIMATE:
+            return await sync_to_async(estimate_count)(queryset)
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None) -> list:
+        """
+        Fetch the page of the request.
+
+        Args:
+            queryset (QuerySet): Queryset to paginate.
+            request (Request): The current request.
+            view (APIView): The view.
+
+        Raises:
+            NotFound: If the cursor is invalid.
+
+        Returns:
+            list: Rows of the page.
+        """
+        self.request = request
+        field, descending = self.get_ordering(request)
+        try:
+            page, self.next_cursor = keyset_page(
+                queryset,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request),
+                field,
+                descending,
+            )
+        except InvalidCursor as error:
+            raise NotFound('Invalid cursor') from error
+        self.count = self.get_count(queryset, request)
+        return page
+
+    async def apaginate_queryset(self, queryset, request, view=None) -> list:
+        """
+        Asynchronous version of `paginate_queryset`.
+
+        Args:
+            queryset (QuerySet): Queryset to paginate.
+            request (Request): The current request.
+            view (APIView): The view.
+
+        Raises:
+            NotFound: If the cursor is invalid.
+
+        Returns:
+            list: Rows of the page.
+        """
+        self.request = request
+        field, descending = self.get_ordering(request)
+        try:
+            page, self.next_cursor = await akeyset_page(
+                queryset,
+                request.query_params.get(self.cursor_query_param),
+                self.get_page_size(request),
+                field,
+                descending,
+            )
+        except InvalidCursor as error:
+            raise NotFound('Invalid cursor') from error
+        self.count = await self.aget_count(queryset, request)
+        return page
+
+    def get_next_link(self) -> str | None:
+        """
+        Build the link to the next page.
+
+        Returns:
+            str | None: The link, if there is a next page.
+        """
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data) -> Response:
+        """
+        Wrap serialized rows into the paginated response.
+
+        Args:
+            data (list): Serialized rows of the page.
+
+        Returns:
+            Response: The response.
+        """
+        body = OrderedDict(next=self.get_next_link())
+        if self.count is not None:
+            body['count'] = self.count
+            body['count_is_estimate'] = (
+                self.request.query_params.get(self.count_query_param) == COUNT_ESTIMATE
+            )
+        body['results'] = data
+        return Response(body)
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        """
+        Describe the paginated response.
+
+        Args:
+            schema (dict): Schema of the results.
+
+        Returns:
+            dict: Schema of the response.
+        """
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'count': {'type': 'integer'},
+                'count_is_estimate': {'type': 'boolean'},
+                'results': schema,
+            },
+        }
@@ -0,0 +1,101 @@
+"""This module builds querysets loading exactly the relations a serializer reads."""
+
+from django.db.models import Prefetch
+from rest_framework.relations import ManyRelatedField, RelatedField
+
+
+def _related_model(model_class, source: str):
+    """
+    Follow a dotted serializer source to the model it points at.
+
+    Args:
+        model_class (class): Model the source starts from.
+        source (str): Dotted source of a serializer field.
+
+    Returns:
+        class: The related model.
+    """
+    for name in source.split('.'):
+        model_class = model_class._meta.get_field(name).related_model
+    return model_class
+
+
+def plan_queryset(queryset, serializer_class, field_names=None):
+    """
+    Add the `select_related`/`prefetch_related` calls a serializer needs.
+
+    Primary key relations are prefetched with their ids only, plain foreign keys served
+    from the `<name>_id` column need nothing, any other relation is joined or prefetched
+    completely. The number of queries of a list then does not depend on its length.
+
+    Args:
+        queryset (QuerySet): Base queryset.
+        serializer_class (class): Serializer rendering the queryset.
+        field_names (Iterable[str] | None): Rendered fields, all of them by default.
+
+    Returns:
+        QuerySet: The planned queryset.
+    """
+    selects, prefetches = [], []
+    for name, field in serializer_class().fields.items():
+        if field.write_only or field.source == '*':
+            continue
+        if field_names is not None and name not in field_names:
+            continue
+        lookup = field.source.replace('.', '__')
+        if isinstance(field, ManyRelatedField):
+            child = field.child_relation
+            if child.use_pk_only_optimization():
+                related_model = _related_model(queryset.model, field.source)
+                prefetches.append(Prefetch(lookup, queryset=related_model.objects.only('pk')))
+            else:
+                prefetches.append(lookup)
+        elif isinstance(field, RelatedField):
+            if '.' in field.source or not field.use_pk_only_optimization():
+                selects.append(lookup)
+    if selects:
+        queryset = queryset.select_related(*selects)
+    if prefetches:
+        queryset = queryset.prefetch_related(*prefetches)
+    return queryset
+
+
+def plan_dependencies(model_class, serializer_class) -> set:
+    """
+    Collect the models whose rows a serializer renders.
+
+    A primary key relation depends on the rows linking the objects, the through model of a
+    many-to-many relation or the related model of a reverse foreign key, a relation rendered
+    beyond its primary key also depends on the related model.
+
+    Args:
+        model_class (class): Model of the serialized objects.
+        serializer_class (class): The serializer.
+
+    Returns:
+        set: The models.
+    """
+    dependencies = {model_class}
+    for field in serializer_class().fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        relation = field.child_relation if isinstance(field, ManyRelatedField) else field
+        pk_only = isinstance(relation, RelatedField) and relation.use_pk_only_optimization()
+        current = model_class
+        names = field.source.split('.')
+        for index, name in enumerate(names):
+            model_field = next(
+                (candidate for candidate in current._meta.get_fields() if candidate.name == name),
+                None,
+            )
+            if model_field is None or not model_field.is_relation:
+                break
+            if model_field.many_to_many:
+                remote = model_field.remote_field if model_field.concrete else model_field
+                dependencies.add(remote.through)
+            elif model_field.one_to_many:
+                dependencies.add(model_field.related_model)
+            current = model_field.related_model
+            if not pk_only or index < len(names) - 1:
+                dependencies.add(current)
+    return dependencies
@@ -0,0 +1,264 @@
+"""
+Per-request profiling of SQL, template rendering and serialization.
+
+With `REQUEST_PROFILING` on, `ProfilingMiddleware` records for every request the number of
+queries, their total time, the queries repeated with the same parameters, and the time
+spent rendering templates and running serializers, and reports them in a `Server-Timing`
+header, which browser developer tools show next to the request. A share of the requests,
+`REQUEST_PROFILING_LOG_SAMPLE`, is also logged as JSON to the `fitness_app.profiling`
+logger. Template and serializer times include the queries of lazy querysets they
+evaluate. With the setting off the middleware removes itself from the stack at startup
+and nothing is instrumented.
+"""
+
+import json
+import logging
+import random
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from functools import wraps
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.base import Template
+from rest_framework.serializers import BaseSerializer
+
+from .fast_serializers import ValuesSerializer
+
+SERVER_TIMING_HEADER = 'Server-Timing'
+TEMPLATE = 'template'
+SERIALIZER = 'serializer'
+
+logger = logging.getLogger(__name__)
+profile_state = ContextVar('profile_state', default=None)
+_instrument_lock = threading.Lock()
+_instrumented = False
+
+
+class RequestProfile:
+    """Measurements of one request."""
+
+    def __init__(self):
+        """Start with nothing measured."""
+        self.started = perf_counter()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+        self.times = {TEMPLATE: 0.0, SERIALIZER: 0.0}
+        self.depth = {TEMPLATE: 0, SERIALIZER: 0}
+
+    @property
+    def duplicates(self) -> int:
+        """
+        Count the queries repeating an earlier query with the same parameters.
+
+        Returns:
+            int: Number of repeated queries.
+        """
+        return self.queries - len(self.statements)
+
+    def as_dict(self, request, response) -> dict:
+        """
+        Summarize the request.
+
+        Args:
+            request (HttpRequest): The request.
+            response (HttpResponse): The response.
+
+        Returns:
+            dict: Durations in milliseconds and query counts.
+        """
+        return {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round((perf_counter() - self.started) * 1000, 3),
+            'queries': self.queries,
+            'duplicate_queries': self.duplicates,
+            'sql_ms': round(self.sql_time * 1000, 3),
+            'template_ms': round(self.times[TEMPLATE] * 1000, 3),
+            'serializer_ms': round(self.times[SERIALIZER] * 1000, 3),
+        }
+
+    def server_timing(self) -> str:
+        """
+        Render the measurements as a `Server-Timing` header value.
+
+        Returns:
+            str: The header value.
+        """
+        total = perf_counter() - self.started
+        return ', '.join((
+            f'sql;dur={self.sql_time * 1000:.3f};'
+            f'desc="{self.queries} queries ({self.duplicates} duplicates)"',
+            f'{TEMPLATE};dur={self.times[TEMPLATE] * 1000:.3f}',
+            f'{SERIALIZER};dur={self.times[SERIALIZER] * 1000:.3f}',
+            f'total;dur={total * 1000:.3f}',
+        ))
+
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute a query and add it to the profile of the current request.
+
+    Args:
+        execute (Callable): The next execute wrapper.
+        sql (str): The SQL.
+        params: The parameters.
+        many (bool): Whether it is an `executemany()`.
+        context (dict): The connection and cursor.
+
+    Returns:
+        Any: The result of the query.
+    """
+    profile = profile_state.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.sql_time += perf_counter() - started
+        profile.queries += 1
+        profile.statements[(sql, repr(params))] += 1
+
+
+def add_query_recorder(sender, connection, **kwargs):
+    """Record the queries of a new connection, wrappers of a database alias are kept once."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def timed(kind: str, function):
+    """
+    Wrap a function to add its time to the profile of the current request.
+
+    Nested calls, such as included templates or nested serializers, are counted once.
+
+    Args:
+        kind (str): `template` or `serializer`.
+        function (Callable): The function.
+
+    Returns:
+        Callable: The wrapped function.
+    """
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        profile = profile_state.get()
+        if profile is None or profile.depth[kind]:
+            return function(*args, **kwargs)
+        profile.depth[kind] += 1
+        started = perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            profile.times[kind] += perf_counter() - started
+            profile.depth[kind] -= 1
+    return wrapper
+
+
+def instrument() -> None:
+    """
+    Install the query recorder and the template and serializer timers once per process.
+
+    Connections are opened per thread, the recorder is added to the connections already
+    open in the calling thread and to every connection opened afterwards.
+    """
+    global _instrumented
+    with _instrument_lock:
+        if _instrumented:
+            return
+        connection_created.connect(add_query_recorder)
+        for connection in connections.all(initialized_only=True):
+            add_query_recorder(None, connection)
+        Template.render = timed(TEMPLATE, Template.render)
+        BaseSerializer.data = property(timed(SERIALIZER, BaseSerializer.data.fget))
+        ValuesSerializer.render = timed(SERIALIZER, ValuesSerializer.render)
+        _instrumented = True
+
+
+class ProfilingMiddleware:
+    """Measure SQL, templates and serializers of a request and report them in headers."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Initialize the middleware.
+
+        Args:
+            get_response (Callable): The next handler.
+
+        Raises:
+            MiddlewareNotUsed: If `REQUEST_PROFILING` is off.
+        """
+        if not getattr(settings, 'REQUEST_PROFILING', False):
+            raise MiddlewareNotUsed
+        instrument()
+        self.get_response = get_response
+        self.sample = getattr(settings, 'REQUEST_PROFILING_LOG_SAMPLE', 0)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Profile a request.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response with the `Server-Timing` header.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile = RequestProfile()
+        token = profile_state.set(profile)
+        try:
+            response = self.get_response(request)
+        finally:
+            profile_state.reset(token)
+        return self.finish(profile, request, response)
+
+    async def __acall__(self, request):
+        """
+        Asynchronous version of `__call__`.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response with the `Server-Timing` header.
+        """
+        profile = RequestProfile()
+        token = profile_state.set(profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profile_state.reset(token)
+        return self.finish(profile, request, response)
+
+    def finish(self, profile: RequestProfile, request, response):
+        """
+        Add the header and log a sample of the requests.
+
+        Args:
+            profile (RequestProfile): The measurements.
+            request (HttpRequest): The request.
+            response (HttpResponse): The response.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        timing = profile.server_timing()
+        previous = response.get(SERVER_TIMING_HEADER)
+        response[SERVER_TIMING_HEADER] = f'{previous}, {timing}' if previous else timing
+        if self.sample and random.random() < self.sample:  # noqa: S311
+            logger.info(json.dumps(profile.as_dict(request, response)))
+        return response
@@ -0,0 +1,271 @@
+"""
+Versioned cache of the list and retrieve responses of the REST viewsets.
+
+Every model has a generation counter in the shared cache, bumped once a transaction saving,
+deleting or bulk writing its rows commits. A response is cached under its URL with the
+query parameters sorted, its media type and the generations of the models it is built from,
+see `planner.plan_dependencies`. A write therefore expires every cached response built from
+its model by bumping one counter, without looking the keys up, and the old entries age out
+after `RESPONSE_CACHE_TIMEOUT` seconds. The generations are read before the rows, so a
+response read while a write commits is stored under the generation it may predate.
+
+Responses are the same for every authenticated user, the permissions are checked before the
+cache is read. The browsable API, other methods than GET and HEAD and reads inside a
+transaction, which may see uncommitted rows, skip the cache. The generations live in the
+default cache, so several workers need a shared backend, such as Memcached, Redis or a file
+based one. With the local-memory backend each process has its own generations and a write
+would not expire the responses cached by the others, so `RESPONSE_CACHE_TIMEOUT` defaults
+to 0 there, which turns the cache off.
+"""
+
+from hashlib import sha256
+from time import time_ns
+from urllib.parse import urlencode
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.template.response import SimpleTemplateResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from .conditional import BROWSABLE_API_FORMAT, with_validators
+from .metrics import record_cache
+from .planner import plan_dependencies
+
+GENERATION_KEY = 'response-generation:{0}'
+RESPONSE_KEY = 'response:{0}'
+RESPONSE_CACHE = 'response'
+CACHED_METHODS = ('GET', 'HEAD')
+
+
+def generation_key(model_class) -> str:
+    """
+    Build the cache key of the generation of a model.
+
+    Args:
+        model_class (class): The model.
+
+    Returns:
+        str: The cache key.
+    """
+    return GENERATION_KEY.format(model_class._meta.label_lower)
+
+
+def bump_generation(model_class) -> None:
+    """
+    Expire the cached responses built from a model in every process.
+
+    A lost counter restarts from the current time, above any generation used before.
+
+    Args:
+        model_class (class): The model.
+    """
+    key = generation_key(model_class)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time_ns(), timeout=None)
+
+
+def generations(models) -> list:
+    """
+    Get the generations of models, starting them at the current time.
+
+    Args:
+        models (Iterable[class]): The models.
+
+    Returns:
+        list: The generations, in the order of the models.
+    """
+    keys = [generation_key(model_class) for model_class in models]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, time_ns(), timeout=None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def response_key(request, versions: list) -> str:
+    """
+    Build the cache key of a response.
+
+    Args:
+        request (Request): The current request.
+        versions (list): Generations of the models the response is built from.
+
+    Returns:
+        str: The cache key.
+    """
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    parts = (request.build_absolute_uri(request.path), query, request.accepted_media_type)
+    digest = sha256('|'.join(map(str, (*parts, *versions))).encode()).hexdigest()
+    return RESPONSE_KEY.format(digest)
+
+
+def store_response(key: str, response) -> None:
+    """
+    Cache a rendered response with its validators.
+
+    Args:
+        key (str): The cache key.
+        response (HttpResponse): The rendered response.
+    """
+    entry = {
+        'content': response.content,
+        'content_type': response['Content-Type'],
+        'etag': response.get('ETag'),
+        'last_modified': parse_http_date_safe(response.get('Last-Modified')),
+    }
+    cache.set(key, entry, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 0))
+
+
+def cached_response(request, entry: dict):
+    """
+    Answer from a cache entry, with `304 Not Modified` if the client has it.
+
+    Args:
+        request (Request): The current request.
+        entry (dict): The cache entry.
+
+    Returns:
+        HttpResponse: The response.
+    """
+    response = get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'],
+    )
+    if response is None:
+        response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    if entry['etag'] is None:
+        return response
+    return with_validators(response, entry['etag'], entry['last_modified'])
+
+
+class ResponseCacheMixin:
+    """Viewset mixin serving list and retrieve responses from the versioned cache."""
+
+    def response_dependencies(self) -> list:
+        """
+        Get the models the responses are built from.
+
+        Returns:
+            list: The models, in a stable order.
+        """
+        models = plan_dependencies(self.get_queryset().model, self.get_serializer_class())
+        return sorted(models, key=lambda model_class: model_class._meta.label_lower)
+
+    def response_lookup(self, request) -> tuple:
+        """
+        Look a response up in the cache and count the lookup.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            tuple: The cache key and the entry, None for both when the request skips the cache,
+                None for the entry on a miss.
+        """
+        if (
+            not getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 0)
+            or request.method not in CACHED_METHODS
+            or request.accepted_renderer.format == BROWSABLE_API_FORMAT
+            or transaction.get_connection(self.get_queryset().db).in_atomic_block
+        ):
+            return None, None
+        key = response_key(request, generations(self.response_dependencies()))
+        entry = cache.get(key)
+        record_cache(RESPONSE_CACHE, entry is not None)
+        return key, entry
+
+    def store_on_render(self, key: str | None, response):
+        """
+        Cache a successful response once it is rendered.
+
+        Args:
+            key (str | None): The cache key, None if the request skips the cache.
+            response (HttpResponse): The response built on a miss.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if (
+            key is not None and response.status_code == 200
+            and isinstance(response, SimpleTemplateResponse)
+        ):
+            response.add_post_render_callback(lambda rendered: store_response(key, rendered))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        """
+        List objects from the cache when possible.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        key, entry = self.response_lookup(request)
+        if entry is not None:
+            return cached_response(request, entry)
+        response = super().list(request, *args, **kwargs)
+        return self.store_on_render(key, response)
+
+    async def alist(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `list`.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        key, entry = await sync_to_async(self.response_lookup)(request)
+        if entry is not None:
+            return cached_response(request, entry)
+        response = await super().alist(request, *args, **kwargs)
+        return self.store_on_render(key, response)
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Retrieve an object from the cache when possible.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        key, entry = self.response_lookup(request)
+        if entry is not None:
+            return cached_response(request, entry)
+        response = super().retrieve(request, *args, **kwargs)
+        return self.store_on_render(key, response)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        """
+        Asynchronous version of `retrieve`.
+
+        Args:
+            request (Request): The current request.
+            args: Positional arguments.
+            kwargs: Keyword arguments.
+
+        Returns:
+            Response: The response.
+        """
+        key, entry = await sync_to_async(self.response_lookup)(request)
+        if entry is not None:
+            return cached_response(request, entry)
+        response = await super().aretrieve(request, *args, **kwargs)
+        return self.store_on_render(key, response)
@@ -0,0 +1,218 @@
+"""
+Routing of reads to replicas and writes to the primary database.
+
+`REPLICA_DATABASES` lists the aliases of the replicas, reads outside a transaction go to a
+random one of them. Requests with unsafe methods run entirely on the primary. Once a request
+writes, its later reads stay on the primary and the response sets a short-lived cookie. Every
+query of a request carrying that cookie runs on the primary too, so clients see their own
+writes before the replicas catch up: a purchase shows up on the profile page, and a login is
+not lost to a stale session row.
+
+Any two databases can stand in for the primary and a replica, for example two SQLite files
+in a local settings module::
+
+    DATABASES['replica1'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': 'replica.sqlite3'}
+    REPLICA_DATABASES = ['replica1']
+"""
+
+import random
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PRIMARY = DEFAULT_DB_ALIAS
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+
+class RoutingState:
+    """Routing state of the current request."""
+
+    def __init__(self, pinned: bool):
+        """
+        Initialize the state.
+
+        Args:
+            pinned (bool): Whether every query should run on the primary.
+        """
+        self.pinned = pinned
+        self.wrote = False
+
+
+routing_state = ContextVar('routing_state', default=None)
+
+
+def replica_databases() -> list:
+    """
+    Get the aliases of the replicas.
+
+    Returns:
+        list: The aliases, empty without replicas.
+    """
+    return list(getattr(settings, 'REPLICA_DATABASES', ()))
+
+
+class PrimaryReplicaRouter:
+    """Database router sending writes to the primary and reads to the replicas."""
+
+    def db_for_read(self, model, **hints) -> str | None:
+        """
+        Choose the database of a read.
+
+        Args:
+            model (class): The model read.
+            hints: Router hints, `instance` for related lookups.
+
+        Returns:
+            str | None: The alias, None to fall back to the default database.
+        """
+        replicas = replica_databases()
+        if not replicas:
+            return None
+        state = routing_state.get()
+        if state is not None and (state.pinned or state.wrote):
+            return PRIMARY
+        if connections[PRIMARY].in_atomic_block:
+            return PRIMARY
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db in replicas:
+            return instance._state.db
+        return random.choice(replicas)  # noqa: S311
+
+    def db_for_write(self, model, **hints) -> str:
+        """
+        Choose the database of a write and remember that the request wrote.
+
+        Args:
+            model (class): The model written.
+            hints: Router hints.
+
+        Returns:
+            str: The primary alias.
+        """
+        state = routing_state.get()
+        if state is not None:
+            state.wrote = True
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool | None:
+        """
+        Allow relations between objects of the primary and the replicas.
+
+        Args:
+            obj1 (Model): The first object.
+            obj2 (Model): The second object.
+            hints: Router hints.
+
+        Returns:
+            bool | None: True if both objects come from the replicated database.
+        """
+        databases = {PRIMARY, *replica_databases()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name=None, **hints) -> bool | None:
+        """
+        Migrate only the primary, the replicas copy its schema.
+
+        Args:
+            db (str): The database alias.
+            app_label (str): The app of the migration.
+            model_name (str): The model migrated.
+            hints: Router hints.
+
+        Returns:
+            bool | None: False for replicas.
+        """
+        if db in replica_databases():
+            return False
+        return None
+
+
+class PrimaryPinMiddleware:
+    """Track writes of a request and pin the reads of the following requests to the primary."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Initialize the middleware.
+
+        Args:
+            get_response (Callable): The next handler.
+        """
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Route the queries of a request.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = self.start(request)
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.finish(state, response)
+
+    async def __acall__(self, request):
+        """
+        Asynchronous version of `__call__`.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        state = self.start(request)
+        token = routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+        return self.finish(state, response)
+
+    def start(self, request) -> RoutingState:
+        """
+        Build the routing state of a request.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            RoutingState: The state, pinned for unsafe methods and recent writers.
+        """
+        return RoutingState(request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES)
+
+    def finish(self, state: RoutingState, response):
+        """
+        Pin the next requests of a client that wrote.
+
+        Args:
+            state (RoutingState): The state of the request.
+            response (HttpResponse): The response.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if state.wrote and replica_databases():
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,220 @@
+"""
+Generation of a synthetic dataset of a configurable size.
+
+Everything is drawn from one `random.Random(seed)`, primary keys included, so the same
+sizes and seed give the same rows on every run. Rows are inserted with `bulk_create` in
+chunks. The fan-out follows a skewed popularity, a few gyms sell most subscriptions and
+employ most coaches, some coaches hold many certificates, and some clients own several
+subscriptions while most own one or none. Clients get their opening ledger entry, as they
+do when created one by one.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+from random import Random
+from uuid import UUID
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (Address, BalanceEntry, Certificate, Client, ClientSub,
+                     Coach, Gym, GymCoach, Subscription)
+
+SEED_CHUNK_SIZE = 1000
+DEFAULT_COUNTS = {
+    'address': 100,
+    'gym': 100,
+    'coach': 300,
+    'certificate': 600,
+    'subscription': 500,
+    'client': 1000,
+    'client_sub': 1500,
+}
+GYMS_PER_COACH = (1, 3)
+# Draws of client subscriptions repeat until enough distinct pairs are drawn, at most this often.
+CLIENT_SUB_ROUNDS = 10
+USERNAME_PREFIX = 'seed'
+CITIES = ('Moscow', 'Sochi', 'Kazan', 'Samara', 'Perm', 'Tver')
+STREETS = ('Lenina', 'Mira', 'Sadovaya', 'Gagarina', 'Pushkina', 'Sovetskaya')
+SPECS = ('Boxing', 'Yoga', 'Crossfit', 'Swimming', 'Pilates', 'Powerlifting')
+FIRST_NAMES = ('Ivan', 'Anna', 'Oleg', 'Maria', 'Pavel', 'Olga', 'Denis', 'Elena')
+LAST_NAMES = ('Petrov', 'Ivanova', 'Smirnov', 'Kuznetsova', 'Popov', 'Sokolova')
+
+
+def scaled_counts(scale: float, **overrides) -> dict:
+    """
+    Get the number of rows per table for a multiple of the default dataset.
+
+    Args:
+        scale (float): The multiple of `DEFAULT_COUNTS`.
+        overrides: Exact numbers of rows by table, None values are ignored.
+
+    Returns:
+        dict: Number of rows by table.
+    """
+    counts = {name: max(int(count * scale), 0) for name, count in DEFAULT_COUNTS.items()}
+    counts.update({name: count for name, count in overrides.items() if count is not None})
+    return counts
+
+
+class Generator:
+    """Random source of the rows of a dataset."""
+
+    def __init__(self, seed: int):
+        """
+        Initialize the generator.
+
+        Args:
+            seed (int): The random seed.
+        """
+        self.random = Random(seed)
+        self.seed = seed
+
+    def uuid(self) -> UUID:
+        """
+        Draw a version 4 UUID from the seeded source.
+
+        Returns:
+            UUID: The UUID.
+        """
+        return UUID(int=self.random.getrandbits(128), version=4)
+
+    def skewed(self, items: list, count: int) -> list:
+        """
+        Draw items with a popularity falling with their position.
+
+        Args:
+            items (list): The items, the first ones are the most popular.
+            count (int): Number of draws.
+
+        Returns:
+            list: The drawn items.
+        """
+        if not items:
+            return []
+        weights = list(accumulate(1 / (rank + 1) for rank in range(len(items))))
+        return self.random.choices(items, cum_weights=weights, k=count)
+
+
+def create(model_class, objects: list) -> list:
+    """
+    Insert objects in chunks.
+
+    Args:
+        model_class (class): The model.
+        objects (list): The objects.
+
+    Returns:
+        list: The objects.
+    """
+    return model_class.objects.bulk_create(objects, batch_size=SEED_CHUNK_SIZE)
+
+
+def seed_dataset(counts: dict, seed: int = 0) -> dict:
+    """
+    Insert a synthetic dataset in one transaction.
+
+    Args:
+        counts (dict): Number of rows by table, see `DEFAULT_COUNTS`.
+        seed (int): The random seed, usernames include it so datasets of different seeds
+            can be inserted into one database.
+
+    Returns:
+        dict: Number of inserted rows by table.
+    """
+    generator = Generator(seed)
+    rand = generator.random
+    today = timezone.localdate()
+    with transaction.atomic():
+        addresses = create(Address, [
+            Address(
+                id=generator.uuid(),
+                city_name=rand.choice(CITIES),
+                street_name=rand.choice(STREETS),
+                house_number=rand.randint(1, 200),
+                apartment_number=rand.choice((None, rand.randint(1, 300))),
+            )
+            for _ in range(counts['address'])
+        ])
+        gyms = create(Gym, [
+            Gym(
+                id=generator.uuid(),
+                gym_name=f'Gym {number}',
+                address=addresses[number % len(addresses)] if addresses else None,
+            )
+            for number in range(counts['gym'])
+        ])
+        coaches = create(Coach, [
+            Coach(
+                id=generator.uuid(),
+                first_name=rand.choice(FIRST_NAMES),
+                last_name=rand.choice(LAST_NAMES),
+                spec=rand.choice(SPECS),
+            )
+            for _ in range(counts['coach'])
+        ])
+        links = set()
+        for coach in coaches:
+            for gym in generator.skewed(gyms, rand.randint(*GYMS_PER_COACH)):
+                links.add((gym.id, coach.id))
+        gym_coaches = create(GymCoach, [
+            GymCoach(id=generator.uuid(), gym_id=gym_id, coach_id=coach_id)
+            for gym_id, coach_id in sorted(links)
+        ])
+        certificates = create(Certificate, [
+            Certificate(
+                id=generator.uuid(),
+                coach=coach,
+                certf_name=f'{coach.spec} level {rand.randint(1, 3)}',
+                description=rand.choice(('', f'Issued in {rand.randint(2000, 2024)}')),
+            )
+            for coach in generator.skewed(coaches, counts['certificate'])
+        ])
+        subscriptions = create(Subscription, [
+            Subscription(
+                id=generator.uuid(),
+                gym=gym,
+                price=rand.randrange(500, 10000, 100),
+                expire_date=today + timedelta(days=rand.randint(30, 365)),
+                description=rand.choice((None, 'Morning', 'Unlimited', 'Weekends')),
+            )
+            for gym in generator.skewed(gyms, counts['subscription'])
+        ])
+        users = create(User, [
+            User(username=f'{USERNAME_PREFIX}-{seed}-{number}', password=UNUSABLE_PASSWORD_PREFIX)
+            for number in range(counts['client'])
+        ])
+        clients = create(Client, [
+            Client(id=generator.uuid(), user=user, net_worth=Decimal(rand.randint(0, 50000)))
+            for user in users
+        ])
+        create(BalanceEntry, [
+            BalanceEntry(client=client, amount=client.net_worth, kind=BalanceEntry.OPENING)
+            for client in clients
+        ])
+        owned = set()
+        wanted = min(counts['client_sub'], len(clients) * len(subscriptions))
+        for _ in range(CLIENT_SUB_ROUNDS):
+            if len(owned) >= wanted:
+                break
+            owned.update(zip(
+                generator.skewed(clients, wanted - len(owned)),
+                generator.skewed(subscriptions, wanted - len(owned)),
+            ))
+        client_subs = create(ClientSub, [
+            ClientSub(id=generator.uuid(), client=client, sub=sub)
+            for client, sub in sorted(owned, key=lambda pair: (pair[0].id, pair[1].id))
+        ])
+    return {
+        'address': len(addresses),
+        'gym': len(gyms),
+        'coach': len(coaches),
+        'gym_coach': len(gym_coaches),
+        'certificate': len(certificates),
+        'subscription': len(subscriptions),
+        'client': len(clients),
+        'client_sub': len(client_subs),
+    }
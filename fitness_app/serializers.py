@@ -1,5 +1,6 @@
 """_summary_."""
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.authtoken.models import Token
 from rest_framework.serializers import ModelSerializer, PrimaryKeyRelatedField
 
@@ -7,6 +8,35 @@ from .models import (Address, Certificate, Client, Coach, Gym, Subscription,
                      User)
 
 ALL = '__all__'
+RELATED_CACHE = 'related_cache'
+
+
+class CachedPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """Primary key relation reading objects preloaded into the serializer context.
+
+    Bulk endpoints put `{model: {pk: object}}` under the `related_cache` context key, so
+    validating a batch does not query the database once per related primary key.
+    """
+
+    def to_internal_value(self, data):
+        """Look the related object up in the context cache if there is one.
+
+        Args:
+            data: The primary key sent by the client.
+
+        Returns:
+            Model: The related object.
+        """
+        cached = self.context.get(RELATED_CACHE, {}).get(self.get_queryset().model)
+        if cached is None or self.pk_field is not None:
+            return super().to_internal_value(data)
+        try:
+            pk = self.get_queryset().model._meta.pk.to_python(data)
+        except (DjangoValidationError, TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        if pk not in cached:
+            self.fail('does_not_exist', pk_value=data)
+        return cached[pk]
 
 
 class ClientSerializer(ModelSerializer):
@@ -69,8 +99,8 @@ class GymSerializer(ModelSerializer):
         image_path (str): Path to the gym's image.
     """
 
-    coaches = PrimaryKeyRelatedField(many=True, queryset=Coach.objects.all())
-    address = PrimaryKeyRelatedField(queryset=Address.objects.all())
+    coaches = CachedPrimaryKeyRelatedField(many=True, queryset=Coach.objects.all())
+    address = CachedPrimaryKeyRelatedField(queryset=Address.objects.all())
 
     class Meta:
         """Meta options for GymSerializer.
@@ -101,8 +131,8 @@ class SubscriptionSerializer(ModelSerializer):
         clients (list[int]): List of primary keys of associated clients.
     """
 
-    gym = PrimaryKeyRelatedField(queryset=Gym.objects.all())
-    clients = PrimaryKeyRelatedField(many=True, queryset=Client.objects.all())
+    gym = CachedPrimaryKeyRelatedField(queryset=Gym.objects.all())
+    clients = CachedPrimaryKeyRelatedField(many=True, queryset=Client.objects.all())
 
     class Meta:
         """Meta options for SubscriptionSerializer.
@@ -115,7 +145,7 @@ class SubscriptionSerializer(ModelSerializer):
 
         model = Subscription
         fields = ALL
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'created_datetime', 'modified_datetime']
 
 
 class CoachSerializer(ModelSerializer):
@@ -136,7 +166,7 @@ class CoachSerializer(ModelSerializer):
         image_path (str): Path to the coach's image.
     """
 
-    gyms = PrimaryKeyRelatedField(many=True, queryset=Gym.objects.all())
+    gyms = CachedPrimaryKeyRelatedField(many=True, queryset=Gym.objects.all())
 
     class Meta:
         """Meta options for CoachSerializer.
@@ -168,7 +198,7 @@ class CertificateSerializer(ModelSerializer):
         description (str): Description of the certificate.
     """
 
-    coach = PrimaryKeyRelatedField(queryset=Coach.objects.all())
+    coach = CachedPrimaryKeyRelatedField(queryset=Coach.objects.all())
 
     class Meta:
         """Meta options for CertificateSerializer.
@@ -212,4 +242,4 @@ class AddressSerializer(ModelSerializer):
 
         model = Address
         fields = ALL
-        read_only_fields = ['id']
+        read_only_fields = ['id', 'created_datetime', 'modified_datetime']
@@ -0,0 +1,60 @@
+"""This module contains the subscription purchase service."""
+
+from django.db import IntegrityError, transaction
+
+from .ledger import debit, lock_balance
+from .models import ClientSub, Subscription
+
+
+class PurchaseError(Exception):
+    """Base class for failed subscription purchases."""
+
+
+class IdempotencyConflict(PurchaseError):
+    """Raised when an idempotency key was already used for another purchase."""
+
+
+def purchase_subscription(
+    client_id, sub_id, idempotency_key: str | None = None,
+) -> tuple[ClientSub, bool]:
+    """
+    Buy a subscription for a client.
+
+    The `ClientSub` row is inserted first and the balance is then charged by a ledger
+    debit, both in one transaction. The unique constraints of `ClientSub` make concurrent
+    or retried purchases of the same subscription wait for each other and charge only
+    once, the debit never lets the balance go below zero.
+
+    Args:
+        client_id: Primary key of the buying client.
+        sub_id: Primary key of the subscription.
+        idempotency_key (str | None): Key identifying the purchase attempt across retries.
+
+    Raises:
+        Subscription.DoesNotExist: If the subscription does not exist.
+        InsufficientFunds: If the client can not afford the subscription.
+        IdempotencyConflict: If the key belongs to a different purchase.
+
+    Returns:
+        tuple[ClientSub, bool]: The owned subscription and whether it was bought just now.
+    """
+    price = Subscription.objects.filter(id=sub_id).values_list('price', flat=True).first()
+    if price is None:
+        raise Subscription.DoesNotExist(f'Subscription {sub_id} does not exist')
+    try:
+        with transaction.atomic():
+            lock_balance(client_id)
+            client_sub = ClientSub.objects.create(
+                client_id=client_id, sub_id=sub_id, idempotency_key=idempotency_key,
+            )
+            debit(client_id, price, client_sub=client_sub)
+    except IntegrityError:
+        owned = ClientSub.objects.filter(client_id=client_id, sub_id=sub_id).first()
+        if owned and idempotency_key in {None, owned.idempotency_key}:
+            return owned, False
+        if idempotency_key and ClientSub.objects.filter(idempotency_key=idempotency_key).exists():
+            raise IdempotencyConflict(f'Key {idempotency_key} was used for another purchase')
+        if owned:
+            return owned, False
+        raise
+    return client_sub, True
@@ -0,0 +1,259 @@
+"""This module contains signal receivers keeping caches, modification times and balances current."""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from rest_framework.authtoken.models import Token
+
+from .authentication import bump_auth_version
+from .models import (Address, BalanceEntry, Certificate, Client, ClientSub,
+                     Coach, Gym, GymCoach, Subscription, Tombstone)
+from .response_cache import bump_generation
+
+GYM_PAGE_CACHE_KEY = 'gym-page:{0}'
+
+# Sent with `instances` around bulk writes which bypass `post_save`: before an update with
+# the old state of the rows and after a create or an update with the new one.
+bulk_changed = Signal()
+
+
+def gym_page_key(gym_id) -> str:
+    """
+    Build the cache key of the shared part of a gym detail page.
+
+    Args:
+        gym_id: Primary key of the gym.
+
+    Returns:
+        str: The cache key.
+    """
+    return GYM_PAGE_CACHE_KEY.format(gym_id)
+
+
+def invalidate_gym_pages(gym_ids) -> None:
+    """
+    Drop the cached gym pages once the current transaction commits.
+
+    Args:
+        gym_ids: Primary keys of the gyms to invalidate.
+    """
+    keys = [gym_page_key(gym_id) for gym_id in set(gym_ids) if gym_id]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def touch(model_class, pks) -> None:
+    """
+    Bump the modified datetime of rows whose relations changed, once the transaction commits.
+
+    Args:
+        model_class (class): Model of the rows.
+        pks: Primary keys of the rows.
+    """
+    pks = {pk for pk in pks if pk}
+    if pks:
+        transaction.on_commit(lambda: model_class.objects.filter(pk__in=pks).update())
+
+
+def coach_gym_ids(coach_id) -> list:
+    """
+    Get primary keys of the gyms a coach works at.
+
+    Args:
+        coach_id: Primary key of the coach.
+
+    Returns:
+        list: Primary keys of the gyms.
+    """
+    return list(GymCoach.objects.filter(coach_id=coach_id).values_list('gym_id', flat=True))
+
+
+@receiver(pre_save, sender=Subscription)
+@receiver(pre_save, sender=Certificate)
+def remember_previous_owner(sender, instance, **kwargs):
+    """Remember the gym of a subscription or the coach of a certificate before it is moved."""
+    if instance._state.adding:
+        return
+    owner_field = 'gym_id' if sender is Subscription else 'coach_id'
+    instance._previous_owner_id = sender.objects.filter(
+        pk=instance.pk,
+    ).values_list(owner_field, flat=True).first()
+
+
+@receiver(post_save, sender=Gym)
+@receiver(post_delete, sender=Gym)
+def gym_changed(instance, **kwargs):
+    """Invalidate the page of a changed gym."""
+    invalidate_gym_pages([instance.pk])
+
+
+@receiver(post_save, sender=Address)
+@receiver(post_delete, sender=Address)
+def address_changed(instance, **kwargs):
+    """Invalidate pages of the gyms located at a changed address."""
+    invalidate_gym_pages(Gym.objects.filter(address_id=instance.pk).values_list('id', flat=True))
+
+
+@receiver(post_save, sender=GymCoach)
+@receiver(post_delete, sender=GymCoach)
+def gym_coach_changed(instance, **kwargs):
+    """Invalidate the page of a gym whose coaches changed."""
+    invalidate_gym_pages([instance.gym_id])
+
+
+@receiver(post_save, sender=Coach)
+@receiver(post_delete, sender=Coach)
+def coach_changed(instance, **kwargs):
+    """Invalidate pages of the gyms a changed coach works at."""
+    invalidate_gym_pages(coach_gym_ids(instance.pk))
+
+
+@receiver(post_save, sender=Certificate)
+@receiver(post_delete, sender=Certificate)
+def certificate_changed(instance, **kwargs):
+    """Invalidate pages of the gyms the owner of a changed certificate works at."""
+    gym_ids = coach_gym_ids(instance.coach_id)
+    previous_coach_id = getattr(instance, '_previous_owner_id', None)
+    if previous_coach_id and previous_coach_id != instance.coach_id:
+        gym_ids += coach_gym_ids(previous_coach_id)
+    invalidate_gym_pages(gym_ids)
+
+
+@receiver(post_save, sender=Subscription)
+@receiver(post_delete, sender=Subscription)
+def subscription_changed(instance, **kwargs):
+    """Invalidate the page of the gym selling a changed subscription."""
+    invalidate_gym_pages([instance.gym_id, getattr(instance, '_previous_owner_id', None)])
+
+
+@receiver(m2m_changed, sender=GymCoach)
+def gym_coaches_changed(instance, action, pk_set, **kwargs):
+    """Invalidate gym pages when coaches are attached through `Gym.coaches` or `Coach.gyms`."""
+    if action not in {'post_add', 'post_remove', 'pre_clear'}:
+        return
+    if isinstance(instance, Gym):
+        invalidate_gym_pages([instance.pk])
+    else:
+        invalidate_gym_pages(pk_set or coach_gym_ids(instance.pk))
+
+
+@receiver(post_save, sender=Client)
+def open_balance(instance, created, raw=False, **kwargs):
+    """Record the initial balance of a new client in the ledger."""
+    if created and not raw:
+        BalanceEntry.objects.create(
+            client=instance, amount=instance.net_worth, kind=BalanceEntry.OPENING,
+        )
+
+
+@receiver(post_save, sender=GymCoach)
+@receiver(post_delete, sender=GymCoach)
+def touch_gym_and_coach(instance, **kwargs):
+    """Mark a gym and a coach as modified when they get linked or unlinked."""
+    touch(Gym, [instance.gym_id])
+    touch(Coach, [instance.coach_id])
+
+
+@receiver(m2m_changed, sender=GymCoach)
+def touch_gyms_and_coaches(instance, action, pk_set, **kwargs):
+    """Mark gyms and coaches as modified when their links change through the m2m managers."""
+    if action not in {'post_add', 'post_remove', 'pre_clear'}:
+        return
+    if isinstance(instance, Gym):
+        gym_coaches = GymCoach.objects.filter(gym_id=instance.pk)
+        touch(Gym, [instance.pk])
+        touch(Coach, pk_set or gym_coaches.values_list('coach_id', flat=True))
+    else:
+        touch(Coach, [instance.pk])
+        touch(Gym, pk_set or coach_gym_ids(instance.pk))
+
+
+@receiver(post_save, sender=ClientSub)
+@receiver(post_delete, sender=ClientSub)
+def touch_subscription(instance, **kwargs):
+    """Mark a subscription as modified when its clients change."""
+    touch(Subscription, [instance.sub_id])
+
+
+@receiver(m2m_changed, sender=ClientSub)
+def touch_subscriptions(instance, action, pk_set, **kwargs):
+    """Mark subscriptions as modified when their clients change through the m2m managers."""
+    if action not in {'post_add', 'post_remove', 'pre_clear'}:
+        return
+    if isinstance(instance, Subscription):
+        touch(Subscription, [instance.pk])
+    else:
+        client_subs = ClientSub.objects.filter(client_id=instance.pk)
+        touch(Subscription, pk_set or client_subs.values_list('sub_id', flat=True))
+
+
+@receiver(post_delete, sender=Address)
+@receiver(post_delete, sender=Gym)
+@receiver(post_delete, sender=Coach)
+@receiver(post_delete, sender=Certificate)
+@receiver(post_delete, sender=Subscription)
+def log_deletion(sender, instance, **kwargs):
+    """Record a tombstone of a deleted row, so delta sync clients drop it as well."""
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+@receiver(bulk_changed)
+def bulk_rows_changed(sender, instances, **kwargs):
+    """Invalidate gym pages and touch parents of rows written in bulk."""
+    pks = [instance.pk for instance in instances]
+    if sender is Gym:
+        invalidate_gym_pages(pks)
+    elif sender is Address:
+        invalidate_gym_pages(Gym.objects.filter(address_id__in=pks).values_list('id', flat=True))
+    elif sender in {Coach, Certificate}:
+        coach_ids = pks if sender is Coach else [instance.coach_id for instance in instances]
+        gym_coaches = GymCoach.objects.filter(coach_id__in=coach_ids)
+        invalidate_gym_pages(gym_coaches.values_list('gym_id', flat=True))
+    elif sender is Subscription:
+        invalidate_gym_pages([instance.gym_id for instance in instances])
+    elif sender is GymCoach:
+        invalidate_gym_pages([instance.gym_id for instance in instances])
+        touch(Gym, [instance.gym_id for instance in instances])
+        touch(Coach, [instance.coach_id for instance in instances])
+    elif sender is ClientSub:
+        touch(Subscription, [instance.sub_id for instance in instances])
+
+
+def expire_responses(model_class) -> None:
+    """
+    Expire the cached REST responses built from a model once the current transaction commits.
+
+    Args:
+        model_class (class): The changed model.
+    """
+    if model_class._meta.app_label == Gym._meta.app_label:
+        transaction.on_commit(lambda: bump_generation(model_class))
+
+
+@receiver(post_save)
+@receiver(post_delete)
+@receiver(bulk_changed)
+def rows_changed(sender, **kwargs):
+    """Expire the cached responses built from rows saved, deleted or written in bulk."""
+    expire_responses(sender)
+
+
+@receiver(m2m_changed)
+def links_changed(sender, action, **kwargs):
+    """Expire the cached responses built from links changed through the m2m managers."""
+    if action in {'post_add', 'post_remove', 'post_clear'}:
+        expire_responses(sender)
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revoke_cached_tokens(sender, instance, update_fields=None, **kwargs):
+    """Drop cached tokens of a user whose token, flags or password changed."""
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    user_id = instance.pk if sender is User else instance.user_id
+    transaction.on_commit(lambda: bump_auth_version(user_id))
@@ -0,0 +1,334 @@
+"""
+Capture of slow queries with their plans.
+
+Every query taking `SLOW_QUERY_MS` milliseconds or more is kept with the types of its
+parameters, the view of the request that ran it and the frame of the project code that
+issued it. Parameter values may hold passwords or tokens, so they are never stored. Queries
+are grouped by fingerprint, their SQL with literals, placeholders and `IN` lists folded, so
+a query repeated with other parameters only bumps the count and times of its entry. A
+`SLOW_QUERY_EXPLAIN_SAMPLE` share of the slow reads of a fingerprint without a plan is run
+again with `EXPLAIN`, which plans the query without running it, so each fingerprint is
+explained at most once until its entry is evicted.
+
+Each entry has its own cache key and a small index key lists the fingerprints, at most
+`SLOW_QUERY_LOG_SIZE` of them, the least recently seen are dropped first. Processes updating
+the log at the same time may lose a count, which is fine for finding slow queries. The log
+is shared by the worker processes only through a shared `CACHE_BACKEND`, with the default
+local-memory backend each process keeps its own and the admin page shows the log of the
+process serving it. Admins read the log at `/admin/slow-queries/`. A `SLOW_QUERY_MS` of 0
+turns the capture off.
+"""
+
+import hashlib
+import random
+import re
+import threading
+import traceback
+from contextvars import ContextVar
+from pathlib import Path
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.transaction import TransactionManagementError
+from django.utils import timezone
+
+from .metrics import UNMATCHED, view_name
+
+SLOW_QUERY_CACHE_KEY = 'slow-queries'
+SLOW_QUERY_ENTRY_KEY = 'slow-query:{0}'
+SQL_LENGTH = 2000
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+FINGERPRINT_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(?)'),
+    (re.compile(r'\s+'), ' '),
+)
+SKIPPED_PATHS = ('site-packages', str(Path(__file__)))
+
+current_request = ContextVar('slow_query_request', default=None)
+_capturing = ContextVar('slow_query_capturing', default=False)
+_lock = threading.Lock()
+_install_lock = threading.Lock()
+_installed = False
+
+
+def fingerprint(sql: str) -> tuple:
+    """
+    Fold the variable parts of a query.
+
+    Args:
+        sql (str): The SQL.
+
+    Returns:
+        tuple: A short hash of the normalized SQL and the normalized SQL.
+    """
+    normalized = sql
+    for pattern, replacement in FINGERPRINT_PATTERNS:
+        normalized = pattern.sub(replacement, normalized)
+    normalized = normalized.strip()
+    return hashlib.sha256(normalized.encode()).hexdigest()[:16], normalized
+
+
+def entry_key(digest: str) -> str:
+    """
+    Build the cache key of the entry of a fingerprint.
+
+    Args:
+        digest (str): Hash of the fingerprint.
+
+    Returns:
+        str: The cache key.
+    """
+    return SLOW_QUERY_ENTRY_KEY.format(digest)
+
+
+def describe_params(params, many: bool) -> str:
+    """
+    Describe the parameters of a query by their types, leaving out their values.
+
+    Args:
+        params: The parameters.
+        many (bool): Whether they are the rows of an `executemany()`.
+
+    Returns:
+        str: The types of the parameters.
+    """
+    if many:
+        rows = params if isinstance(params, (list, tuple)) else []
+        first = describe_params(rows[0], many=False) if rows else ''
+        return f'{len(rows)} rows of ({first})'
+    if isinstance(params, dict):
+        return ', '.join(f'{name}: {type(value).__name__}' for name, value in params.items())
+    return ', '.join(type(value).__name__ for value in params or ())
+
+
+def calling_frame() -> str:
+    """
+    Find the innermost frame of the project code on the stack.
+
+    Returns:
+        str: `path:line in function` relative to the project, empty if there is none.
+    """
+    root = str(settings.BASE_DIR)
+    for frame, line in traceback.walk_stack(None):
+        path = frame.f_code.co_filename
+        if path.startswith(root) and not any(skipped in path for skipped in SKIPPED_PATHS):
+            return f'{Path(path).relative_to(root)}:{line} in {frame.f_code.co_name}'
+    return ''
+
+
+def explain(connection, sql: str, params) -> str | None:
+    """
+    Plan a query without running it.
+
+    The plan is read in a savepoint, so a failing `EXPLAIN` leaves the transaction of the
+    request usable.
+
+    Args:
+        connection (BaseDatabaseWrapper): The connection which ran the query.
+        sql (str): The SQL.
+        params: The parameters.
+
+    Returns:
+        str | None: The plan, None if it could not be read.
+    """
+    prefix = connection.ops.explain_query_prefix()
+    try:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(f'{prefix} {sql}', params)
+            rows = cursor.fetchall()
+    except (DatabaseError, TransactionManagementError):
+        return None
+    return '\n'.join(str(row[-1]) for row in rows)
+
+
+def record_slow_query(connection, sql: str, params, many: bool, elapsed: float) -> None:
+    """
+    Add a slow query to the log.
+
+    Args:
+        connection (BaseDatabaseWrapper): The connection which ran the query.
+        sql (str): The SQL.
+        params: The parameters.
+        many (bool): Whether it was an `executemany()`.
+        elapsed (float): Its duration in seconds.
+    """
+    digest, normalized = fingerprint(sql)
+    key = entry_key(digest)
+    known = cache.get(key)
+    plan = None
+    sample = getattr(settings, 'SLOW_QUERY_EXPLAIN_SAMPLE', 0)
+    if (known is None or known['plan'] is None) and not many and EXPLAINABLE.match(sql):
+        if random.random() < sample:  # noqa: S311
+            plan = explain(connection, sql, params)
+    request = current_request.get()
+    now = timezone.now()
+    milliseconds = elapsed * 1000
+    with _lock:
+        entry = cache.get(key) or {
+            'fingerprint': digest,
+            'normalized': normalized[:SQL_LENGTH],
+            'count': 0,
+            'total_ms': 0.0,
+            'max_ms': 0.0,
+            'first_seen': now,
+            'plan': None,
+        }
+        entry.update(
+            sql=sql[:SQL_LENGTH],
+            params=describe_params(params, many),
+            database=connection.alias,
+            view=view_name(request) if request is not None else UNMATCHED,
+            frame=calling_frame(),
+            count=entry['count'] + 1,
+            total_ms=entry['total_ms'] + milliseconds,
+            max_ms=max(entry['max_ms'], milliseconds),
+            last_seen=now,
+            plan=entry['plan'] or plan,
+        )
+        cache.set(key, entry, timeout=None)
+        index = [other for other in cache.get(SLOW_QUERY_CACHE_KEY, []) if other != digest]
+        index.append(digest)
+        evicted = len(index) - getattr(settings, 'SLOW_QUERY_LOG_SIZE', 100)
+        if evicted > 0:
+            cache.delete_many([entry_key(other) for other in index[:evicted]])
+            index = index[evicted:]
+        cache.set(SLOW_QUERY_CACHE_KEY, index, timeout=None)
+
+
+def capture_slow_query(execute, sql, params, many, context):
+    """
+    Execute a query and log it if it is slow.
+
+    Queries of the capture itself, the `EXPLAIN` and the cache, are not captured.
+
+    Args:
+        execute (Callable): The next execute wrapper.
+        sql (str): The SQL.
+        params: The parameters.
+        many (bool): Whether it is an `executemany()`.
+        context (dict): The connection and cursor.
+
+    Returns:
+        Any: The result of the query.
+    """
+    threshold = getattr(settings, 'SLOW_QUERY_MS', 0)
+    if not threshold or _capturing.get():
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed = perf_counter() - started
+    if elapsed * 1000 >= threshold:
+        token = _capturing.set(True)
+        try:
+            record_slow_query(context['connection'], sql, params, many, elapsed)
+        finally:
+            _capturing.reset(token)
+    return result
+
+
+def add_slow_query_capture(sender, connection, **kwargs):
+    """Capture the slow queries of a new connection, wrappers of a database alias are kept once."""
+    if capture_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(capture_slow_query)
+
+
+def install() -> None:
+    """
+    Capture the slow queries of every connection once per process.
+
+    Connections are opened per thread, the capture is added to the connections already
+    open in the calling thread and to every connection opened afterwards.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(add_slow_query_capture)
+        for connection in connections.all(initialized_only=True):
+            add_slow_query_capture(None, connection)
+        _installed = True
+
+
+def slow_queries() -> list:
+    """
+    Read the log.
+
+    Returns:
+        list: The entries, those taking the most time in total first.
+    """
+    keys = [entry_key(digest) for digest in cache.get(SLOW_QUERY_CACHE_KEY, [])]
+    entries = cache.get_many(keys).values()
+    return sorted(entries, key=lambda entry: entry['total_ms'], reverse=True)
+
+
+def clear_slow_queries() -> None:
+    """Empty the log."""
+    with _lock:
+        keys = [entry_key(digest) for digest in cache.get(SLOW_QUERY_CACHE_KEY, [])]
+        cache.delete_many([*keys, SLOW_QUERY_CACHE_KEY])
+
+
+class SlowQueryMiddleware:
+    """Capture the slow queries of the requests with their views."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """
+        Initialize the middleware.
+
+        Args:
+            get_response (Callable): The next handler.
+
+        Raises:
+            MiddlewareNotUsed: If `SLOW_QUERY_MS` is 0.
+        """
+        if not getattr(settings, 'SLOW_QUERY_MS', 0):
+            raise MiddlewareNotUsed
+        install()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """
+        Remember the request for the queries it runs.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        """
+        Asynchronous version of `__call__`.
+
+        Args:
+            request (HttpRequest): The current request.
+
+        Returns:
+            HttpResponse: The response.
+        """
+        token = current_request.set(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            current_request.reset(token)
@@ -0,0 +1,220 @@
+"""
+Delta sync of the `ModifiedMixin` models.
+
+A sync cursor holds the `(moment, id)` of the last row a client has seen in every stream:
+one per model ordered by `(modified_datetime, id)` and the tombstones of deleted rows
+ordered by `(deleted_datetime, id)`, so each stream is a range scan over its index. Rows
+stamped within the last `SYNC_SETTLE_TIME` are left for the next request, so a transaction
+committing shortly after it stamped its rows is not skipped.
+"""
+
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import _positive_int
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .fast_serializers import ValuesSerializer
+from .models import Tombstone
+from .pagination import InvalidCursor
+from .serializers import (AddressSerializer, CertificateSerializer,
+                          CoachSerializer, GymSerializer,
+                          SubscriptionSerializer)
+
+SYNC_PAGE_SIZE = 500
+MAX_SYNC_PAGE_SIZE = 5000
+SYNC_SETTLE_TIME = timedelta(seconds=getattr(settings, 'SYNC_SETTLE_SECONDS', 2))
+SINCE_QUERY_PARAM = 'since'
+LIMIT_QUERY_PARAM = 'limit'
+MODIFIED_FIELD = 'modified_datetime'
+DELETED_FIELD = 'deleted_datetime'
+DELETED_STREAM = 'deleted'
+SYNC_SERIALIZERS = {
+    'address': AddressSerializer,
+    'gym': GymSerializer,
+    'coach': CoachSerializer,
+    'certificate': CertificateSerializer,
+    'subscription': SubscriptionSerializer,
+}
+
+
+def stream_model(name: str):
+    """
+    Get the model a stream reads.
+
+    Args:
+        name (str): The stream name.
+
+    Returns:
+        class: The model.
+    """
+    if name == DELETED_STREAM:
+        return Tombstone
+    return SYNC_SERIALIZERS[name].Meta.model
+
+
+def encode_sync_cursor(positions: dict) -> str:
+    """
+    Build a sync cursor.
+
+    Args:
+        positions (dict): The `(moment, id)` of the last seen row per stream, the id may
+            be None to start right after the moment.
+
+    Returns:
+        str: An url-safe cursor string.
+    """
+    payload = {
+        name: [moment.isoformat(), None if pk is None else str(pk)]
+        for name, (moment, pk) in positions.items()
+    }
+    text = json.dumps(payload, separators=(',', ':'), sort_keys=True)
+    return urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+def decode_sync_cursor(cursor: str) -> dict:
+    """
+    Decode a cursor created by `encode_sync_cursor`.
+
+    Args:
+        cursor (str): The cursor string.
+
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+
+    Returns:
+        dict: The `(moment, id)` of the last seen row per stream.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(urlsafe_b64decode(padded.encode()))
+        positions = {}
+        for name, (moment, pk) in payload.items():
+            model_class = stream_model(name)
+            field = DELETED_FIELD if name == DELETED_STREAM else MODIFIED_FIELD
+            moment = model_class._meta.get_field(field).to_python(moment)
+            if moment is None:
+                raise InvalidCursor('Invalid cursor')
+            positions[name] = (moment, None if pk is None else model_class._meta.pk.to_python(pk))
+        return positions
+    except (
+        AttributeError, BinasciiError, KeyError, UnicodeDecodeError, TypeError, ValueError,
+        DjangoValidationError,
+    ) as error:
+        raise InvalidCursor('Invalid cursor') from error
+
+
+def read_stream(queryset, field: str, position, horizon, limit: int) -> tuple[list, tuple, bool]:
+    """
+    Read the rows of a stream after a position.
+
+    Args:
+        queryset (QuerySet): The `values()` queryset of the stream.
+        field (str): Name of the timestamp the stream is ordered by.
+        position (tuple | None): The `(moment, id)` of the last seen row.
+        horizon (datetime): Rows stamped later are left for the next request.
+        limit (int): Maximal number of rows.
+
+    Returns:
+        tuple[list, tuple, bool]: Rows, the new position and whether more rows are ready.
+    """
+    queryset = queryset.filter(**{f'{field}__lte': horizon})
+    if position is not None:
+        moment, pk = position
+        if pk is None:
+            queryset = queryset.filter(**{f'{field}__gt': moment})
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{field}__gt': moment}) | Q(**{field: moment, 'id__gt': pk}),
+                **{f'{field}__gte': moment},
+            )
+    rows = list(queryset.order_by(field, 'id')[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        position = (rows[-1][field], rows[-1]['id'])
+    return rows, position, more
+
+
+class SyncView(APIView):
+    """
+    Return rows changed and deleted since a sync cursor.
+
+    Without `since` the changes are every row and the deletions start now. Clients repeat
+    the request with the returned cursor while `has_more` is true and keep the last cursor
+    for the next sync.
+    """
+
+    def get_limit(self, request) -> int:
+        """
+        Get the maximal number of rows per stream.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            int: The limit.
+        """
+        try:
+            return _positive_int(
+                request.query_params[LIMIT_QUERY_PARAM], strict=True, cutoff=MAX_SYNC_PAGE_SIZE,
+            )
+        except (KeyError, ValueError):
+            return SYNC_PAGE_SIZE
+
+    def get(self, request):
+        """
+        Read every stream after the cursor.
+
+        Args:
+            request (Request): The current request.
+
+        Raises:
+            ValidationError: If the cursor is invalid.
+
+        Returns:
+            Response: Changed rows per model, deleted ids per model and the next cursor.
+        """
+        horizon = timezone.now() - SYNC_SETTLE_TIME
+        since = request.query_params.get(SINCE_QUERY_PARAM)
+        try:
+            positions = decode_sync_cursor(since) if since else {DELETED_STREAM: (horizon, None)}
+        except InvalidCursor as error:
+            raise ValidationError({SINCE_QUERY_PARAM: ['Invalid cursor.']}) from error
+        limit = self.get_limit(request)
+        has_more = False
+        changes = {}
+        for name, serializer_class in SYNC_SERIALIZERS.items():
+            fast = ValuesSerializer(serializer_class)
+            queryset = fast.values(serializer_class.Meta.model.objects.all(), MODIFIED_FIELD)
+            rows, position, more = read_stream(
+                queryset, MODIFIED_FIELD, positions.get(name), horizon, limit,
+            )
+            changes[name] = fast.serialize(rows)
+            has_more = has_more or more
+            if position is not None:
+                positions[name] = position
+        tombstones, positions[DELETED_STREAM], more = read_stream(
+            Tombstone.objects.values('id', 'model', 'object_id', DELETED_FIELD),
+            DELETED_FIELD,
+            positions.get(DELETED_STREAM, (horizon, None)),
+            horizon,
+            limit,
+        )
+        deleted = {name: [] for name in SYNC_SERIALIZERS}
+        for tombstone in tombstones:
+            deleted.setdefault(tombstone['model'], []).append(str(tombstone['object_id']))
+        return Response({
+            'changes': changes,
+            'deleted': deleted,
+            'cursor': encode_sync_cursor(positions),
+            'has_more': has_more or more,
+        })
@@ -1,31 +1,55 @@
 """Module for routing."""
 
+from django.conf import settings
 from django.contrib.auth import views as auth_views
 from django.urls import include, path
 from rest_framework import routers
+from rest_framework.authtoken.views import obtain_auth_token
 
+from . import async_views, views
+from .export import ExportView
+from .sync import SyncView
 from .views import *
 
-router = routers.DefaultRouter()
-router.register(r'gym', GymViewSet)
-router.register(r'coach', CoachViewSet)
-router.register(r'certificate', CertificateViewSet)
-router.register(r'subscription', SubscriptionViewSet)
-router.register(r'address', AddressViewSet)
-# router.register(r'Client', ClientViewSet)
-
-urlpatterns = [
-    path('', main_page, name='homepage'),
-    path('accounts/', include('django.contrib.auth.urls')),
-    path('accounts/profile/', profile, name='profile'),
-    path('register/', register, name='register'),
-    path('rest/', include(router.urls)),
-    path('gyms/', gyms_page),
-    path('coaches/', coaches_page),
-    path('coaches/<uuid:pk>/', coach_detail_page, name='coach'),
-    path('gyms/<uuid:pk>/', gym_detail_page, name='gym'),
-    path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
-    path('login/', auth_views.LoginView.as_view(), name='login'),
-    path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
-    path('subscribe/', subscribe, name='subscribe')
-]
\ No newline at end of file
+
+def build_urlpatterns(pages) -> list:
+    """
+    Route the URLs of the app.
+
+    Args:
+        pages (module): Module with the read pages and viewsets, `views` or `async_views`.
+
+    Returns:
+        list: The URL patterns.
+    """
+    router = routers.DefaultRouter()
+    router.register(r'gym', pages.GymViewSet)
+    router.register(r'coach', pages.CoachViewSet)
+    router.register(r'certificate', pages.CertificateViewSet)
+    router.register(r'subscription', pages.SubscriptionViewSet)
+    router.register(r'address', pages.AddressViewSet)
+    # router.register(r'Client', ClientViewSet)
+
+    return [
+        path('', main_page, name='homepage'),
+        path('accounts/', include('django.contrib.auth.urls')),
+        path('accounts/profile/', profile, name='profile'),
+        path('register/', register, name='register'),
+        path('rest/export/<slug:name>/', ExportView.as_view(), name='export'),
+        path('rest/sync/', SyncView.as_view(), name='sync'),
+        path('rest/db-pool/', PoolStatsView.as_view(), name='db-pool'),
+        path('metrics/', MetricsView.as_view(), name='metrics'),
+        path('rest/', include(router.urls)),
+        path('gyms/', pages.gyms_page, name='gyms'),
+        path('coaches/', pages.coaches_page, name='coaches'),
+        path('coaches/<uuid:pk>/', pages.coach_detail_page, name='coach'),
+        path('gyms/<uuid:pk>/', pages.gym_detail_page, name='gym'),
+        path('api-token-auth/', obtain_auth_token, name='api-token-auth'),
+        path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
+        path('login/', auth_views.LoginView.as_view(), name='login'),
+        path('logout/', auth_views.LogoutView.as_view(next_page='login'), name='logout'),
+        path('subscribe/', subscribe, name='subscribe')
+    ]
+
+
+urlpatterns = build_urlpatterns(async_views if settings.ASYNC_VIEWS else views)
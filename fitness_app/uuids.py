@@ -0,0 +1,88 @@
+"""
+Primary key generation for `UUIDMixin` models.
+
+Random version 4 keys land at a random position of the primary key B-tree, so every insert
+touches a different leaf page. Version 7 keys (RFC 9562) start with the Unix time in
+milliseconds: new rows are appended to the right edge of the index like a sequence, while
+the keys stay unguessable and fit the same `uuid` column. `PRIMARY_KEY_UUID_VERSION`
+selects the version for new rows, existing keys of either version can be mixed freely.
+"""
+
+import os
+import threading
+import time
+from uuid import UUID, uuid4
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+UUID7_VERSION = 7
+RAND_A_BITS = 12
+RAND_B_BITS = 62
+TIMESTAMP_BITS = 48
+RAND_A_MASK = (1 << RAND_A_BITS) - 1
+RFC_4122_VARIANT = 0b10
+
+
+class UUID7Generator:
+    """
+    Callable generating version 7 UUIDs, monotonic within a process.
+
+    Keys created in the same millisecond use the 12 `rand_a` bits as a counter starting at a
+    random value (method 1 of RFC 9562 section 6.2), when it overflows the timestamp is
+    moved one millisecond ahead.
+    """
+
+    def __init__(self):
+        """Initialize the generator state."""
+        self.lock = threading.Lock()
+        self.last_ms = 0
+        self.counter = 0
+
+    def __call__(self) -> UUID:
+        """
+        Generate the next key.
+
+        Returns:
+            UUID: A version 7 UUID greater than the previous one.
+        """
+        rand_b = int.from_bytes(os.urandom(8), 'big') >> (64 - RAND_B_BITS)
+        with self.lock:
+            now_ms = time.time_ns() // 1_000_000
+            if now_ms > self.last_ms:
+                self.last_ms = now_ms
+                self.counter = int.from_bytes(os.urandom(2), 'big') & (RAND_A_MASK >> 1)
+            elif self.counter < RAND_A_MASK:
+                self.counter += 1
+            else:
+                self.last_ms += 1
+                self.counter = 0
+            timestamp, counter = self.last_ms, self.counter
+        value = (timestamp & ((1 << TIMESTAMP_BITS) - 1)) << 80
+        value |= UUID7_VERSION << 76 | counter << 64
+        value |= RFC_4122_VARIANT << 62 | rand_b
+        return UUID(int=value)
+
+
+uuid7 = UUID7Generator()
+UUID_FACTORIES = {4: uuid4, UUID7_VERSION: uuid7}
+
+
+def generate_id() -> UUID:
+    """
+    Generate a primary key of the version selected by `PRIMARY_KEY_UUID_VERSION`.
+
+    Raises:
+        ImproperlyConfigured: If the version is neither 4 nor 7.
+
+    Returns:
+        UUID: The new key.
+    """
+    version = getattr(settings, 'PRIMARY_KEY_UUID_VERSION', 4)
+    try:
+        factory = UUID_FACTORIES[version]
+    except KeyError as error:
+        raise ImproperlyConfigured(
+            f'PRIMARY_KEY_UUID_VERSION must be one of {sorted(UUID_FACTORIES)}.',
+        ) from error
+    return factory()
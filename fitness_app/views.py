@@ -5,16 +5,51 @@ This module contains views for the fitness application, including user registrat
 subscription management, gym and coach detail pages, and other utility functions.
 """
 
+from uuid import uuid4
+
 from django.contrib.auth import decorators
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
 from django.core.handlers.wsgi import WSGIRequest
-from django.shortcuts import HttpResponse, redirect, render
+from django.db.models import Count, F, Max, OuterRef, Prefetch
+from django.http import HttpResponseBadRequest
+from django.shortcuts import HttpResponse, get_object_or_404, redirect, render
+from django.template.loader import render_to_string
+from django.views.decorators.http import condition
 from rest_framework import permissions, viewsets
-
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .backends.postgresql.base import pool_stats
+from .bulk import BulkMixin
+from .conditional import (ConditionalGetMixin, latest, make_etag,
+                          subquery_aggregate)
+from .fast_serializers import SparseFieldsMixin
 from .forms import *
 from .models import *
+from .ledger import InsufficientFunds, credit, get_balance
+from .metrics import CONTENT_TYPE, record_cache, render_metrics
+from .pagination import InvalidCursor, keyset_page
+from .planner import plan_queryset
+from .response_cache import ResponseCacheMixin
 from .serializers import (AddressSerializer, CertificateSerializer,
                           CoachSerializer, GymSerializer,
                           SubscriptionSerializer)
+from .services import PurchaseError, purchase_subscription
+from .signals import gym_page_key
+
+GYMS_PAGE_SIZE = 30
+GYM_LIST_FIELDS = (
+    'id',
+    'gym_name',
+    'created_datetime',
+    'address__city_name',
+    'address__street_name',
+    'address__house_number',
+)
+GYM_PAGE_CACHE = 'gym_page'
+GYM_PAGE_CACHE_TIMEOUT = 60 * 60
+TIMESTAMP_ORDERING = ('created_datetime', 'modified_datetime')
 
 
 class MyPermission(permissions.BasePermission):
@@ -45,30 +80,56 @@ class MyPermission(permissions.BasePermission):
         return False
 
 
-def create_viewset(model_class, serializer):
+def create_viewset(model_class, serializer, filters=None, ordering=()):
     """
     Create and return a ModelViewSet for the given model class and serializer.
 
     Args:
         model_class (class): The Django model class.
         serializer (class): The corresponding serializer class.
+        filters (dict | None): Lookups by query parameter, each backed by an index.
+        ordering (tuple): Indexed fields to order by besides the timestamps.
 
     Returns:
         viewsets.ModelViewSet: A configured ModelViewSet instance.
     """
-    class ViewSet(viewsets.ModelViewSet):
-        queryset = model_class.objects.all()
+    class ViewSet(
+        BulkMixin, ResponseCacheMixin, ConditionalGetMixin, SparseFieldsMixin,
+        viewsets.ModelViewSet,
+    ):
+        queryset = plan_queryset(model_class.objects.all(), serializer)
         serializer_class = serializer
-        # authentication_classes = [authentication.TokenAuthentication]
         permission_classes = [MyPermission]
+        filter_fields = filters or {}
+        ordering_fields = (*TIMESTAMP_ORDERING, *ordering)
     return ViewSet
 
 
-CoachViewSet = create_viewset(Coach, CoachSerializer)
-GymViewSet = create_viewset(Gym, GymSerializer)
-AddressViewSet = create_viewset(Address, AddressSerializer)
-CertificateViewSet = create_viewset(Certificate, CertificateSerializer)
-SubscriptionViewSet = create_viewset(Subscription, SubscriptionSerializer)
+CoachViewSet = create_viewset(
+    Coach, CoachSerializer, filters={'spec': 'spec'}, ordering=('last_name',),
+)
+GymViewSet = create_viewset(
+    Gym,
+    GymSerializer,
+    filters={'address': 'address', 'city': 'address__city_name'},
+    ordering=('gym_name',),
+)
+AddressViewSet = create_viewset(
+    Address, AddressSerializer, filters={'city': 'city_name'}, ordering=('city_name',),
+)
+CertificateViewSet = create_viewset(Certificate, CertificateSerializer, filters={'coach': 'coach'})
+SubscriptionViewSet = create_viewset(
+    Subscription,
+    SubscriptionSerializer,
+    filters={
+        'gym': 'gym',
+        'price_min': 'price__gte',
+        'price_max': 'price__lte',
+        'expire_from': 'expire_date__gte',
+        'expire_to': 'expire_date__lte',
+    },
+    ordering=('price', 'expire_date'),
+)
 
 
 def register(request: WSGIRequest):
@@ -101,7 +162,10 @@ def register(request: WSGIRequest):
 
 def subscribe(request: WSGIRequest):
     """
-    Process subscription creation or update.
+    Process subscription purchase.
+
+    The purchase attempt is identified by the `idempotency_key` form field or the
+    `Idempotency-Key` header, so a retried request never charges the client twice.
 
     Args:
         request (WSGIRequest): The current HTTP request object.
@@ -109,15 +173,18 @@ def subscribe(request: WSGIRequest):
     Returns:
         HttpResponse: Redirect to profile or display error message.
     """
-    if request.method == 'POST':
-        if request.user.is_authenticated:
-            id_fld = request.GET.get('id')
-            sub = Subscription.objects.get(id=id_fld)
-            client = Client.objects.get(user=request.user)
-            if client.net_worth >= sub.price:
-                client.net_worth -= sub.price
-                client.subs.add(sub)
-                client.save()
+    if request.method == 'POST' and request.user.is_authenticated:
+        client = Client.objects.filter(user=request.user).only('id').first()
+        idempotency_key = (
+            request.POST.get('idempotency_key') or request.headers.get('Idempotency-Key')
+        )
+        if client:
+            try:
+                purchase_subscription(client.id, request.GET.get('id'), idempotency_key)
+            except (PurchaseError, InsufficientFunds):
+                return redirect('profile')
+            except (Subscription.DoesNotExist, ValidationError):
+                return HttpResponse('Something went wrong...')
             return redirect('profile')
     return HttpResponse('Something went wrong...')
 
@@ -157,13 +224,15 @@ def profile(request: WSGIRequest):
             if request.method == 'POST':
                 form = AddFundsForm(request.POST)
                 if form.is_valid():
-                    money = form.cleaned_data.get('money')
-                    client.net_worth += money
-                    client.save()
+                    try:
+                        credit(client.id, form.cleaned_data.get('money'))
+                    except ValidationError as error:
+                        form.add_error('money', error)
             else:
                 form = AddFundsForm()
+            client.net_worth = get_balance(client.id, client.net_worth)
 
-            client_subs = Subscription.objects.filter(client=client)
+            client_subs = Subscription.objects.filter(client=client).select_related('gym')
             return render(
                 request,
                 'profile.html',
@@ -181,13 +250,25 @@ def gyms_page(request: WSGIRequest):
     """
     Display gym listing page.
 
+    Gyms are paginated by `(created_datetime, id)` keyset, the `cursor` GET parameter
+    points right after the last gym of the previous page.
+
     Args:
         request (WSGIRequest): The current HTTP request object.
 
     Returns:
         HttpResponse: Render the gyms template.
     """
-    return render(request, 'gyms.html', {'gyms': Gym.objects.all()})
+    gyms = Gym.objects.select_related('address').only(*GYM_LIST_FIELDS)
+    try:
+        page, next_cursor = keyset_page(gyms, request.GET.get('cursor'), GYMS_PAGE_SIZE)
+    except InvalidCursor:
+        return HttpResponseBadRequest('Invalid cursor')
+    return render(
+        request,
+        'gyms.html',
+        {'gyms': page, 'next_cursor': next_cursor, 'is_first_page': 'cursor' not in request.GET},
+    )
 
 
 def coaches_page(request: WSGIRequest):
@@ -203,6 +284,184 @@ def coaches_page(request: WSGIRequest):
     return render(request, 'coaches.html', {'coaches': Coach.objects.all})
 
 
+def gym_page_queryset():
+    """
+    Build the query of a gym with everything its detail page shows.
+
+    The gym and its address are joined, coaches with their certificates and subscriptions
+    are prefetched, so the page is loaded with four queries.
+
+    Returns:
+        QuerySet: The gyms.
+    """
+    return Gym.objects.select_related('address').prefetch_related(
+        Prefetch(
+            'coaches',
+            queryset=Coach.objects.prefetch_related(
+                Prefetch('certificate_set', to_attr='certificates'),
+            ),
+        ),
+        Prefetch('subscription_set', queryset=Subscription.objects.order_by('price')),
+    )
+
+
+def render_gym_page_shared(gym: Gym) -> dict:
+    """
+    Render the part of a gym detail page that is the same for every client.
+
+    Args:
+        gym (Gym): The gym loaded by `gym_page_queryset`.
+
+    Returns:
+        dict: Gym name, rendered gym information and subscriptions.
+    """
+    content = render_to_string(
+        'gym_info.html',
+        {'gym': gym, 'address': gym.address, 'coaches': gym.coaches.all()},
+    )
+    return {
+        'gym_name': gym.gym_name,
+        'content': content,
+        'subs': [
+            {'id': sub.id, 'price': sub.price, 'description': sub.description}
+            for sub in gym.subscription_set.all()
+        ],
+    }
+
+
+def gym_page_shared(pk) -> dict:
+    """
+    Get the part of a gym detail page that is the same for every client.
+
+    It is rendered once and cached until the gym, its address, coaches, certificates or
+    subscriptions change.
+
+    Args:
+        pk: The primary key of the gym.
+
+    Returns:
+        dict: Gym name, rendered gym information and subscriptions.
+    """
+    key = gym_page_key(pk)
+    shared = cache.get(key)
+    record_cache(GYM_PAGE_CACHE, shared is not None)
+    if shared is not None:
+        return shared
+    shared = render_gym_page_shared(get_object_or_404(gym_page_queryset(), id=pk))
+    cache.set(key, shared, GYM_PAGE_CACHE_TIMEOUT)
+    return shared
+
+
+def gym_page_modified(pk):
+    """
+    Build the aggregate query of what the gym detail page depends on.
+
+    The modification times of the gym, its address, coaches, certificates and
+    subscriptions and the numbers of certificates and subscriptions are read at once.
+
+    Args:
+        pk: The primary key of the gym.
+
+    Returns:
+        QuerySet: The `values_list()` queryset.
+    """
+    certificates = Certificate.objects.filter(coach__gyms=OuterRef('pk'))
+    subs = Subscription.objects.filter(gym=OuterRef('pk'))
+    return Gym.objects.filter(pk=pk).annotate(
+        address_modified=F('address__modified_datetime'),
+        coaches_modified=subquery_aggregate(
+            Coach.objects.filter(gyms=OuterRef('pk')), Max('modified_datetime'),
+        ),
+        certificates_modified=subquery_aggregate(certificates, Max('modified_datetime')),
+        certificates_total=subquery_aggregate(certificates, Count('pk')),
+        subs_modified=subquery_aggregate(subs, Max('modified_datetime')),
+        subs_total=subquery_aggregate(subs, Count('pk')),
+    ).values_list(
+        'modified_datetime', 'address_modified', 'coaches_modified', 'certificates_modified',
+        'certificates_total', 'subs_modified', 'subs_total',
+    )
+
+
+def build_gym_page_state(client: Client, client_sub_ids: set, modified: tuple | None) -> dict:
+    """
+    Combine what the gym detail page of a client depends on.
+
+    Args:
+        client (Client): The client.
+        client_sub_ids (set): Ids of subscriptions of the gym the client owns.
+        modified (tuple | None): Row of `gym_page_modified`, None if the gym does not exist.
+
+    Returns:
+        dict: Client, owned subscription ids and validators.
+    """
+    return {
+        'client': client,
+        'client_sub_ids': client_sub_ids,
+        'etag': modified and make_etag(*modified, client.id, *sorted(map(str, client_sub_ids))),
+        'last_modified': modified and latest(*modified[:4], modified[5]),
+    }
+
+
+def gym_page_state(request: WSGIRequest, pk) -> dict | None:
+    """
+    Collect what the gym detail page of the current client depends on.
+
+    The result is kept on the request, so the conditional GET validators and the view
+    share it.
+
+    Args:
+        request (WSGIRequest): The current HTTP request object.
+        pk: The primary key of the gym.
+
+    Returns:
+        dict | None: Client, owned subscription ids and validators, None for anonymous users.
+    """
+    if hasattr(request, 'gym_page_state'):
+        return request.gym_page_state
+    request.gym_page_state = None
+    if not request.user.is_authenticated:
+        return None
+    client = Client.objects.filter(user=request.user).only('id').first()
+    if not client:
+        return None
+    client_sub_ids = set(
+        ClientSub.objects.filter(client=client, sub__gym_id=pk).values_list('sub_id', flat=True),
+    )
+    request.gym_page_state = build_gym_page_state(
+        client, client_sub_ids, gym_page_modified(pk).first(),
+    )
+    return request.gym_page_state
+
+
+def gym_page_etag(request: WSGIRequest, pk) -> str | None:
+    """
+    Get the ETag of a gym detail page.
+
+    Args:
+        request (WSGIRequest): The current HTTP request object.
+        pk: The primary key of the gym.
+
+    Returns:
+        str | None: The ETag, if the page can be shown.
+    """
+    return (gym_page_state(request, pk) or {}).get('etag')
+
+
+def gym_page_last_modified(request: WSGIRequest, pk):
+    """
+    Get the last modification time of a gym detail page.
+
+    Args:
+        request (WSGIRequest): The current HTTP request object.
+        pk: The primary key of the gym.
+
+    Returns:
+        datetime | None: The last modification time, if the page can be shown.
+    """
+    return (gym_page_state(request, pk) or {}).get('last_modified')
+
+
+@condition(etag_func=gym_page_etag, last_modified_func=gym_page_last_modified)
 def gym_detail_page(request: WSGIRequest, pk):
     """
     Display detailed information about a specific gym.
@@ -214,32 +473,85 @@ def gym_detail_page(request: WSGIRequest, pk):
     Returns:
         HttpResponse: Render the gym detail template.
     """
-    if request.user.is_authenticated:
-        client = Client.objects.filter(user=request.user)
-        if client.exists():
-            client = client.first()
-        else:
-            return redirect('/login')
-    else:
+    state = gym_page_state(request, pk)
+    if state is None:
         return redirect('/login')
-    gym = Gym.objects.get(id=pk)
-    coaches = list(gym.coaches.all())
-    subs = Subscription.objects.filter(gym=gym).all()
-    address = gym.address
     return render(
         request,
         'gym.html',
         {
-            'gym': gym,
-            'coaches': coaches,
-            'subs': subs,
-            'address': address,
-            'client': client,
-            'client_subs': list(client.subs.all()),
+            'shared': gym_page_shared(pk),
+            'client': state['client'],
+            'client_sub_ids': state['client_sub_ids'],
+            'purchase_key': uuid4().hex,
         },
     )
 
 
+def coach_page_modified(pk):
+    """
+    Build the aggregate query of what the coach detail page depends on.
+
+    Args:
+        pk: The primary key of the coach.
+
+    Returns:
+        QuerySet: Modification times of the coach and its certificates and their number.
+    """
+    certificates = Certificate.objects.filter(coach=OuterRef('pk'))
+    return Coach.objects.filter(pk=pk).annotate(
+        certificates_modified=subquery_aggregate(certificates, Max('modified_datetime')),
+        certificates_total=subquery_aggregate(certificates, Count('pk')),
+    ).values_list('modified_datetime', 'certificates_modified', 'certificates_total')
+
+
+def coach_page_state(request: WSGIRequest, pk) -> tuple | None:
+    """
+    Read what the coach detail page depends on with one aggregate query.
+
+    Args:
+        request (WSGIRequest): The current HTTP request object.
+        pk: The primary key of the coach.
+
+    Returns:
+        tuple | None: Modification times of the coach and its certificates and their number.
+    """
+    if not hasattr(request, 'coach_page_state'):
+        request.coach_page_state = coach_page_modified(pk).first()
+    return request.coach_page_state
+
+
+def coach_page_etag(request: WSGIRequest, pk) -> str | None:
+    """
+    Get the ETag of a coach detail page.
+
+    Args:
+        request (WSGIRequest): The current HTTP request object.
+        pk: The primary key of the coach.
+
+    Returns:
+        str | None: The ETag, if the coach exists.
+    """
+    state = coach_page_state(request, pk)
+    return state and make_etag(*state)
+
+
+def coach_page_last_modified(request: WSGIRequest, pk):
+    """
+    Get the last modification time of a coach detail page.
+
+    Args:
+        request (WSGIRequest): The current HTTP request object.
+        pk: The primary key of the coach.
+
+    Returns:
+        datetime | None: The last modification time, if the coach exists.
+    """
+    state = coach_page_state(request, pk)
+    return state and latest(*state[:2])
+
+
+@condition(etag_func=coach_page_etag, last_modified_func=coach_page_last_modified)
 def coach_detail_page(request: WSGIRequest, pk):
     """
     Display detailed information about a specific coach.
@@ -251,7 +563,42 @@ def coach_detail_page(request: WSGIRequest, pk):
     Returns:
         HttpResponse: Render the coach detail template.
     """
-    coach = Coach.objects.get(id=pk)
+    coach = get_object_or_404(Coach, id=pk)
     certfs = Certificate.objects.filter(coach=coach).all()
-    print(certfs)
     return render(request, 'coach.html', {'coach': coach, 'certfs': certfs})
+
+
+class PoolStatsView(APIView):
+    """Report the database connection pool utilization of the worker process to admins."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """
+        Get the pool statistics.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            Response: Pool statistics per database alias, empty if pooling is off.
+        """
+        return Response(pool_stats())
+
+
+class MetricsView(APIView):
+    """Serve the request, cache and pool metrics of every worker process to admins."""
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request):
+        """
+        Render the metrics.
+
+        Args:
+            request (Request): The current request.
+
+        Returns:
+            HttpResponse: The Prometheus text exposition.
+        """
+        return HttpResponse(render_metrics(), content_type=CONTENT_TYPE)
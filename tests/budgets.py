@@ -0,0 +1,311 @@
+"""
+Query-count and wall-time budgets of every route, checked against a seeded dataset.
+
+`ROUTES` gives every named URL of `fitness_app.urls` and of the REST router one request
+and its budget. A route added without a budget fails `TestBudgets.test_every_route`, a
+change that makes a route run more queries or take longer than its budget fails with the
+SQL of the request listed. The query count is taken from the first request, with cold
+caches, the wall time is the best of `BUDGET_RUNS` requests. `BUDGET_TIME_FACTOR` scales
+every wall-time budget for slow machines.
+"""
+
+from contextlib import contextmanager
+from os import getenv
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver
+
+BUDGET_RUNS = 3
+BUDGET_TIME_FACTOR = float(getenv('BUDGET_TIME_FACTOR', '1'))
+ANONYMOUS = 'anonymous'
+CLIENT = 'client'
+ADMIN = 'admin'
+BULK_ITEMS = 20
+
+
+class Budget:
+    """Maximal queries and wall time of a request."""
+
+    def __init__(self, queries: int, milliseconds: float):
+        """
+        Describe a budget.
+
+        Args:
+            queries (int): Maximal number of queries.
+            milliseconds (float): Maximal wall time in milliseconds, before scaling.
+        """
+        self.queries = queries
+        self.milliseconds = milliseconds
+
+    @property
+    def seconds(self) -> float:
+        """
+        Get the wall-time budget scaled by `BUDGET_TIME_FACTOR`.
+
+        Returns:
+            float: The budget in seconds.
+        """
+        return self.milliseconds * BUDGET_TIME_FACTOR / 1000
+
+
+class Route:
+    """A request of a route and its budget."""
+
+    def __init__(self, path: str, budget: Budget, method='get', data=None, user=CLIENT,
+                 status=200):
+        """
+        Describe the request of a route.
+
+        Args:
+            path (str): Path and query string, formatted with the ids of the dataset objects.
+            budget (Budget): The budget.
+            method (str): The HTTP method.
+            data (Callable | None): Builder of the JSON payload from the ids.
+            user (str): Who sends the request, `anonymous`, `client` or `admin`.
+            status (int): Expected status code.
+        """
+        self.path = path
+        self.budget = budget
+        self.method = method
+        self.data = data
+        self.user = user
+        self.status = status
+
+
+def gyms_payload(ids: dict) -> list:
+    """
+    Build gyms created in bulk.
+
+    Args:
+        ids (dict): Ids of the dataset objects.
+
+    Returns:
+        list: The items.
+    """
+    return [
+        {'gym_name': f'Bulk {number}', 'address': ids['address'], 'coaches': [ids['coach']]}
+        for number in range(BULK_ITEMS)
+    ]
+
+
+def coaches_payload(ids: dict) -> list:
+    """
+    Build coaches created in bulk.
+
+    Args:
+        ids (dict): Ids of the dataset objects.
+
+    Returns:
+        list: The items.
+    """
+    return [
+        {'first_name': 'Bulk', 'last_name': str(number), 'spec': 'Yoga', 'gyms': [ids['gym']]}
+        for number in range(BULK_ITEMS)
+    ]
+
+
+def certificates_payload(ids: dict) -> list:
+    """
+    Build certificates created in bulk.
+
+    Args:
+        ids (dict): Ids of the dataset objects.
+
+    Returns:
+        list: The items.
+    """
+    return [
+        {'coach': ids['coach'], 'certf_name': f'Bulk {number}', 'description': ''}
+        for number in range(BULK_ITEMS)
+    ]
+
+
+def subscriptions_payload(ids: dict) -> list:
+    """
+    Build subscriptions created in bulk.
+
+    Args:
+        ids (dict): Ids of the dataset objects.
+
+    Returns:
+        list: The items.
+    """
+    return [
+        {'gym': ids['gym'], 'clients': [], 'price': 100 + number, 'expire_date': '2050-01-01'}
+        for number in range(BULK_ITEMS)
+    ]
+
+
+def addresses_payload(ids: dict) -> list:
+    """
+    Build addresses created in bulk.
+
+    Args:
+        ids (dict): Ids of the dataset objects.
+
+    Returns:
+        list: The items.
+    """
+    return [
+        {'city_name': 'Bulk', 'street_name': 'Street', 'house_number': number + 1}
+        for number in range(BULK_ITEMS)
+    ]
+
+
+def token_payload(ids: dict) -> dict:
+    """
+    Build the credentials of the admin.
+
+    Args:
+        ids (dict): Ids of the dataset objects.
+
+    Returns:
+        dict: The credentials.
+    """
+    return {'username': ids['admin_username'], 'password': ids['admin_password']}
+
+
+def viewset_routes(basename: str, payload, list_queries: int, detail_queries: int,
+                   bulk_queries: int) -> dict:
+    """
+    Describe the routes of a router viewset.
+
+    Args:
+        basename (str): The basename of the viewset, also the key of its object in the ids.
+        payload (Callable): Builder of the bulk create payload.
+        list_queries (int): Query budget of the list.
+        detail_queries (int): Query budget of the detail.
+        bulk_queries (int): Query budget of the bulk create.
+
+    Returns:
+        dict: Routes by URL name.
+    """
+    return {
+        f'{basename}-list': Route(f'/rest/{basename}/', Budget(list_queries, 100)),
+        f'{basename}-detail': Route(
+            f'/rest/{basename}/{{{basename}}}/', Budget(detail_queries, 100),
+        ),
+        f'{basename}-bulk': Route(
+            f'/rest/{basename}/bulk/', Budget(bulk_queries, 200),
+            method='post', data=payload, user=ADMIN, status=201,
+        ),
+    }
+
+
+ROUTES = {
+    'homepage': Route('/', Budget(2, 100)),
+    'profile': Route('/accounts/profile/', Budget(7, 150)),
+    'register': Route('/register/', Budget(0, 100), user=ANONYMOUS),
+    'export': Route('/rest/export/gym/', Budget(3, 100), user=ADMIN),
+    'sync': Route('/rest/sync/', Budget(8, 150)),
+    'db-pool': Route('/rest/db-pool/', Budget(2, 100), user=ADMIN),
+    'metrics': Route('/metrics/', Budget(2, 100), user=ADMIN),
+    'api-root': Route('/rest/', Budget(2, 100)),
+    **viewset_routes('gym', gyms_payload, 6, 5, 8),
+    **viewset_routes('coach', coaches_payload, 5, 5, 8),
+    **viewset_routes('certificate', certificates_payload, 4, 4, 7),
+    **viewset_routes('subscription', subscriptions_payload, 5, 5, 6),
+    **viewset_routes('address', addresses_payload, 5, 4, 6),
+    'gyms': Route('/gyms/', Budget(2, 100)),
+    'coaches': Route('/coaches/', Budget(1, 100)),
+    'gym': Route('/gyms/{gym}/', Budget(9, 150)),
+    'coach': Route('/coaches/{coach}/', Budget(3, 100)),
+    'api-token-auth': Route(
+        '/api-token-auth/', Budget(5, 100), method='post', data=token_payload, user=ANONYMOUS,
+    ),
+    'login': Route('/login/', Budget(0, 100), user=ANONYMOUS),
+    'logout': Route('/logout/', Budget(4, 100), method='post', status=302),
+    'subscribe': Route('/subscribe/?id={purchasable}', Budget(15, 150), method='post', status=302),
+}
+
+
+def route_names(patterns) -> set:
+    """
+    Collect the names of the routes of the app.
+
+    Routes included from other apps by module, such as `django.contrib.auth.urls`, are
+    skipped, included lists such as the router URLs are collected.
+
+    Args:
+        patterns (list): URL patterns.
+
+    Returns:
+        set: The names.
+    """
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if isinstance(pattern.urlconf_name, list):
+                names |= route_names(pattern.url_patterns)
+        else:
+            names.add(pattern.name)
+    return names
+
+
+def format_queries(queries: list) -> str:
+    """
+    List captured queries for a failure message.
+
+    Args:
+        queries (list): Queries captured by `CaptureQueriesContext`.
+
+    Returns:
+        str: One numbered line per query with its time.
+    """
+    return '\n'.join(
+        f'{number}. [{query["time"]}s] {query["sql"]}'
+        for number, query in enumerate(queries, start=1)
+    )
+
+
+class BudgetTestMixin:
+    """Assertions of query-count and wall-time budgets for test cases."""
+
+    def assertQueriesWithin(self, number: int, queries: list, label: str = ''):
+        """
+        Fail if more queries ran than allowed, listing them.
+
+        Args:
+            number (int): Maximal number of queries.
+            queries (list): Queries captured by `CaptureQueriesContext`.
+            label (str): What ran the queries, for the failure message.
+        """
+        if len(queries) > number:
+            self.fail(
+                f'{label or "Block"} ran {len(queries)} queries, the budget is {number}:\n'
+                f'{format_queries(queries)}',
+            )
+
+    @contextmanager
+    def assertMaxQueries(self, number: int, using: str = DEFAULT_DB_ALIAS, label: str = ''):
+        """
+        Fail if the block runs more queries than allowed, listing them.
+
+        Args:
+            number (int): Maximal number of queries.
+            using (str): The database alias.
+            label (str): What runs the queries, for the failure message.
+
+        Yields:
+            CaptureQueriesContext: The captured queries.
+        """
+        with CaptureQueriesContext(connections[using]) as queries:
+            yield queries
+        self.assertQueriesWithin(number, queries.captured_queries, label)
+
+    def assertWithinTime(self, seconds: float, elapsed: float, queries: list, label: str = ''):
+        """
+        Fail if a wall time is over budget, listing the queries of the run.
+
+        Args:
+            seconds (float): The budget in seconds.
+            elapsed (float): The measured wall time in seconds.
+            queries (list): Queries captured by `CaptureQueriesContext` during the run.
+            label (str): What was timed, for the failure message.
+        """
+        if elapsed > seconds:
+            self.fail(
+                f'{label or "Block"} took {elapsed * 1000:.1f} ms, the budget is '
+                f'{seconds * 1000:.1f} ms:\n{format_queries(queries)}',
+            )
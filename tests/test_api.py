@@ -1,5 +1,7 @@
 from django.contrib.auth.models import User
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.authtoken.models import Token
 from rest_framework.test import APIClient
@@ -140,4 +142,87 @@ AddressViewSetTest = create_viewset_test(
 SubscriptionViewSetTest = create_viewset_test(
     Subscription, '/rest/subscription/',
     {'price': 0, 'expire_date': date(2050, 1, 1), 'description': 'some_desc'}
-)
\ No newline at end of file
+)
+
+class PaginationTest(TestCase):
+    """Class for REST pagination tests."""
+
+    _url = '/rest/address/'
+    _amount = 5
+
+    def setUp(self):
+        """Set up the test environment."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user', password='user')
+        self.client.force_authenticate(user=self.user)
+        self.addresses = [
+            Address.objects.create(city_name='A', street_name='B', house_number=number)
+            for number in range(self._amount)
+        ]
+
+    def test_walk_pages(self):
+        """Test that following next links yields every row once."""
+        seen, url = [], f'{self._url}?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            body = loads(response.content)
+            self.assertLessEqual(len(body['results']), 2)
+            seen.extend(row['id'] for row in body['results'])
+            url = body['next']
+        self.assertEqual(sorted(seen), sorted(str(address.id) for address in self.addresses))
+        self.assertEqual(len(seen), self._amount)
+
+    def test_count(self):
+        """Test exact and estimated totals."""
+        body = loads(self.client.get(f'{self._url}?count=exact').content)
+        self.assertEqual((body['count'], body['count_is_estimate']), (self._amount, False))
+        body = loads(self.client.get(f'{self._url}?count=estimate').content)
+        self.assertTrue(body['count_is_estimate'])
+        self.assertIsInstance(body['count'], int)
+        self.assertNotIn('count', loads(self.client.get(self._url).content))
+
+    def test_invalid_cursor(self):
+        """Test that a broken cursor is rejected."""
+        response = self.client.get(f'{self._url}?cursor=broken')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class QueryPlanTest(TestCase):
+    """Class for testing that list queries do not depend on the page size."""
+
+    def setUp(self):
+        """Set up the test environment."""
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='user', password='user')
+        self.client.force_authenticate(user=self.user)
+        self.client_obj = Client.objects.create(user=self.user)
+        address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        coaches = [Coach.objects.create(first_name='A', last_name='B', spec='C') for _ in range(6)]
+        for number in range(6):
+            gym = Gym.objects.create(gym_name=f'gym {number}', address=address)
+            gym.coaches.set(coaches)
+            sub = Subscription.objects.create(price=number, expire_date=date(2050, 1, 1), gym=gym)
+            sub.clients.add(self.client_obj)
+
+    def count_queries(self, url: str) -> int:
+        """Request a list and count its queries.
+
+        Args:
+            url (str): The URL of the list.
+
+        Returns:
+            int: Number of executed queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        return len(queries)
+
+    def test_constant_queries(self):
+        """Test that many relations are prefetched for every endpoint."""
+        for url in ('/rest/gym/', '/rest/coach/', '/rest/subscription/'):
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.count_queries(f'{url}?page_size=1'),
+                    self.count_queries(f'{url}?page_size=5'),
+                )
@@ -0,0 +1,149 @@
+"""Module for asynchronous read view tests."""
+
+from datetime import date
+from json import loads
+from unittest import mock
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework import status
+
+from fitness_app import async_views
+from fitness_app.management.commands.bench_http import percentile, summarize
+from fitness_app.models import (Address, Certificate, Client, Coach, Gym,
+                                GymCoach, Subscription)
+from fitness_app.urls import build_urlpatterns
+
+urlpatterns = build_urlpatterns(async_views)
+
+
+@override_settings(ROOT_URLCONF='tests.test_async')
+class TestAsyncPages(TestCase):
+    """Class for asynchronous page tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        cache.clear()
+        self.user = User.objects.create_user(username='user', password='user')
+        Client.objects.create(user=self.user)
+        address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        self.gyms = [Gym.objects.create(gym_name=f'Gym {index}', address=address) for index in range(3)]
+        self.coach = Coach.objects.create(first_name='Ann', last_name='Lee', spec='yoga')
+        GymCoach.objects.create(gym=self.gyms[0], coach=self.coach)
+        Certificate.objects.create(coach=self.coach, certf_name='Stretching')
+        Subscription.objects.create(price=10, expire_date=date(2050, 1, 1), gym=self.gyms[0])
+
+    @mock.patch('fitness_app.views.GYMS_PAGE_SIZE', 2)
+    async def test_gyms_page(self):
+        """Test that the gym listing walks pages with the async ORM."""
+        response = await self.async_client.get('/gyms/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.context['gyms']), 2)
+        response = await self.async_client.get('/gyms/', {'cursor': response.context['next_cursor']})
+        self.assertEqual(len(response.context['gyms']), 1)
+        self.assertIsNone(response.context['next_cursor'])
+        response = await self.async_client.get('/gyms/', {'cursor': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_coaches_page(self):
+        """Test that the coach listing shows every coach."""
+        response = await self.async_client.get('/coaches/')
+        self.assertContains(response, 'Ann Lee')
+
+    async def test_gym_detail_page(self):
+        """Test the gym page for anonymous and logged in clients and conditional requests."""
+        url = f'/gyms/{self.gyms[0].id}/'
+        self.assertEqual((await self.async_client.get(url)).status_code, status.HTTP_302_FOUND)
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Stretching')
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = await self.async_client.get(f'/gyms/{uuid4()}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_coach_detail_page(self):
+        """Test the coach page and conditional requests."""
+        url = f'/coaches/{self.coach.id}/'
+        response = await self.async_client.get(url)
+        self.assertContains(response, 'Stretching')
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        response = await self.async_client.get(f'/coaches/{uuid4()}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(ROOT_URLCONF='tests.test_async')
+class TestAsyncRest(TestCase):
+    """Class for asynchronous REST read tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.user = User.objects.create_superuser(username='admin', password='admin')
+        address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        self.gym = Gym.objects.create(gym_name='Gym', address=address)
+        coach = Coach.objects.create(first_name='Ann', last_name='Lee', spec='yoga')
+        GymCoach.objects.create(gym=self.gym, coach=coach)
+        self.subs = [
+            Subscription.objects.create(price=price, expire_date=date(2050, 1, 1), gym=self.gym)
+            for price in (3, 1, 2)
+        ]
+
+    async def test_same_as_sync(self):
+        """Test that async list and retrieve answer like the sync viewsets."""
+        await self.async_client.aforce_login(self.user)
+        urls = (
+            '/rest/subscription/?ordering=price&page_size=2',
+            '/rest/gym/?fields=id,coaches',
+            f'/rest/gym/{self.gym.id}/',
+            '/rest/coach/?count=exact',
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = await self.async_client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                with override_settings(ROOT_URLCONF='fitness.urls'):
+                    expected = await self.async_client.get(url)
+                self.assertEqual(loads(response.content), loads(expected.content))
+
+    async def test_conditional_and_errors(self):
+        """Test 304 answers, missing objects and unauthenticated requests."""
+        url = f'/rest/subscription/{self.subs[0].id}/'
+        response = await self.async_client.get(url)
+        self.assertIn(response.status_code, {status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN})
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(url)
+        response = await self.async_client.get(url, headers={'If-None-Match': response['ETag']})
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        for missing in (f'/rest/subscription/{uuid4()}/', '/rest/subscription/broken/'):
+            response = await self.async_client.get(missing)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.async_client.get('/rest/subscription/?cursor=broken')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_sync_fallback(self):
+        """Test that writes and the browsable API go through the sync views."""
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.post(
+            '/rest/address/', {'city_name': 'C', 'street_name': 'D', 'house_number': 2},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = await self.async_client.get('/rest/address/?format=api')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestBenchmark(TestCase):
+    """Class for benchmark summary tests."""
+
+    def test_summary(self):
+        """Test requests per second, percentiles and errors."""
+        results = [(index / 1000, status.HTTP_200_OK) for index in range(1, 100)]
+        results.append((1, status.HTTP_500_INTERNAL_SERVER_ERROR))
+        summary = summarize('/gyms/', 'asgi', results, 2)
+        self.assertEqual(summary['rps'], 50)
+        self.assertEqual(summary['p50'], 50)
+        self.assertEqual(summary['p99'], 99)
+        self.assertEqual(summary['errors'], 1)
+        self.assertEqual(percentile([], 0.99), 0)
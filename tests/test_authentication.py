@@ -0,0 +1,90 @@
+"""Module for cached token authentication tests."""
+
+from base64 import b64encode
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.test import APIClient
+
+from fitness_app.authentication import (CachedTokenAuthentication,
+                                        clear_token_cache)
+
+TOKEN_CACHE_TTL = 60
+
+
+class TestCachedTokenAuthentication(TestCase):
+    """Class for cached token authentication tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        ttl_patcher = mock.patch('fitness_app.authentication.TOKEN_CACHE_TTL', TOKEN_CACHE_TTL)
+        ttl_patcher.start()
+        self.addCleanup(ttl_patcher.stop)
+        cache.clear()
+        clear_token_cache()
+        self.user = User.objects.create_user(username='user', password='user')
+        self.token = Token.objects.create(user=self.user)
+        self.authentication = CachedTokenAuthentication()
+
+    def authenticate(self) -> User:
+        """Authenticate the token of the user.
+
+        Returns:
+            User: The authenticated user.
+        """
+        return self.authentication.authenticate_credentials(self.token.key)[0]
+
+    def test_cached(self):
+        """Test that a repeated token is authenticated without queries."""
+        self.authenticate()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate(), self.user)
+
+    def test_flags_propagate(self):
+        """Test that a changed superuser flag is seen by the next request."""
+        self.assertFalse(self.authenticate().is_superuser)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_superuser = True
+            self.user.save()
+        self.assertTrue(self.authenticate().is_superuser)
+
+    def test_revocation(self):
+        """Test that a deleted token or a deactivated user is rejected at once."""
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.token = Token.objects.create(user=self.user)
+        self.authenticate()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+    @mock.patch('fitness_app.authentication.TOKEN_CACHE_TTL', 0)
+    def test_expiry(self):
+        """Test that expired entries are loaded again."""
+        self.authenticate()
+        with self.assertNumQueries(2):
+            self.authenticate()
+
+    def test_api(self):
+        """Test that the API takes tokens from the token endpoint and no longer basic auth."""
+        client = APIClient()
+        response = client.post('/api-token-auth/', {'username': 'user', 'password': 'user'})
+        self.assertEqual(response.data['token'], self.token.key)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        self.assertEqual(client.get('/rest/address/').status_code, status.HTTP_200_OK)
+        credentials = b64encode(b'user:user').decode()
+        client.credentials(HTTP_AUTHORIZATION=f'Basic {credentials}')
+        self.assertIn(
+            client.get('/rest/address/').status_code,
+            {status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN},
+        )
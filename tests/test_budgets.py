@@ -0,0 +1,121 @@
+"""Module for query-count and wall-time budget tests of every route."""
+
+from decimal import Decimal
+from time import perf_counter
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from fitness_app.ledger import credit, get_balance
+from fitness_app.models import (Address, Certificate, Client, Coach, Gym,
+                                Subscription)
+from fitness_app.seeding import scaled_counts, seed_dataset
+from fitness_app.urls import urlpatterns
+from tests.budgets import (ADMIN, BUDGET_RUNS, CLIENT, ROUTES,
+                           BudgetTestMixin, route_names)
+
+BUDGET_SCALE = 0.2
+FAST_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+
+def busiest(queryset, relation: str):
+    """
+    Get the primary key of the object with most related rows.
+
+    Args:
+        queryset (QuerySet): The objects.
+        relation (str): The counted relation.
+
+    Returns:
+        str: The primary key.
+    """
+    return str(queryset.annotate(total=Count(relation)).order_by('-total', 'id')[0].pk)
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class TestBudgets(BudgetTestMixin, TestCase):
+    """Class for the budgets of the routes."""
+
+    @classmethod
+    def setUpTestData(cls):
+        """Seed the dataset and pick the objects requested."""
+        seed_dataset(scaled_counts(BUDGET_SCALE), seed=0)
+        client = Client.objects.select_related('user').annotate(
+            total=Count('clientsub'),
+        ).order_by('-total', 'id')[0]
+        credit(client.id, Decimal(100000))
+        get_balance(client.id)
+        cls.users = {
+            CLIENT: client.user,
+            ADMIN: User.objects.create_superuser(username='budget-admin', password='admin'),
+        }
+        cls.ids = {
+            'gym': busiest(Gym.objects, 'subscription'),
+            'coach': busiest(Coach.objects, 'certificate'),
+            'certificate': str(Certificate.objects.order_by('id')[0].pk),
+            'subscription': busiest(Subscription.objects, 'clientsub'),
+            'address': busiest(Address.objects, 'gym'),
+            'purchasable': str(Subscription.objects.exclude(client=client).order_by('id')[0].pk),
+            'admin_username': 'budget-admin',
+            'admin_password': 'admin',
+        }
+
+    def login(self, user: str) -> APIClient:
+        """
+        Build a client logged in as a user.
+
+        Args:
+            user (str): `anonymous`, `client` or `admin`.
+
+        Returns:
+            APIClient: The client.
+        """
+        client = APIClient()
+        if user in self.users:
+            client.force_login(self.users[user])
+        return client
+
+    def run_route(self, name: str) -> tuple:
+        """
+        Send the request of a route in a transaction which is rolled back.
+
+        Args:
+            name (str): The URL name.
+
+        Returns:
+            tuple: The response, its queries and its wall time in seconds.
+        """
+        route = ROUTES[name]
+        client = self.login(route.user)
+        data = route.data(self.ids) if route.data else None
+        send = getattr(client, route.method)
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = perf_counter()
+                response = send(route.path.format(**self.ids), data, format='json')
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = perf_counter() - started
+            transaction.set_rollback(True)
+        return response, queries.captured_queries, elapsed
+
+    def test_every_route(self):
+        """Test that every route of the app has a budget."""
+        self.assertEqual(route_names(urlpatterns) - set(ROUTES), set())
+
+    def test_budgets(self):
+        """Test that every route stays within its query and wall-time budgets."""
+        for name, route in ROUTES.items():
+            with self.subTest(route=name):
+                cache.clear()
+                response, queries, _ = self.run_route(name)
+                self.assertEqual(response.status_code, route.status, name)
+                self.assertQueriesWithin(route.budget.queries, queries, label=name)
+                runs = [self.run_route(name) for _ in range(BUDGET_RUNS)]
+                _, fastest_queries, fastest = min(runs, key=lambda run: run[2])
+                self.assertWithinTime(route.budget.seconds, fastest, fastest_queries, label=name)
@@ -0,0 +1,163 @@
+"""Module for bulk REST endpoint tests."""
+
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app.models import (Address, Certificate, Coach, Gym, GymCoach,
+                                Subscription)
+from fitness_app.signals import gym_page_key
+
+LONG_AGO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+class TestBulk(TestCase):
+    """Class for bulk create, update and delete tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = APIClient()
+        self.superuser = User.objects.create_superuser(username='admin', password='admin')
+        self.client.force_authenticate(user=self.superuser)
+        self.address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        self.coaches = [
+            Coach.objects.create(first_name='A', last_name='B', spec='C') for _ in range(3)
+        ]
+
+    def gyms_payload(self, amount: int) -> list:
+        """Build gyms linked to every coach.
+
+        Args:
+            amount (int): Number of gyms.
+
+        Returns:
+            list: The payload.
+        """
+        coach_ids = [str(coach.id) for coach in self.coaches]
+        return [
+            {'gym_name': f'gym {index}', 'address': str(self.address.id), 'coaches': coach_ids}
+            for index in range(amount)
+        ]
+
+    def count_queries(self, payload: list) -> int:
+        """Create gyms in bulk and count the queries.
+
+        Args:
+            payload (list): The gyms to create.
+
+        Returns:
+            int: Number of executed queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/rest/gym/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return len(queries)
+
+    def test_create_with_links(self):
+        """Test that objects and their through rows are created."""
+        response = self.client.post('/rest/gym/bulk/', self.gyms_payload(4), format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Gym.objects.count(), 4)
+        self.assertEqual(GymCoach.objects.count(), 12)
+        self.assertEqual(
+            [result['id'] for result in response.data['results']],
+            [str(gym.id) for gym in Gym.objects.order_by('gym_name')],
+        )
+
+    def test_queries_do_not_grow(self):
+        """Test that the number of queries does not depend on the batch size."""
+        self.assertEqual(self.count_queries(self.gyms_payload(2)), self.count_queries(self.gyms_payload(20)))
+
+    def test_partial_failure(self):
+        """Test that invalid items are reported while valid ones are written."""
+        payload = [
+            {'city_name': 'C', 'street_name': 'D', 'house_number': 2},
+            {'city_name': 'C', 'street_name': 'D', 'house_number': -1},
+            {'city_name': 'C'},
+        ]
+        response = self.client.post('/rest/address/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        statuses = [result['status'] for result in response.data['results']]
+        self.assertEqual(statuses, [201, 400, 400])
+        self.assertIn('house_number', response.data['results'][1]['errors'])
+        self.assertEqual(Address.objects.count(), 2)
+
+    def test_timestamps_are_set_by_server(self):
+        """Test that sent timestamps are ignored, so a bulk-created row changes the list ETag."""
+        etag = self.client.get('/rest/address/')['ETag']
+        payload = [{
+            'city_name': 'C', 'street_name': 'D', 'house_number': 2,
+            'created_datetime': LONG_AGO.isoformat(), 'modified_datetime': LONG_AGO.isoformat(),
+        }]
+        response = self.client.post('/rest/address/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        created = Address.objects.get(house_number=2)
+        self.assertGreater(created.created_datetime, LONG_AGO)
+        self.assertGreater(created.modified_datetime, LONG_AGO)
+        self.assertNotEqual(self.client.get('/rest/address/')['ETag'], etag)
+
+    def test_atomic(self):
+        """Test that `atomic=true` writes nothing if any item is invalid."""
+        payload = self.gyms_payload(2)
+        payload[1]['coaches'] = [str(uuid4())]
+        response = self.client.post('/rest/gym/bulk/?atomic=true', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual([result['status'] for result in response.data['results']], [424, 400])
+        self.assertFalse(Gym.objects.exists())
+
+    def test_update(self):
+        """Test that objects and their links are replaced."""
+        self.client.post('/rest/gym/bulk/', self.gyms_payload(2), format='json')
+        gyms = list(Gym.objects.order_by('gym_name'))
+        payload = [
+            {
+                'id': str(gym.id),
+                'gym_name': f'renamed {gym.gym_name}',
+                'address': str(self.address.id),
+                'coaches': [str(self.coaches[0].id)],
+            }
+            for gym in gyms
+        ]
+        payload.append({'id': str(uuid4()), 'gym_name': 'missing'})
+        response = self.client.put('/rest/gym/bulk/', payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_207_MULTI_STATUS)
+        self.assertEqual(response.data['results'][2]['errors'], {'id': ['Not found.']})
+        self.assertEqual(Gym.objects.filter(gym_name__startswith='renamed').count(), 2)
+        self.assertEqual(set(GymCoach.objects.values_list('coach_id', flat=True)), {self.coaches[0].id})
+
+    def test_delete(self):
+        """Test that objects are deleted by id."""
+        response = self.client.delete(
+            '/rest/coach/bulk/', [str(coach.id) for coach in self.coaches[:2]], format='json',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(Coach.objects.all()), self.coaches[2:])
+
+    def test_invalidates_gym_pages(self):
+        """Test that bulk writes drop cached pages of affected gyms."""
+        gym = Gym.objects.create(gym_name='Gym', address=self.address)
+        GymCoach.objects.create(gym=gym, coach=self.coaches[0])
+        Subscription.objects.create(price=1, expire_date=date(2050, 1, 1), gym=gym)
+        cache.set(gym_page_key(gym.id), 'stale')
+        payload = [{'coach': str(self.coaches[0].id), 'certf_name': 'Cert'}]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/rest/certificate/bulk/', payload, format='json')
+        self.assertIsNone(cache.get(gym_page_key(gym.id)))
+        self.assertTrue(Certificate.objects.exists())
+
+    def test_permissions_and_payload(self):
+        """Test that only superusers may write and that a list is required."""
+        self.assertEqual(
+            self.client.post('/rest/address/bulk/', {}, format='json').status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.client.force_authenticate(user=User.objects.create_user(username='user', password='user'))
+        response = self.client.post('/rest/address/bulk/', [], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
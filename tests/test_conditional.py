@@ -0,0 +1,195 @@
+"""Module for conditional GET tests."""
+
+from datetime import date, datetime, timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.test import client as test_client
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app.conditional import list_rows, modified_state
+from fitness_app.models import (Address, Certificate, Client, Coach, Gym,
+                                GymCoach, Subscription)
+
+LONG_AGO = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+
+class TestModifiedDatetime(TestCase):
+    """Class for tests of the modification time bookkeeping."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        Address.objects.filter(pk=self.address.pk).update(modified_datetime=LONG_AGO)
+
+    def assert_touched(self):
+        """Assert that the address was modified after `LONG_AGO`."""
+        self.address.refresh_from_db()
+        self.assertGreater(self.address.modified_datetime, LONG_AGO)
+
+    def test_save(self):
+        """Test that saving bumps the modification time, even with `update_fields`."""
+        self.address.city_name = 'C'
+        self.address.save(update_fields=['city_name'])
+        self.assert_touched()
+
+    def test_update(self):
+        """Test that queryset updates bump the modification time."""
+        Address.objects.filter(pk=self.address.pk).update(city_name='C')
+        self.assert_touched()
+
+    def test_bulk_update(self):
+        """Test that bulk updates bump the modification time."""
+        self.address.city_name = 'C'
+        Address.objects.bulk_update([self.address], ['city_name'])
+        self.assert_touched()
+
+    def test_bulk_create(self):
+        """Test that bulk creates set the modification time of every object."""
+        address = Address(city_name='C', street_name='D', house_number=2, modified_datetime=LONG_AGO)
+        Address.objects.bulk_create([address])
+        self.assertGreater(Address.objects.get(pk=address.pk).modified_datetime, LONG_AGO)
+
+    def test_link_touches_parents(self):
+        """Test that linking a coach marks the gym and the coach as modified."""
+        gym = Gym.objects.create(gym_name='Gym', address=self.address)
+        coach = Coach.objects.create(first_name='A', last_name='B', spec='C')
+        Gym.objects.update(modified_datetime=LONG_AGO)
+        Coach.objects.update(modified_datetime=LONG_AGO)
+        with self.captureOnCommitCallbacks(execute=True):
+            GymCoach.objects.create(gym=gym, coach=coach)
+        gym.refresh_from_db()
+        coach.refresh_from_db()
+        self.assertGreater(gym.modified_datetime, LONG_AGO)
+        self.assertGreater(coach.modified_datetime, LONG_AGO)
+
+
+class TestConditionalApi(TestCase):
+    """Class for conditional REST requests."""
+
+    _url = '/rest/address/'
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='user', password='user'))
+        self.address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        self.detail_url = f'{self._url}{self.address.id}/'
+
+    def test_not_modified(self):
+        """Test that repeating a request with its ETag gives 304 without serializing."""
+        for url in (self._url, self.detail_url):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response.has_header('Last-Modified'))
+                with self.assertNumQueries(1):
+                    repeated = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(repeated.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(repeated['ETag'], response['ETag'])
+
+    def test_changes_invalidate(self):
+        """Test that updates, additions and deletions change the ETag of the list."""
+        etag = self.client.get(self._url)['ETag']
+        Address.objects.filter(pk=self.address.pk).update(modified_datetime=LONG_AGO)
+        self.assertNotEqual(self.client.get(self._url)['ETag'], etag)
+        etag = self.client.get(self._url)['ETag']
+        other = Address.objects.create(city_name='C', street_name='D', house_number=2)
+        self.assertNotEqual(self.client.get(self._url)['ETag'], etag)
+        Address.objects.filter(pk=other.pk).update(modified_datetime=LONG_AGO)
+        etag = self.client.get(self._url)['ETag']
+        other.delete()
+        self.assertNotEqual(self.client.get(self._url)['ETag'], etag)
+
+    def test_null_modified(self):
+        """Test that a row with no modification time does not hide the changes of the others."""
+        Address.objects.create(city_name='C', street_name='D', house_number=2)
+        Address.objects.exclude(pk=self.address.pk).update(modified_datetime=None)
+        etag = self.client.get(self._url)['ETag']
+        Address.objects.filter(pk=self.address.pk).update(city_name='E')
+        self.address.refresh_from_db()
+        self.assertEqual(modified_state(list_rows(Address.objects.all()))[0], self.address.modified_datetime)
+        self.assertNotEqual(self.client.get(self._url)['ETag'], etag)
+
+    def test_filtered_out(self):
+        """Test that a row leaving the filters of a list changes its ETag."""
+        url = f'{self._url}?city=A'
+        etag = self.client.get(url)['ETag']
+        Address.objects.filter(pk=self.address.pk).update(city_name='C')
+        response = self.client.get(url)
+        self.assertEqual(response.json()['results'], [])
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_pages_differ(self):
+        """Test that different query strings get different ETags."""
+        self.assertNotEqual(
+            self.client.get(self._url)['ETag'],
+            self.client.get(f'{self._url}?page_size=1')['ETag'],
+        )
+
+    def test_missing_object(self):
+        """Test that an unknown object is still 404."""
+        response = self.client.get(f'{self._url}missing/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TestConditionalPages(TestCase):
+    """Class for conditional html page requests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = test_client.Client()
+        self.user = User.objects.create_user(username='user', password='user')
+        self.client_obj = Client.objects.create(user=self.user, net_worth=100)
+        self.client.force_login(self.user)
+        self.gym = Gym.objects.create(
+            gym_name='Gym', address=Address.objects.create(city_name='A', street_name='B', house_number=1),
+        )
+        self.coach = Coach.objects.create(first_name='A', last_name='B', spec='C')
+        GymCoach.objects.create(gym=self.gym, coach=self.coach)
+        self.sub = Subscription.objects.create(price=10, expire_date=date(2050, 1, 1), gym=self.gym)
+        self.gym_url = f'/gyms/{self.gym.id}/'
+        self.coach_url = f'/coaches/{self.coach.id}/'
+
+    def assert_not_modified(self, url: str) -> str:
+        """Assert that a page is answered with 304 when its ETag is sent back.
+
+        Args:
+            url (str): The URL of the page.
+
+        Returns:
+            str: The ETag of the page.
+        """
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        return etag
+
+    def test_gym_page(self):
+        """Test that the gym page changes with its certificates and the owned subscriptions."""
+        etag = self.assert_not_modified(self.gym_url)
+        Certificate.objects.create(coach=self.coach, certf_name='Cert')
+        changed = self.client.get(self.gym_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        etag = changed['ETag']
+        self.sub.clients.add(self.client_obj)
+        self.assertEqual(self.client.get(self.gym_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_gym_page_per_client(self):
+        """Test that clients do not share the ETag of a gym page."""
+        etag = self.client.get(self.gym_url)['ETag']
+        other = User.objects.create_user(username='other', password='other')
+        Client.objects.create(user=other)
+        self.client.force_login(other)
+        self.assertNotEqual(self.client.get(self.gym_url)['ETag'], etag)
+
+    def test_coach_page(self):
+        """Test that the coach page changes with its certificates."""
+        etag = self.assert_not_modified(self.coach_url)
+        Certificate.objects.create(coach=self.coach, certf_name='Cert')
+        self.assertEqual(self.client.get(self.coach_url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_anonymous(self):
+        """Test that anonymous users are still redirected to the login page."""
+        self.client.logout()
+        self.assertEqual(self.client.get(self.gym_url).status_code, 302)
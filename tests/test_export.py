@@ -0,0 +1,103 @@
+"""Module for streaming export tests."""
+
+import csv
+import json
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.http import StreamingHttpResponse
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app.models import Address, Client, ClientSub, Gym, Subscription
+
+
+class TestExport(TestCase):
+    """Class for export endpoint and command tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_superuser(username='admin', password='admin'))
+        address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        self.gyms = [Gym.objects.create(gym_name=f'Gym {index}', address=address) for index in range(2)]
+        self.subs = [
+            Subscription.objects.create(price=index, expire_date=date(2050, 1, index + 1), gym=gym)
+            for index, gym in enumerate(self.gyms * 2)
+        ]
+        client = Client.objects.create(user=User.objects.create_user(username='user', password='user'))
+        ClientSub.objects.create(client=client, sub=self.subs[0])
+
+    def export(self, url: str) -> str:
+        """Request an export and collect its stream.
+
+        Args:
+            url (str): The URL of the export.
+
+        Returns:
+            str: The streamed content.
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(response, StreamingHttpResponse)
+        return b''.join(response.streaming_content).decode()
+
+    def test_ndjson(self):
+        """Test that every row is streamed as a JSON line."""
+        rows = [json.loads(line) for line in self.export('/rest/export/subscription/').splitlines()]
+        self.assertEqual(sorted(row['id'] for row in rows), sorted(str(sub.id) for sub in self.subs))
+        self.assertEqual(rows[0].keys() & {'gym_id', 'price', 'expire_date'}, {'gym_id', 'price', 'expire_date'})
+
+    def test_csv_and_joined_columns(self):
+        """Test that CSV has a header and joined columns."""
+        rows = list(csv.DictReader(StringIO(self.export('/rest/export/client_sub/?format=csv'))))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual((rows[0]['username'], rows[0]['gym_id']), ('user', str(self.gyms[0].id)))
+
+    def test_filters(self):
+        """Test that the gym and expire date filters are applied."""
+        url = f'/rest/export/subscription/?gym={self.gyms[1].id}&expire_from=2050-01-03'
+        rows = [json.loads(line) for line in self.export(url).splitlines()]
+        self.assertEqual([row['id'] for row in rows], [str(self.subs[3].id)])
+        self.assertEqual(self.export('/rest/export/gym/?modified_since=2999-01-01'), '')
+
+    @mock.patch('fitness_app.export.EXPORT_CHUNK_SIZE', 2)
+    def test_chunks(self):
+        """Test that rows are streamed in chunks."""
+        chunks = list(self.client.get('/rest/export/subscription/').streaming_content)
+        self.assertEqual(len(chunks), 2)
+
+    @mock.patch('fitness_app.export.EXPORT_CHUNK_SIZE', 3)
+    async def test_asgi(self):
+        """Test that ASGI requests stream from an asynchronous iterator."""
+        await self.async_client.aforce_login(await User.objects.aget(username='admin'))
+        response = await self.async_client.get('/rest/export/subscription/?format=csv')
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 2)
+        rows = list(csv.DictReader(StringIO(b''.join(chunks).decode())))
+        self.assertEqual(sorted(row['id'] for row in rows), sorted(str(sub.id) for sub in self.subs))
+
+    def test_errors(self):
+        """Test invalid exports, filters and users."""
+        self.assertEqual(self.client.get('/rest/export/client/').status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get('/rest/export/client_sub/?modified_since=2020-01-01')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            self.client.get('/rest/export/gym/?gym=broken').status_code, status.HTTP_400_BAD_REQUEST,
+        )
+        self.client.force_authenticate(user=User.objects.get(username='user'))
+        self.assertEqual(self.client.get('/rest/export/gym/').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_command(self):
+        """Test that the command writes the export."""
+        output = StringIO()
+        call_command('export_data', 'gym', '--format', 'csv', stdout=output)
+        self.assertEqual(len(output.getvalue().splitlines()), len(self.gyms) + 1)
+        with self.assertRaises(CommandError):
+            call_command('export_data', 'gym', '--expire-from', '2020-01-01', stdout=output)
@@ -0,0 +1,127 @@
+"""Module for sparse fieldset and values() serializer tests."""
+
+from datetime import date
+from json import loads
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app.fast_serializers import ValuesSerializer
+from fitness_app.models import (Address, Certificate, Client, Coach, Gym,
+                                Subscription)
+from fitness_app.serializers import (AddressSerializer, CertificateSerializer,
+                                     CoachSerializer, GymSerializer,
+                                     SubscriptionSerializer)
+from fitness_app.views import GymViewSet
+
+SERIALIZERS = (
+    AddressSerializer, GymSerializer, CoachSerializer, CertificateSerializer, SubscriptionSerializer,
+)
+
+
+def normalized(rows) -> list:
+    """Make rendered rows comparable regardless of the order of related ids.
+
+    Args:
+        rows: Rendered rows.
+
+    Returns:
+        list: Rows with related id lists sorted.
+    """
+    return [
+        {key: sorted(value, key=str) if isinstance(value, list) else value for key, value in row.items()}
+        for row in rows
+    ]
+
+
+class TestValuesSerializer(TestCase):
+    """Class for comparing the values() serializers with the model serializers."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        address = Address.objects.create(city_name='A', street_name='B', house_number=1, body='a')
+        Address.objects.create(city_name='C', street_name='D', house_number=2, created_datetime=None)
+        coaches = [Coach.objects.create(first_name='A', last_name='B', spec='C') for _ in range(3)]
+        gym = Gym.objects.create(gym_name='Gym', address=address)
+        gym.coaches.set(coaches[:2])
+        Gym.objects.create(gym_name='Empty', address=None)
+        Certificate.objects.create(coach=coaches[0], certf_name='Cert')
+        client = Client.objects.create(user=User.objects.create_user(username='user', password='user'))
+        sub = Subscription.objects.create(price=5, expire_date=date(2050, 1, 1), gym=gym, description='d')
+        sub.clients.add(client)
+
+    def test_same_output(self):
+        """Test that both serializers render the same data."""
+        for serializer_class in SERIALIZERS:
+            with self.subTest(serializer=serializer_class.__name__):
+                queryset = serializer_class.Meta.model.objects.order_by('id')
+                fast = ValuesSerializer(serializer_class)
+                self.assertEqual(
+                    normalized(fast.serialize(fast.values(queryset))),
+                    normalized(serializer_class(queryset, many=True).data),
+                )
+
+    def test_sparse_output(self):
+        """Test that only requested fields are selected and rendered."""
+        fast = ValuesSerializer(GymSerializer, ['gym_name'])
+        with CaptureQueriesContext(connection) as queries:
+            rows = fast.serialize(fast.values(Gym.objects.all()))
+        self.assertEqual({tuple(row) for row in rows}, {('gym_name',)})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('address_id', queries[0]['sql'])
+
+
+class TestSparseFields(TestCase):
+    """Class for `?fields=` requests."""
+
+    _url = '/rest/gym/'
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='user', password='user'))
+        self.gym = Gym.objects.create(
+            gym_name='Gym', address=Address.objects.create(city_name='A', street_name='B', house_number=1),
+        )
+        self.gym.coaches.add(Coach.objects.create(first_name='A', last_name='B', spec='C'))
+
+    def get_results(self, url: str) -> list:
+        """Request a list and return its rows.
+
+        Args:
+            url (str): The URL.
+
+        Returns:
+            list: The rendered rows.
+        """
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return loads(response.content)['results']
+
+    def test_fields(self):
+        """Test that the list and detail render only requested fields."""
+        self.assertEqual(self.get_results(f'{self._url}?fields=id,coaches')[0].keys(), {'id', 'coaches'})
+        response = self.client.get(f'{self._url}{self.gym.id}/?fields=gym_name')
+        self.assertEqual(loads(response.content), {'gym_name': 'Gym'})
+
+    def test_unknown_field(self):
+        """Test that unknown fields are rejected."""
+        response = self.client.get(f'{self._url}?fields=id,secret')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_model_serializer_path(self):
+        """Test that the model serializer path renders the same sparse rows."""
+        fast = self.get_results(f'{self._url}?fields=gym_name,coaches')
+        with mock.patch.object(GymViewSet, 'fast_read', False):
+            self.assertEqual(self.get_results(f'{self._url}?fields=gym_name,coaches'), fast)
+            self.assertEqual(self.get_results(self._url)[0].keys(), {'id', 'gym_name', 'address', 'coaches'})
+
+    def test_missing_object(self):
+        """Test that an unknown object gives 404."""
+        response = self.client.get(f'{self._url}{Address.objects.get().id}/')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,118 @@
+"""Module for REST filtering and ordering tests."""
+
+from datetime import date
+from json import loads
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app.models import Address, Coach, Gym, Subscription
+
+PRICES = (5, 1, 4, 1, 3)
+# Plan nodes of a sort on Postgres and SQLite, an index giving the order needs neither.
+SORT_NODES = ('Sort', 'TEMP B-TREE')
+
+
+class TestFilters(TestCase):
+    """Class for whitelisted filters and keyset ordering."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='user', password='user'))
+        self.gyms = [
+            Gym.objects.create(
+                gym_name=f'Gym {city}',
+                address=Address.objects.create(city_name=city, street_name='B', house_number=1),
+            )
+            for city in ('Sochi', 'Kazan')
+        ]
+        self.subs = [
+            Subscription.objects.create(price=price, expire_date=date(2050, 1, index + 1), gym=self.gyms[index % 2])
+            for index, price in enumerate(PRICES)
+        ]
+        Coach.objects.create(first_name='A', last_name='B', spec='yoga')
+        Coach.objects.create(first_name='C', last_name='D', spec='boxing')
+
+    def ids(self, url: str) -> list:
+        """Follow every page of a list and collect the ids.
+
+        Args:
+            url (str): The URL of the first page.
+
+        Returns:
+            list: Ids in the order they were listed.
+        """
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            body = loads(response.content)
+            ids.extend(row['id'] for row in body['results'])
+            url = body['next']
+        return ids
+
+    def test_filters(self):
+        """Test filters by relation, range, date window, joined column and plain column."""
+        gym = self.gyms[0]
+        url = f'/rest/subscription/?gym={gym.id}&price_min=4&price_max=5'
+        self.assertEqual(sorted(self.ids(url)), sorted(str(sub.id) for sub in self.subs[0:3:2]))
+        url = '/rest/subscription/?expire_from=2050-01-02&expire_to=2050-01-03'
+        self.assertEqual(sorted(self.ids(url)), sorted(str(sub.id) for sub in self.subs[1:3]))
+        self.assertEqual(self.ids('/rest/gym/?city=Kazan'), [str(self.gyms[1].id)])
+        self.assertEqual(len(self.ids('/rest/coach/?spec=yoga')), 1)
+        self.assertEqual(len(self.ids('/rest/address/?city=Sochi&unknown=1')), 1)
+
+    def test_invalid_values(self):
+        """Test that unparsable values are rejected."""
+        response = self.client.get('/rest/subscription/?price_min=cheap&gym=broken')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(set(loads(response.content)), {'price_min', 'gym'})
+
+    def test_ordering(self):
+        """Test that ordering walks pages by `(field, id)` in both directions."""
+        expected = [str(sub.id) for sub in sorted(self.subs, key=lambda sub: (sub.price, str(sub.id)))]
+        self.assertEqual(self.ids('/rest/subscription/?ordering=price&page_size=2'), expected)
+        self.assertEqual(self.ids('/rest/subscription/?ordering=-price&page_size=2'), expected[::-1])
+        fields = '&fields=id,price'
+        self.assertEqual(self.ids(f'/rest/subscription/?ordering=price&page_size=2{fields}'), expected)
+
+    def test_ordering_whitelist(self):
+        """Test that only indexed columns can be ordered by."""
+        response = self.client.get('/rest/subscription/?ordering=description')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_index_backed(self):
+        """Test that filter and ordering shapes walk an index in the requested order."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+                cursor.execute('SET LOCAL enable_sort = off')
+        gym = self.gyms[0]
+        shapes = (
+            (
+                Subscription.objects.filter(gym=gym, price__gte=2).order_by('price', 'id'),
+                ('subscription_gym_active_idx', 'subscription_price_id_idx'),
+            ),
+            (
+                Subscription.objects.filter(gym=gym).order_by('created_datetime', 'id'),
+                ('subscription_gym_created_idx', 'subscription_created_id_idx'),
+            ),
+            (
+                Coach.objects.filter(spec='yoga').order_by('created_datetime', 'id'),
+                ('coach_spec_created_idx', 'coach_created_id_idx'),
+            ),
+            (
+                Address.objects.filter(city_name='Sochi').order_by('city_name', 'id'),
+                ('address_city_id_idx', 'address_city_created_idx'),
+            ),
+        )
+        for queryset, indexes in shapes:
+            with self.subTest(indexes=indexes):
+                plan = queryset.explain()
+                self.assertTrue(any(index in plan for index in indexes), plan)
+                for sort in SORT_NODES:
+                    self.assertNotIn(sort, plan)
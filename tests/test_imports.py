@@ -0,0 +1,127 @@
+"""Module for bulk import tests."""
+
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from fitness_app.imports import CSV, NDJSON, Importer, ImportDataError, read_rows
+from fitness_app.models import Address, Certificate, Coach, Gym, GymCoach
+
+ADDRESSES = (
+    'city_name,street_name,house_number,apartment_number,body\n'
+    'Sochi,Lenina street,5,,\n'
+    'Sochi,Lenina street,7,12,a\n'
+    'Sochi,Lenina street,-1,,\n'
+    'Sochi,Mira,1,,ab\n'
+    'A,B,1,,\n'
+)
+GYMS = (
+    'gym_name,city_name,street_name,house_number,apartment_number\n'
+    'Iron,Sochi,Lenina street,5,\n'
+    'Steel,,,,\n'
+    'Lost,Moscow,Arbat street,1,\n'
+)
+COACHES = '\n'.join(json.dumps(row) for row in (
+    {'first_name': 'Ivan', 'last_name': 'Petrov', 'spec': 'Boxing'},
+    {'first_name': 'Anna', 'last_name': 'Ivanova', 'spec': 'Yoga'},
+    {'first_name': 'Oleg', 'last_name': '', 'spec': 'Yoga'},
+))
+CERTIFICATES = (
+    'first_name,last_name,certf_name,description\n'
+    'Ivan,Petrov,Boxing coach,\n'
+    'Ivan,Petrov,Boxing coach,Level 2\n'
+)
+GYM_COACHES = (
+    'gym_name,first_name,last_name\n'
+    'Iron,Ivan,Petrov\n'
+    'Iron,Anna,Ivanova\n'
+    'Iron,Ivan,Petrov\n'
+)
+
+
+class TestImporter(TestCase):
+    """Class for the import pipeline."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.importer = Importer(batch_size=2)
+
+    def run_import(self, name: str, text: str, input_format: str = CSV):
+        """
+        Import rows of a text.
+
+        Args:
+            name (str): Name of the import.
+            text (str): The input.
+            input_format (str): `csv` or `ndjson`.
+
+        Returns:
+            ImportResult: The result.
+        """
+        return self.importer.run(name, read_rows(StringIO(text), input_format))
+
+    def test_validation(self):
+        """Test that rows failing the model validators are skipped with their line numbers."""
+        result = self.run_import('address', ADDRESSES)
+        self.assertEqual((result.rows, result.created), (5, 2))
+        self.assertEqual([line for line, _ in result.errors], [4, 5, 6])
+        self.assertEqual(Address.objects.count(), 2)
+        self.assertEqual(Address.objects.get(house_number=7).apartment_number, 12)
+
+    def test_natural_keys(self):
+        """Test that rows refer to rows of earlier imports and known rows are updated."""
+        self.run_import('address', ADDRESSES)
+        gyms = self.run_import('gym', GYMS)
+        self.assertEqual(gyms.created, 2)
+        self.assertEqual(len(gyms.errors), 1)
+        self.assertEqual(Gym.objects.get(gym_name='Iron').address.house_number, 5)
+        self.assertIsNone(Gym.objects.get(gym_name='Steel').address)
+        coaches = self.run_import('coach', COACHES, NDJSON)
+        self.assertEqual((coaches.created, len(coaches.errors)), (2, 1))
+        certificates = self.run_import('certificate', CERTIFICATES)
+        self.assertEqual((certificates.created, certificates.updated), (1, 1))
+        self.assertEqual(Certificate.objects.get().description, 'Level 2')
+        links = self.run_import('gym_coach', GYM_COACHES)
+        self.assertEqual((links.created, links.updated), (2, 1))
+        self.assertEqual(GymCoach.objects.count(), 2)
+        rerun = Importer().run('coach', read_rows(StringIO(COACHES), NDJSON))
+        self.assertEqual((rerun.created, rerun.updated), (0, 2))
+        self.assertEqual(Coach.objects.count(), 2)
+
+    def test_malformed_input(self):
+        """Test that a line which is not a JSON object stops the import."""
+        with self.assertRaises(ImportDataError):
+            self.run_import('coach', '{"first_name": "Ivan"}\n[1]\n', NDJSON)
+
+
+class TestImportCommand(TestCase):
+    """Class for the import command."""
+
+    def test_command(self):
+        """Test that files are imported in dependency order and invalid rows are reported."""
+        stdout = StringIO()
+        with TemporaryDirectory() as directory:
+            paths = {}
+            for name, text in (('gym', GYMS), ('address', ADDRESSES)):
+                paths[name] = os.path.join(directory, f'{name}.csv')
+                with open(paths[name], 'w', encoding='utf-8') as output:
+                    output.write(text)
+            with self.assertRaisesMessage(CommandError, '4 invalid rows'):
+                call_command(
+                    'import_data', f'gym={paths["gym"]}', f'address={paths["address"]}', '--json',
+                    stdout=stdout, stderr=StringIO(),
+                )
+        results = json.loads(stdout.getvalue())
+        self.assertEqual([result['name'] for result in results], ['address', 'gym'])
+        self.assertEqual(results[1]['created'], 2)
+        self.assertGreater(results[0]['rows_per_second'], 0)
+
+    def test_unknown_import(self):
+        """Test that unknown tables are rejected."""
+        with self.assertRaises(CommandError):
+            call_command('import_data', 'client=clients.csv')
@@ -0,0 +1,78 @@
+"""Module for index and constraint tests."""
+
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase
+from django.utils import timezone
+
+from fitness_app.models import (Address, BalanceEntry, BalanceSnapshot,
+                                Certificate, Client, ClientSub, Coach, Gym,
+                                GymCoach, Subscription)
+
+REPLACED_FK_INDEXES = (
+    (Gym, 'address_id'),
+    (Certificate, 'coach_id'),
+    (GymCoach, 'gym_id'),
+    (GymCoach, 'coach_id'),
+    (Subscription, 'gym_id'),
+    (ClientSub, 'client_id'),
+    (ClientSub, 'sub_id'),
+    (BalanceEntry, 'client_id'),
+    (BalanceEntry, 'client_sub_id'),
+    (BalanceSnapshot, 'client_id'),
+)
+
+
+class TestIndexes(TestCase):
+    """Class for the composite, covering and partial indexes of the hot queries."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client_obj = Client.objects.create(user=User.objects.create_user(username='user'))
+        address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        self.gym = Gym.objects.create(gym_name='Gym', address=address)
+        self.coach = Coach.objects.create(first_name='Ann', last_name='Lee', spec='yoga')
+        GymCoach.objects.create(gym=self.gym, coach=self.coach)
+        Certificate.objects.create(coach=self.coach, certf_name='Stretching')
+        subs = [
+            Subscription.objects.create(price=price, expire_date=date(2050, 1, 1), gym=self.gym)
+            for price in range(3)
+        ]
+        self.client_sub = ClientSub.objects.create(client=self.client_obj, sub=subs[0])
+
+    def test_index_backed(self):
+        """Test that the hot queries use their indexes."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        active = Subscription.objects.filter(gym=self.gym, expire_date__gte=timezone.localdate())
+        shapes = (
+            (active.order_by('price', 'id').values('id', 'price'), 'subscription_gym_active_idx'),
+            (ClientSub.objects.filter(client=self.client_obj).values('sub_id'), 'client_sub_client_sub_idx'),
+            (GymCoach.objects.filter(coach=self.coach).values('gym_id'), 'gym_coach_coach_gym_idx'),
+            (BalanceEntry.objects.filter(client_sub=self.client_sub), 'balance_entry_client_sub_idx'),
+            (Certificate.objects.filter(coach=self.coach), 'certf_coach_created_idx'),
+        )
+        for queryset, index in shapes:
+            with self.subTest(index=index):
+                self.assertIn(index, queryset.explain())
+
+    def test_redundant_indexes_dropped(self):
+        """Test that foreign keys leading a composite index have no index of their own."""
+        with connection.cursor() as cursor:
+            for model, column in REPLACED_FK_INDEXES:
+                table = model._meta.db_table.strip('"')
+                declared = {index.name for index in model._meta.indexes}
+                constraints = connection.introspection.get_constraints(cursor, table)
+                with self.subTest(table=table, column=column):
+                    self.assertNotIn([column], [
+                        constraint['columns'] for name, constraint in constraints.items()
+                        if constraint['index'] and name not in declared
+                    ])
+
+    def test_net_worth_constraint(self):
+        """Test that the database rejects negative balances."""
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Client.objects.filter(pk=self.client_obj.pk).update(net_worth=-1)
@@ -0,0 +1,166 @@
+"""Module for balance ledger tests."""
+
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from threading import Event
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.db import connection, transaction
+from django.test import TestCase, skipUnlessDBFeature
+from django.test import client as test_client
+
+from fitness_app import ledger
+from fitness_app.models import BalanceEntry, BalanceSnapshot, Client
+from tests.transaction_case import AppTransactionTestCase
+
+OPENING = Decimal(100)
+SNAPSHOT_INTERVAL = 5
+OPERATIONS = 200
+THREADS = 16
+LOCK_TIMEOUT = 5
+
+
+class TestLedger(TestCase):
+    """Class for ledger tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.user = User.objects.create_user(username='user', password='user')
+        self.client_obj = Client.objects.create(user=self.user, net_worth=OPENING)
+
+    def test_opening_entry(self):
+        """Test that a new client starts with an opening entry."""
+        entry = BalanceEntry.objects.get(client=self.client_obj)
+        self.assertEqual((entry.kind, entry.amount), (BalanceEntry.OPENING, OPENING))
+        self.assertEqual(ledger.get_balance(self.client_obj.id), OPENING)
+
+    def test_credit_and_debit(self):
+        """Test that credits and debits are appended and summed up."""
+        ledger.credit(self.client_obj.id, Decimal('10.50'))
+        ledger.debit(self.client_obj.id, Decimal(60))
+        self.assertEqual(ledger.get_balance(self.client_obj.id), Decimal('50.50'))
+        self.assertEqual(BalanceEntry.objects.filter(client=self.client_obj).count(), 3)
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.net_worth, Decimal('50.50'))
+
+    def test_insufficient_funds(self):
+        """Test that a debit can not overdraw the balance."""
+        with self.assertRaises(ledger.InsufficientFunds):
+            ledger.debit(self.client_obj.id, OPENING + 1)
+        self.assertEqual(ledger.get_balance(self.client_obj.id), OPENING)
+
+    def test_credit_limit(self):
+        """Test that a credit can not exceed the allowed amount of money."""
+        with self.assertRaises(ValidationError):
+            ledger.credit(self.client_obj.id, Decimal(9999999))
+        self.assertEqual(ledger.get_balance(self.client_obj.id), OPENING)
+
+    def test_read_refreshes_net_worth(self):
+        """Test that a top-up reaches the cached balance of the client on the next read."""
+        ledger.credit(self.client_obj.id, Decimal(5))
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.net_worth, OPENING)
+        self.assertEqual(ledger.get_balance(self.client_obj.id), OPENING + 5)
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.net_worth, OPENING + 5)
+
+    @mock.patch('fitness_app.ledger.SNAPSHOT_INTERVAL', SNAPSHOT_INTERVAL)
+    def test_snapshot_bounds_the_tail(self):
+        """Test that balance reads never sum more than a snapshot interval of entries."""
+        for _ in range(SNAPSHOT_INTERVAL * 3):
+            ledger.credit(self.client_obj.id, Decimal(1))
+        self.assertFalse(BalanceSnapshot.objects.filter(client=self.client_obj).exists())
+        ledger.get_balance(self.client_obj.id)
+        balance, _, tail_length = ledger._read_balance(self.client_obj.id)
+        self.assertEqual(balance, OPENING + SNAPSHOT_INTERVAL * 3)
+        self.assertLess(tail_length, SNAPSHOT_INTERVAL)
+        self.assertTrue(BalanceSnapshot.objects.filter(client=self.client_obj).exists())
+        self.client_obj.refresh_from_db()
+        self.assertEqual(self.client_obj.net_worth, balance)
+
+    def test_profile_top_up(self):
+        """Test that the profile form credits the balance."""
+        http_client = test_client.Client()
+        http_client.force_login(self.user)
+        response = http_client.post('/accounts/profile/', {'money': '25.25'})
+        self.assertEqual(response.context['client'].net_worth, OPENING + Decimal('25.25'))
+        self.assertEqual(BalanceEntry.objects.filter(kind=BalanceEntry.TOP_UP).count(), 1)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class TestConcurrentLedger(AppTransactionTestCase):
+    """Tests for concurrent credits and debits of one client."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        user = User.objects.create_user(username='user', password='user')
+        self.client_obj = Client.objects.create(user=user, net_worth=OPENING)
+
+    def operate(self, number: int) -> Decimal:
+        """Credit or debit the client from a worker thread.
+
+        Args:
+            number (int): Number of the operation.
+
+        Returns:
+            Decimal: Change of the balance made by this call.
+        """
+        try:
+            if number % 2:
+                ledger.credit(self.client_obj.id, Decimal(1))
+                return Decimal(1)
+            try:
+                ledger.debit(self.client_obj.id, Decimal(3))
+            except ledger.InsufficientFunds:
+                return Decimal(0)
+            return Decimal(-3)
+        finally:
+            connection.close()
+
+    @mock.patch('fitness_app.ledger.SNAPSHOT_INTERVAL', SNAPSHOT_INTERVAL)
+    def test_balance_stays_consistent(self):
+        """Test that snapshots and the tail add up to every applied operation."""
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            change = sum(executor.map(self.operate, range(OPERATIONS)))
+
+        expected = OPENING + change
+        self.assertGreaterEqual(expected, 0)
+        self.assertEqual(ledger.get_balance(self.client_obj.id), expected)
+        self.assertEqual(ledger.take_snapshot(self.client_obj.id), expected)
+        total = sum(BalanceEntry.objects.filter(client=self.client_obj).values_list('amount', flat=True))
+        self.assertEqual(total, expected)
+
+    def test_credits_do_not_wait(self):
+        """Test that a credit goes through while another credit of the client is uncommitted."""
+        credited, committed = Event(), Event()
+
+        def hold_credit():
+            """Credit the client and keep the transaction open until the other credit is done."""
+            try:
+                with transaction.atomic():
+                    ledger.credit(self.client_obj.id, Decimal(1))
+                    credited.set()
+                    committed.wait(LOCK_TIMEOUT * 2)
+            finally:
+                connection.close()
+
+        def credit_meanwhile():
+            """Credit the client, failing instead of waiting for the first credit."""
+            credited.wait(LOCK_TIMEOUT)
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}s'")
+                    ledger.credit(self.client_obj.id, Decimal(1))
+            finally:
+                committed.set()
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            holder = executor.submit(hold_credit)
+            executor.submit(credit_meanwhile).result()
+            self.assertFalse(holder.done())
+            holder.result()
+        self.assertEqual(ledger.get_balance(self.client_obj.id), OPENING + 2)
@@ -0,0 +1,130 @@
+"""Module for metrics tests."""
+
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from fitness_app.metrics import (CACHE_REQUESTS, CONTENT_TYPE, REGISTRY, REQUEST_DURATION,
+                                 REQUESTS, FileValues, Registry, sample_key)
+from fitness_app.models import Address, Client, Gym
+
+
+def sample(name: str, **labels) -> float:
+    """
+    Get a collected value.
+
+    Args:
+        name (str): The sample name.
+        labels: Label values, in the order of the metric.
+
+    Returns:
+        float: The value, 0 if it was never recorded.
+    """
+    return REGISTRY.collect().get((name, tuple(labels.items())), 0.0)
+
+
+class TestRegistry(TestCase):
+    """Class for the storage and the text format."""
+
+    def test_render(self):
+        """Test that the histogram buckets are cumulative and the labels escaped."""
+        registry = Registry()
+        requests = registry.counter('requests_total', 'Requests.', ('view',))
+        latency = registry.histogram('latency_seconds', 'Latency.', (), buckets=(0.1, 1))
+        requests.inc(view='a"b')
+        requests.inc(2, view='a"b')
+        for value in (0.05, 0.5, 0.7, 3):
+            latency.observe(value)
+        text = registry.render()
+        self.assertIn('# TYPE requests_total counter\nrequests_total{view="a\\"b"} 3.0\n', text)
+        self.assertIn('latency_seconds_bucket{le="0.1"} 1.0\n', text)
+        self.assertIn('latency_seconds_bucket{le="1.0"} 3.0\n', text)
+        self.assertIn('latency_seconds_bucket{le="+Inf"} 4.0\n', text)
+        self.assertIn('latency_seconds_count 4.0\nlatency_seconds_sum 4.25\n', text)
+        with self.assertRaises(ValueError):
+            requests.inc(path='/')
+
+    def test_processes(self):
+        """Test that the counters of every process are summed, gauges only of live ones."""
+        with TemporaryDirectory() as directory:
+            with override_settings(METRICS_DIR=directory):
+                registry = Registry()
+                requests = registry.counter('requests_total', 'Requests.')
+                workers = registry.gauge('workers', 'Workers.')
+                requests.inc()
+                workers.set(4)
+                exited = FileValues(f'{directory}/metrics-999999999.db')
+                exited.inc(sample_key('requests_total', ()), 2)
+                exited.set(sample_key('workers', ()), 8)
+                for number in range(2000):
+                    exited.inc(sample_key('requests_total', (('n', str(number)),)), 1)
+                collected = registry.collect()
+        self.assertEqual(collected[('requests_total', ())], 3)
+        self.assertEqual(len([key for key in collected if key[0] == 'workers']), 1)
+        self.assertEqual(collected[('requests_total', (('n', '1999'),))], 1)
+
+
+class TestMetrics(TestCase):
+    """Class for the recorded metrics and the endpoint."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        cache.clear()
+        self.admin = User.objects.create_superuser(username='admin', password='admin')
+        self.user = User.objects.create_user(username='user', password='user')
+        Client.objects.create(user=self.user)
+        address = Address.objects.create(city_name='City', street_name='Street', house_number=1)
+        self.gym = Gym.objects.create(gym_name='Gym', address=address)
+        self.client = APIClient()
+        self.client.force_login(self.user)
+
+    def test_views(self):
+        """Test that the requests of pages and viewset actions are counted and timed."""
+        page = sample(REQUESTS.name, view='gym_detail_page', method='GET', status='200')
+        action = sample(REQUESTS.name, view='gym.retrieve', method='GET', status='404')
+        count = sample(f'{REQUEST_DURATION.name}_count', view='gym_detail_page')
+        self.client.get(f'/gyms/{self.gym.id}/')
+        self.client.get('/rest/gym/00000000-0000-0000-0000-000000000000/')
+        self.assertEqual(
+            sample(REQUESTS.name, view='gym_detail_page', method='GET', status='200'), page + 1,
+        )
+        self.assertEqual(
+            sample(REQUESTS.name, view='gym.retrieve', method='GET', status='404'), action + 1,
+        )
+        self.assertEqual(
+            sample(f'{REQUEST_DURATION.name}_count', view='gym_detail_page'), count + 1,
+        )
+
+    @mock.patch('fitness_app.authentication.TOKEN_CACHE_TTL', 60)
+    def test_caches(self):
+        """Test that the lookups of the gym page and token caches are counted."""
+        def lookups(name):
+            return [
+                sample(CACHE_REQUESTS.name, cache=name, result=result) for result in ('hit', 'miss')
+            ]
+
+        pages, tokens = lookups('gym_page'), lookups('token')
+        self.client.get(f'/gyms/{self.gym.id}/')
+        self.client.get(f'/gyms/{self.gym.id}/')
+        token = APIClient()
+        token.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.create(user=self.user).key}')
+        token.get('/rest/gym/')
+        token.get('/rest/gym/')
+        self.assertEqual(lookups('gym_page'), [pages[0] + 1, pages[1] + 1])
+        self.assertEqual(lookups('token'), [tokens[0] + 1, tokens[1] + 1])
+
+    def test_endpoint(self):
+        """Test that only admins read the metrics."""
+        self.assertEqual(self.client.get('/metrics/').status_code, 403)
+        self.client.get(f'/gyms/{self.gym.id}/')
+        self.client.force_login(self.admin)
+        response = self.client.get('/metrics/')
+        self.assertEqual((response.status_code, response['Content-Type']), (200, CONTENT_TYPE))
+        text = response.content.decode()
+        self.assertIn('# TYPE fitness_http_request_duration_seconds histogram', text)
+        self.assertIn('fitness_cache_hit_ratio{cache="gym_page"}', text)
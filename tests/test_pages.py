@@ -0,0 +1,156 @@
+"""Module for html page tests."""
+
+from datetime import date, datetime, timezone
+from unittest import mock
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test import client as test_client
+from django.test.utils import CaptureQueriesContext
+
+from fitness_app.models import (Address, Certificate, Client, ClientSub, Coach,
+                                Gym, GymCoach, Subscription)
+from fitness_app.pagination import decode_cursor, encode_cursor
+
+PAGE_SIZE = 2
+
+
+class TestGymsPage(TestCase):
+    """Class for gym listing page tests."""
+
+    _url = '/gyms/'
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = test_client.Client()
+        address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        same_time = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        created = (
+            datetime(2019, 1, 1, tzinfo=timezone.utc), same_time, same_time, same_time, None, None,
+        )
+        self.gyms = [
+            Gym.objects.create(gym_name=f'gym {index}', address=address, created_datetime=created_at)
+            for index, created_at in enumerate(created)
+        ]
+
+    def walk(self) -> list:
+        """Walk through every page of the gym listing.
+
+        Returns:
+            list: Gyms in the order they were displayed.
+        """
+        shown, cursor = [], None
+        while True:
+            response = self.client.get(self._url, {'cursor': cursor} if cursor else {})
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.context['gyms']), PAGE_SIZE)
+            shown.extend(response.context['gyms'])
+            cursor = response.context['next_cursor']
+            if not cursor:
+                return shown
+
+    @mock.patch('fitness_app.views.GYMS_PAGE_SIZE', PAGE_SIZE)
+    def test_every_gym_once_in_order(self):
+        """Test that pages cover all gyms in `(created_datetime, id)` order."""
+        with_date = sorted(
+            (gym for gym in self.gyms if gym.created_datetime),
+            key=lambda gym: (gym.created_datetime, str(gym.id)),
+        )
+        without_date = sorted((gym for gym in self.gyms if not gym.created_datetime), key=lambda gym: str(gym.id))
+        self.assertEqual([gym.id for gym in self.walk()], [gym.id for gym in with_date + without_date])
+
+    @mock.patch('fitness_app.views.GYMS_PAGE_SIZE', PAGE_SIZE)
+    def test_single_query_with_address(self):
+        """Test that a page and its addresses are loaded by one query."""
+        with self.assertNumQueries(1):
+            response = self.client.get(self._url)
+        self.assertContains(response, 'A/B/1')
+
+    def test_invalid_cursor(self):
+        """Test that a broken cursor is rejected."""
+        self.assertEqual(self.client.get(self._url, {'cursor': 'broken'}).status_code, 400)
+
+    def test_cursor_roundtrip(self):
+        """Test that a cursor decodes to the row it was built from."""
+        gym = self.gyms[1]
+        self.assertEqual(decode_cursor(encode_cursor(gym), Gym), (gym.created_datetime, gym.id))
+
+
+class TestGymDetailPage(TestCase):
+    """Class for gym detail page tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        cache.clear()
+        self.client = test_client.Client()
+        self.user = User.objects.create_user(username='user', password='user')
+        self.client_obj = Client.objects.create(user=self.user)
+        self.client.force_login(self.user)
+        self.gym = Gym.objects.create(
+            gym_name='Gym', address=Address.objects.create(city_name='A', street_name='B', house_number=1),
+        )
+        self.url = f'/gyms/{self.gym.id}/'
+        self.owned = Subscription.objects.create(price=10, expire_date=date(2050, 1, 1), gym=self.gym)
+        self.other = Subscription.objects.create(price=20, expire_date=date(2050, 1, 1), gym=self.gym)
+        ClientSub.objects.create(client=self.client_obj, sub=self.owned)
+
+    def add_coaches(self, amount: int):
+        """Attach coaches with certificates to the gym.
+
+        Args:
+            amount (int): Number of coaches to add.
+        """
+        for index in range(amount):
+            coach = Coach.objects.create(first_name=f'Coach{index}', last_name='B', spec='C')
+            Certificate.objects.create(coach=coach, certf_name=f'Cert{index}')
+            GymCoach.objects.create(gym=self.gym, coach=coach)
+
+    def count_queries(self) -> int:
+        """Request the page with an empty cache.
+
+        Returns:
+            int: Number of queries executed.
+        """
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+        return len(queries)
+
+    def test_fixed_number_of_queries(self):
+        """Test that the number of queries does not grow with coaches."""
+        self.add_coaches(1)
+        few = self.count_queries()
+        self.add_coaches(5)
+        self.assertEqual(self.count_queries(), few)
+
+    def test_content(self):
+        """Test that coaches, certificates and buttons are rendered."""
+        self.add_coaches(2)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Cert1')
+        self.assertContains(response, 'You already own this subscription', count=1)
+        self.assertContains(response, f'?id={self.other.id}')
+
+    def test_cached_render(self):
+        """Test that the shared part is served from the cache."""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        self.assertFalse([query for query in queries if '"certf"."certf_name"' in query['sql']])
+
+    def test_invalidation(self):
+        """Test that a change of a certificate refreshes the page."""
+        self.add_coaches(1)
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Certificate.objects.filter(certf_name='Cert0').get().delete()
+            coach = Coach.objects.get()
+            Certificate.objects.create(coach=coach, certf_name='Fresh')
+        self.assertContains(self.client.get(self.url), 'Fresh')
+
+    def test_unknown_gym(self):
+        """Test that a missing gym gives 404."""
+        self.assertEqual(self.client.get(f'/gyms/{uuid4()}/').status_code, 404)
@@ -0,0 +1,98 @@
+"""Module for connection pool tests."""
+
+from json import loads
+from unittest import skipUnless
+
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app.backends.postgresql.base import DatabaseWrapper
+
+URL = '/rest/db-pool/'
+
+
+def pooled() -> bool:
+    """
+    Check whether the default database uses the pool.
+
+    `connection` is a proxy, the check needs the wrapper of the default database itself.
+
+    Returns:
+        bool: True if the pooling backend is configured with a pool.
+    """
+    wrapper = connections[DEFAULT_DB_ALIAS]
+    return isinstance(wrapper, DatabaseWrapper) and wrapper.pool_options is not None
+
+
+class TestPoolOptions(TestCase):
+    """Class for pool configuration."""
+
+    def wrapper(self, alias: str = 'pool_test', **settings) -> DatabaseWrapper:
+        """
+        Build a database wrapper with the pool enabled.
+
+        Args:
+            alias (str): The database alias.
+            settings: Settings overriding the default database.
+
+        Returns:
+            DatabaseWrapper: The wrapper, not connected.
+        """
+        return DatabaseWrapper(
+            {**connection.settings_dict, 'OPTIONS': {'pool': {'max_size': 2}}, **settings}, alias,
+        )
+
+    def test_options(self):
+        """Test that pooling needs non-persistent connections and is off for maintenance."""
+        self.assertEqual(self.wrapper(CONN_MAX_AGE=0).pool_options, {'max_size': 2})
+        self.assertNotIn('pool', self.wrapper(NAME='db', CONN_MAX_AGE=0).get_connection_params())
+        with self.assertRaises(ImproperlyConfigured):
+            self.wrapper(CONN_MAX_AGE=60).pool_options
+        self.assertIsNone(self.wrapper(NO_DB_ALIAS, CONN_MAX_AGE=0).pool_options)
+
+    def test_stats_view(self):
+        """Test that only admins see the pool statistics."""
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='user'))
+        self.assertEqual(client.get(URL).status_code, status.HTTP_403_FORBIDDEN)
+        client.force_authenticate(user=User.objects.create_superuser(username='admin'))
+        response = client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        if pooled():
+            self.assertEqual(loads(response.content)['default']['pool_max'], connection.pool.max_size)
+
+
+@skipUnless(pooled(), 'The default database is not pooled.')
+class TestPool(TestCase):
+    """Class for pooled connections."""
+
+    def test_reuse(self):
+        """Test that closing a connection puts it back into the pool."""
+        wrapper = connection.copy()
+        wrapper.ensure_connection()
+        raw = wrapper.connection
+        available = connection.pool.get_stats().get('pool_available', 0)
+        wrapper.close()
+        self.assertFalse(raw.closed)
+        self.assertIsNone(wrapper.connection)
+        self.assertGreaterEqual(connection.pool.get_stats()['pool_available'], available + 1)
+
+    @skipUnless(
+        getattr(connection.features, 'uses_server_side_binding', False),
+        'Statements are bound client-side.',
+    )
+    def test_prepared_statements(self):
+        """Test that a repeated query is prepared on the server."""
+        threshold = connection.settings_dict['OPTIONS']['prepare_threshold']
+        for _ in range(threshold + 1):
+            User.objects.filter(username='nobody').exists()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT count(*) FROM pg_prepared_statements WHERE statement LIKE %s', ['%auth_user%'],
+            )
+            self.assertGreater(cursor.fetchone()[0], 0)
@@ -0,0 +1,113 @@
+"""Module for request profiling tests."""
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from rest_framework.test import APIClient
+
+from fitness_app.models import Address, Client, Gym
+from fitness_app.profiling import SERVER_TIMING_HEADER, ProfilingMiddleware, instrument
+
+MIDDLEWARE = ['fitness_app.profiling.ProfilingMiddleware', *settings.MIDDLEWARE[1:]]
+
+
+def timing(response) -> dict:
+    """
+    Parse the `Server-Timing` header.
+
+    Args:
+        response (HttpResponse): The response.
+
+    Returns:
+        dict: Durations and descriptions by metric.
+    """
+    metrics = {}
+    for metric in response[SERVER_TIMING_HEADER].split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class TestDisabled(TestCase):
+    """Class for the profiling switch."""
+
+    @override_settings(REQUEST_PROFILING=False)
+    def test_not_used(self):
+        """Test that the middleware removes itself when profiling is off."""
+        with self.assertRaises(MiddlewareNotUsed):
+            ProfilingMiddleware(lambda request: HttpResponse())
+        self.assertNotIn(SERVER_TIMING_HEADER, self.client.get('/login/'))
+
+
+@override_settings(REQUEST_PROFILING=True, REQUEST_PROFILING_LOG_SAMPLE=0, MIDDLEWARE=MIDDLEWARE)
+class TestProfiling(TestCase):
+    """Class for the measurements of a request."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Instrument the connection of the test thread, opened before the middleware."""
+        super().setUpClass()
+        instrument()
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.user = User.objects.create_user(username='user', password='user')
+        Client.objects.create(user=self.user)
+        address = Address.objects.create(city_name='City', street_name='Street', house_number=1)
+        self.gym = Gym.objects.create(gym_name='Gym', address=address)
+        self.client = APIClient()
+        self.client.force_login(self.user)
+
+    def test_page(self):
+        """Test that the queries and the template time of a page are reported."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/gyms/{self.gym.id}/')
+        metrics = timing(response)
+        self.assertEqual(metrics['sql']['desc'], f'"{len(queries)} queries (0 duplicates)"')
+        self.assertGreater(float(metrics['template']['dur']), 0)
+        self.assertEqual(float(metrics['serializer']['dur']), 0)
+        self.assertGreaterEqual(float(metrics['total']['dur']), float(metrics['sql']['dur']))
+
+    def test_serializer(self):
+        """Test that the serializer time of an endpoint is reported."""
+        metrics = timing(self.client.get(f'/rest/gym/{self.gym.id}/'))
+        self.assertGreater(float(metrics['serializer']['dur']), 0)
+
+    @override_settings(REQUEST_PROFILING_LOG_SAMPLE=1)
+    def test_log(self):
+        """Test that sampled requests are logged as JSON."""
+        with self.assertLogs('fitness_app.profiling') as logs:
+            self.client.get('/rest/gym/')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual((record['path'], record['status']), ('/rest/gym/', 200))
+        self.assertGreater(record['queries'], 0)
+
+    def test_duplicates(self):
+        """Test that a query repeated with the same parameters is counted."""
+        def view(request):
+            for _ in range(3):
+                Gym.objects.filter(id=self.gym.id).exists()
+            Gym.objects.filter(gym_name='Other').exists()
+            return HttpResponse()
+
+        response = ProfilingMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('"4 queries (2 duplicates)"', response[SERVER_TIMING_HEADER])
+
+    async def test_async(self):
+        """Test that queries of an async request run in threads are recorded."""
+        def query(request):
+            Gym.objects.filter(id=self.gym.id).exists()
+            return HttpResponse()
+
+        async def view(request):
+            return await sync_to_async(query)(request)
+
+        response = await ProfilingMiddleware(view)(RequestFactory().get('/'))
+        self.assertIn('"1 queries (0 duplicates)"', response[SERVER_TIMING_HEADER])
@@ -0,0 +1,144 @@
+"""Module for subscription purchase tests."""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from decimal import Decimal
+from itertools import product
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, skipUnlessDBFeature
+from django.test import client as test_client
+
+from fitness_app.ledger import InsufficientFunds, get_balance
+from fitness_app.models import Address, Client, ClientSub, Gym, Subscription
+from fitness_app.services import IdempotencyConflict, purchase_subscription
+from tests.transaction_case import AppTransactionTestCase
+
+PRICE = 25
+BALANCE = 1000
+SUBS_AMOUNT = 60
+THREADS = 16
+ATTEMPTS_PER_SUB = 3
+
+
+def create_subs(amount: int, price: int = PRICE) -> list:
+    """Create subscriptions of one gym.
+
+    Args:
+        amount (int): Number of subscriptions.
+        price (int): Price of every subscription.
+
+    Returns:
+        list: Created subscriptions.
+    """
+    address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+    gym = Gym.objects.create(gym_name='A', address=address)
+    return [
+        Subscription.objects.create(price=price, expire_date=date(2050, 1, 1), gym=gym)
+        for _ in range(amount)
+    ]
+
+
+class TestPurchase(TestCase):
+    """Class for purchase service tests."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.user = User.objects.create_user(username='user', password='user')
+        self.client_obj = Client.objects.create(user=self.user, net_worth=PRICE * 2)
+        self.sub, self.other_sub, self.third_sub = create_subs(3)
+
+    def balance(self) -> Decimal:
+        """Read the current balance of the client through its refreshed cached copy.
+
+        Returns:
+            Decimal: The balance.
+        """
+        get_balance(self.client_obj.id)
+        self.client_obj.refresh_from_db()
+        return self.client_obj.net_worth
+
+    def test_purchase(self):
+        """Test that a purchase charges the client and grants the subscription."""
+        _, created = purchase_subscription(self.client_obj.id, self.sub.id, 'key')
+        self.assertTrue(created)
+        self.assertEqual(self.balance(), PRICE)
+        self.assertTrue(ClientSub.objects.filter(client=self.client_obj, sub=self.sub).exists())
+
+    def test_retry_is_not_charged(self):
+        """Test that retries with the same key and repeated purchases charge once."""
+        first, _ = purchase_subscription(self.client_obj.id, self.sub.id, 'key')
+        retried, created = purchase_subscription(self.client_obj.id, self.sub.id, 'key')
+        self.assertFalse(created)
+        self.assertEqual(first.id, retried.id)
+        purchase_subscription(self.client_obj.id, self.sub.id)
+        self.assertEqual(self.balance(), PRICE)
+
+    def test_key_reused_for_other_purchase(self):
+        """Test that a key can not be reused for another subscription."""
+        purchase_subscription(self.client_obj.id, self.sub.id, 'key')
+        with self.assertRaises(IdempotencyConflict):
+            purchase_subscription(self.client_obj.id, self.other_sub.id, 'key')
+        self.assertEqual(self.balance(), PRICE)
+
+    def test_insufficient_funds(self):
+        """Test that a purchase is rolled back when the client can not afford it."""
+        purchase_subscription(self.client_obj.id, self.sub.id)
+        purchase_subscription(self.client_obj.id, self.other_sub.id)
+        with self.assertRaises(InsufficientFunds):
+            purchase_subscription(self.client_obj.id, self.third_sub.id)
+        self.assertEqual(self.balance(), 0)
+        self.assertFalse(ClientSub.objects.filter(sub=self.third_sub).exists())
+
+    def test_view(self):
+        """Test the purchase form endpoint."""
+        http_client = test_client.Client()
+        http_client.force_login(self.user)
+        for _ in range(2):
+            response = http_client.post(f'/subscribe/?id={self.sub.id}', {'idempotency_key': 'form-key'})
+            self.assertRedirects(response, '/accounts/profile/', fetch_redirect_response=False)
+        self.assertEqual(self.balance(), PRICE)
+        response = http_client.post('/subscribe/?id=broken')
+        self.assertEqual(response.content, b'Something went wrong...')
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class TestConcurrentPurchase(AppTransactionTestCase):
+    """Stress test for concurrent purchases of one client."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        user = User.objects.create_user(username='user', password='user')
+        self.client_obj = Client.objects.create(user=user, net_worth=BALANCE)
+        self.subs = create_subs(SUBS_AMOUNT)
+
+    def buy(self, task: tuple) -> bool:
+        """Buy a subscription from a worker thread.
+
+        Args:
+            task (tuple): Subscription and attempt number.
+
+        Returns:
+            bool: Whether the subscription was bought by this call.
+        """
+        sub, attempt = task
+        try:
+            return purchase_subscription(self.client_obj.id, sub.id, f'{sub.id}-{attempt % 2}')[1]
+        except (InsufficientFunds, IdempotencyConflict):
+            return False
+        finally:
+            connection.close()
+
+    def test_balance_stays_consistent(self):
+        """Test that no purchase is lost or charged twice under contention."""
+        tasks = list(product(self.subs, range(ATTEMPTS_PER_SUB)))
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            bought = sum(executor.map(self.buy, tasks))
+
+        get_balance(self.client_obj.id)
+        self.client_obj.refresh_from_db()
+        owned = ClientSub.objects.filter(client=self.client_obj).count()
+        self.assertEqual(bought, owned)
+        self.assertEqual(owned, BALANCE // PRICE)
+        self.assertEqual(self.client_obj.net_worth, BALANCE - owned * PRICE)
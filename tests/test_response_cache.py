@@ -0,0 +1,123 @@
+"""Module for versioned REST response cache tests."""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app import async_views
+from fitness_app.metrics import CACHE_REQUESTS, REGISTRY
+from fitness_app.models import Address, Client, Coach, Gym, GymCoach
+from fitness_app.urls import build_urlpatterns
+from tests.transaction_case import AppTransactionTestCase
+
+urlpatterns = build_urlpatterns(async_views)
+
+
+def lookups() -> tuple:
+    """
+    Count the lookups of the response cache.
+
+    Returns:
+        tuple: Hits and misses.
+    """
+    collected = REGISTRY.collect()
+    return tuple(
+        collected.get((CACHE_REQUESTS.name, (('cache', 'response'), ('result', result))), 0)
+        for result in ('hit', 'miss')
+    )
+
+
+@override_settings(RESPONSE_CACHE_TIMEOUT=60)
+class TestResponseCache(AppTransactionTestCase):
+    """Class for the cached list and retrieve responses."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        cache.clear()
+        self.user = User.objects.create_user(username='user', password='user')
+        Client.objects.create(user=self.user)
+        self.address = Address.objects.create(
+            city_name='City', street_name='Street', house_number=1,
+        )
+        self.gym = Gym.objects.create(gym_name='Gym', address=self.address)
+        self.client = APIClient()
+        self.client.force_login(self.user)
+
+    def get(self, path: str, **extra):
+        """
+        Send a GET request and count its queries.
+
+        Args:
+            path (str): The path and query string.
+            extra: Headers of the request.
+
+        Returns:
+            tuple: The response and the number of queries.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(path, **extra)
+        return response, len(queries)
+
+    def test_hit(self):
+        """Test that a repeated list is served from the cache whatever the parameter order."""
+        hits, misses = lookups()
+        first, first_queries = self.get('/rest/gym/?ordering=gym_name&city=City')
+        second, second_queries = self.get('/rest/gym/?city=City&ordering=gym_name')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertLess(second_queries, first_queries)
+        self.assertEqual(lookups(), (hits + 1, misses + 1))
+        response, _ = self.get(
+            '/rest/gym/?city=City&ordering=gym_name', HTTP_IF_NONE_MATCH=first['ETag'],
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_generations(self):
+        """Test that saves, links and bulk writes of the models of a response expire it."""
+        url = f'/rest/gym/{self.gym.id}/'
+        self.get(url)
+        self.gym.gym_name = 'Renamed'
+        self.gym.save()
+        self.assertEqual(self.get(url)[0].json()['gym_name'], 'Renamed')
+        coach = Coach.objects.create(first_name='Ann', last_name='Lee', spec='Yoga')
+        self.get(url)
+        GymCoach.objects.create(gym=self.gym, coach=coach)
+        self.assertEqual(self.get(url)[0].json()['coaches'], [str(coach.id)])
+        self.client.force_login(User.objects.create_superuser(username='admin', password='admin'))
+        self.get('/rest/gym/')
+        self.client.post(
+            '/rest/gym/bulk/',
+            [{'gym_name': 'Bulk', 'address': str(self.address.id), 'coaches': []}],
+            format='json',
+        )
+        self.assertEqual(len(self.get('/rest/gym/')[0].json()['results']), Gym.objects.count())
+
+    def test_unrelated(self):
+        """Test that writes to other models keep the response cached."""
+        self.get('/rest/gym/')
+        hits, misses = lookups()
+        Address.objects.create(city_name='Other', street_name='Street', house_number=2)
+        self.get('/rest/gym/')
+        self.assertEqual(lookups(), (hits + 1, misses))
+
+    @override_settings(RESPONSE_CACHE_TIMEOUT=0)
+    def test_disabled(self):
+        """Test that a timeout of 0 turns the cache off."""
+        hits, misses = lookups()
+        self.get('/rest/gym/')
+        self.get('/rest/gym/')
+        self.assertEqual(lookups(), (hits, misses))
+
+    @override_settings(ROOT_URLCONF='tests.test_response_cache')
+    async def test_async(self):
+        """Test that the asynchronous viewsets share the cached responses."""
+        await self.async_client.aforce_login(self.user)
+        hits, misses = lookups()
+        first = await self.async_client.get('/rest/gym/')
+        second = await self.async_client.get('/rest/gym/')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(lookups(), (hits + 1, misses + 1))
@@ -0,0 +1,105 @@
+"""Module for primary/replica routing tests."""
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from fitness_app.models import Gym
+from fitness_app.routers import (PIN_COOKIE, PRIMARY, PrimaryPinMiddleware,
+                                 PrimaryReplicaRouter, RoutingState,
+                                 routing_state)
+
+REPLICAS = ['replica1', 'replica2']
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS, REPLICA_PIN_SECONDS=5)
+class TestRouter(SimpleTestCase):
+    """Class for the database router."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.router = PrimaryReplicaRouter()
+
+    def test_reads_and_writes(self):
+        """Test that reads go to the replicas and writes to the primary."""
+        self.assertIn(self.router.db_for_read(Gym), REPLICAS)
+        self.assertEqual(self.router.db_for_write(Gym), PRIMARY)
+        gym = Gym()
+        gym._state.db = 'replica2'
+        self.assertEqual(self.router.db_for_read(Gym, instance=gym), 'replica2')
+        token = routing_state.set(RoutingState(pinned=True))
+        try:
+            self.assertEqual(self.router.db_for_read(Gym), PRIMARY)
+        finally:
+            routing_state.reset(token)
+
+    def test_migrations(self):
+        """Test that only the primary is migrated."""
+        self.assertFalse(self.router.allow_migrate('replica1', 'fitness_app'))
+        self.assertIsNone(self.router.allow_migrate(PRIMARY, 'fitness_app'))
+
+    @override_settings(REPLICA_DATABASES=[])
+    def test_without_replicas(self):
+        """Test that reads use the default database without replicas."""
+        self.assertIsNone(self.router.db_for_read(Gym))
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS, REPLICA_PIN_SECONDS=5)
+class TestPinMiddleware(SimpleTestCase):
+    """Class for pinning the reads of recent writers to the primary."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+        self.reads = []
+
+    def view(self, write: bool = False):
+        """
+        Build a view which reads and optionally writes.
+
+        Args:
+            write (bool): Whether the view writes.
+
+        Returns:
+            Callable: The view.
+        """
+        def get_response(request):
+            if write:
+                self.router.db_for_write(Gym)
+            self.reads.append(self.router.db_for_read(Gym))
+            return HttpResponse()
+        return get_response
+
+    def test_pinning(self):
+        """Test that a write pins the reads of the following requests."""
+        response = PrimaryPinMiddleware(self.view())(self.factory.get('/'))
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        response = PrimaryPinMiddleware(self.view(write=True))(self.factory.post('/'))
+        self.assertEqual(response.cookies[PIN_COOKIE]['max-age'], 5)
+        request = self.factory.get('/')
+        request.COOKIES[PIN_COOKIE] = '1'
+        PrimaryPinMiddleware(self.view())(request)
+        self.assertIn(self.reads[0], REPLICAS)
+        self.assertEqual(self.reads[1:], [PRIMARY, PRIMARY])
+        self.assertIsNone(routing_state.get())
+
+    async def test_async(self):
+        """Test that writes in threads of an async request are tracked."""
+        sync_view = self.view(write=True)
+
+        async def get_response(request):
+            return await sync_to_async(sync_view)(request)
+
+        response = await PrimaryPinMiddleware(get_response)(self.factory.get('/'))
+        self.assertIn(PIN_COOKIE, response.cookies)
+        self.assertEqual(self.reads, [PRIMARY])
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS)
+class TestTransactions(TestCase):
+    """Class for reads inside transactions."""
+
+    def test_atomic_reads(self):
+        """Test that reads inside a transaction of the primary stay on the primary."""
+        self.assertEqual(PrimaryReplicaRouter().db_for_read(Gym), PRIMARY)
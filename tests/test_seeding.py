@@ -0,0 +1,70 @@
+"""Module for synthetic dataset and benchmark tests."""
+
+import json
+import os
+from io import StringIO
+from tempfile import TemporaryDirectory
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import TestCase
+
+from fitness_app.ledger import get_balance
+from fitness_app.models import Client, ClientSub, Gym, GymCoach
+from fitness_app.seeding import scaled_counts, seed_dataset
+
+COUNTS = scaled_counts(0.1)
+
+
+class TestSeeding(TestCase):
+    """Class for the dataset generator."""
+
+    def test_sizes(self):
+        """Test that the requested rows are inserted with a consistent ledger."""
+        created = seed_dataset(COUNTS, seed=3)
+        self.assertEqual(created['gym'], COUNTS['gym'])
+        self.assertEqual(created['client_sub'], COUNTS['client_sub'])
+        self.assertEqual(ClientSub.objects.count(), COUNTS['client_sub'])
+        self.assertGreaterEqual(GymCoach.objects.count(), COUNTS['coach'])
+        client = Client.objects.first()
+        self.assertEqual(get_balance(client.id), client.net_worth)
+
+    def test_reproducible(self):
+        """Test that a seed always generates the same rows."""
+        def gyms():
+            with transaction.atomic():
+                seed_dataset(COUNTS, seed=5)
+                rows = list(Gym.objects.order_by('id').values_list('id', 'gym_name', 'address_id'))
+                transaction.set_rollback(True)
+            return rows
+        self.assertEqual(gyms(), gyms())
+
+    def test_command(self):
+        """Test that the sizes can be set one by one and a seed is only inserted once."""
+        call_command('seed_data', '--scale', '0.05', '--gyms', '7', stdout=StringIO())
+        self.assertEqual(Gym.objects.count(), 7)
+        with self.assertRaises(CommandError):
+            call_command('seed_data', '--scale', '0.05', stdout=StringIO())
+
+
+class TestBenchmark(TestCase):
+    """Class for the benchmark command."""
+
+    def test_results(self):
+        """Test that every path is timed and stored, and earlier results are compared."""
+        stdout = StringIO()
+        with TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'benchmark.json')
+            options = ('--scales', '0.05', '--repeat', '1')
+            call_command('benchmark', *options, '--output-file', path, stdout=StringIO())
+            with open(path, encoding='utf-8') as source:
+                report = json.load(source)
+            call_command('benchmark', *options, '--compare', path, stdout=stdout)
+        self.assertEqual(
+            [result['path'] for result in report['results']],
+            ['gym_detail', 'profile', 'subscription_list', 'coach_detail'],
+        )
+        self.assertTrue(all(result['queries'] > 0 for result in report['results']))
+        self.assertIn('%', stdout.getvalue())
+        self.assertFalse(Gym.objects.exists())
@@ -0,0 +1,111 @@
+"""Module for slow query capture tests."""
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from fitness_app.models import Address, Gym
+from fitness_app.slow_queries import (SQL_LENGTH, fingerprint, install,
+                                      slow_queries)
+
+CAPTURE_ALL = {'SLOW_QUERY_MS': 1e-6, 'SLOW_QUERY_EXPLAIN_SAMPLE': 1}
+
+
+class TestFingerprint(TestCase):
+    """Class for the normalization of queries."""
+
+    def test_fingerprint(self):
+        """Test that literals, placeholders and IN lists of any length are folded."""
+        first = fingerprint('SELECT * FROM "gym" WHERE "id" IN (%s, %s) AND "n" = 1')
+        second = fingerprint("SELECT *  FROM \"gym\"\nWHERE \"id\" IN (%s) AND \"n\" = 'a'")
+        self.assertEqual(first, second)
+        self.assertEqual(first[1], 'SELECT * FROM "gym" WHERE "id" IN (?) AND "n" = ?')
+        self.assertNotEqual(first[0], fingerprint('SELECT * FROM "coach"')[0])
+
+
+class TestSlowQueries(TestCase):
+    """Class for the slow query log."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Capture the queries of the connection of the test thread."""
+        super().setUpClass()
+        install()
+
+    def setUp(self):
+        """Set up test parameters."""
+        cache.clear()
+        address = Address.objects.create(city_name='City', street_name='Street', house_number=1)
+        self.gyms = [
+            Gym.objects.create(gym_name=f'Gym {number}', address=address) for number in range(3)
+        ]
+
+    def entries(self, prefix: str) -> list:
+        """
+        Get the entries of the queries starting with a prefix.
+
+        Args:
+            prefix (str): The start of the normalized SQL.
+
+        Returns:
+            list: The entries.
+        """
+        return [entry for entry in slow_queries() if entry['normalized'].startswith(prefix)]
+
+    def test_capture(self):
+        """Test that repeated queries share an entry with one plan and the calling frame."""
+        with override_settings(**CAPTURE_ALL):
+            list(Gym.objects.filter(id__in=[gym.id for gym in self.gyms[:2]]))
+            list(Gym.objects.filter(id__in=[gym.id for gym in self.gyms]))
+        entry, = self.entries('SELECT "gym"')
+        self.assertEqual(entry['count'], 2)
+        param = Gym._meta.pk.get_db_prep_value(self.gyms[2].id, connection)
+        self.assertEqual(entry['params'], ', '.join([type(param).__name__] * 3))
+        self.assertTrue(entry['plan'])
+        self.assertTrue(entry['frame'].startswith('tests/test_slow_queries.py:'))
+        self.assertEqual(entry['view'], 'unmatched')
+
+    def test_threshold(self):
+        """Test that fast queries and writes are not explained."""
+        with override_settings(SLOW_QUERY_MS=10 ** 6):
+            list(Gym.objects.all())
+        self.assertEqual(slow_queries(), [])
+        with override_settings(**CAPTURE_ALL):
+            Gym.objects.filter(id=self.gyms[0].id).update(gym_name='Renamed')
+        entry, = self.entries('UPDATE')
+        self.assertIsNone(entry['plan'])
+
+    def test_values_are_left_out(self):
+        """Test that parameter values are not stored and long SQL is truncated."""
+        with override_settings(SLOW_QUERY_LOG_SIZE=2, **CAPTURE_ALL):
+            Gym.objects.filter(gym_name='secret').exists()
+            list(Gym.objects.extra(where=[f"gym_name <> '{'x' * SQL_LENGTH}'"]))
+        entry, = self.entries('SELECT ? AS "a" FROM "gym"')
+        self.assertEqual(entry['params'], 'int, str')
+        self.assertNotIn('secret', str(slow_queries()))
+        entry, = self.entries('SELECT "gym"')
+        self.assertEqual(len(entry['sql']), SQL_LENGTH)
+
+    def test_bounded(self):
+        """Test that the least recently seen fingerprints are dropped."""
+        with override_settings(SLOW_QUERY_LOG_SIZE=2, **CAPTURE_ALL):
+            Gym.objects.filter(gym_name='Gym 0').exists()
+            Address.objects.filter(city_name='City').exists()
+            Gym.objects.filter(gym_name='Gym 1').exists()
+            Gym.objects.filter(address__city_name='City').exists()
+        self.assertEqual(len(slow_queries()), 2)
+        self.assertEqual(self.entries('SELECT ? AS "a" FROM "address"'), [])
+
+    def test_admin(self):
+        """Test that staff read the log with the views of the requests, and empty it."""
+        self.client.force_login(User.objects.create_superuser(username='admin', password='admin'))
+        with override_settings(**CAPTURE_ALL):
+            self.client.get('/gyms/')
+        self.assertIn('gyms_page', {entry['view'] for entry in slow_queries()})
+        response = self.client.get('/admin/slow-queries/')
+        self.assertContains(response, 'FROM &quot;gym&quot;')
+        self.client.post('/admin/slow-queries/')
+        self.assertEqual(slow_queries(), [])
+        self.client.logout()
+        self.assertEqual(self.client.get('/admin/slow-queries/').status_code, 302)
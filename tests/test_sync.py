@@ -0,0 +1,147 @@
+"""Module for delta sync tests."""
+
+from datetime import date, timedelta
+from json import loads
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from fitness_app.models import (Address, Certificate, Coach, Gym, Subscription,
+                                Tombstone)
+
+URL = '/rest/sync/'
+
+
+@mock.patch('fitness_app.sync.SYNC_SETTLE_TIME', timedelta(0))
+class TestSync(TestCase):
+    """Class for the delta sync endpoint."""
+
+    def setUp(self):
+        """Set up test parameters."""
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='user', password='user'))
+        self.address = Address.objects.create(city_name='A', street_name='B', house_number=1)
+        self.gym = Gym.objects.create(gym_name='Gym', address=self.address)
+        self.coach = Coach.objects.create(first_name='Ann', last_name='Lee', spec='yoga')
+        self.certificate = Certificate.objects.create(coach=self.coach, certf_name='Stretching')
+        self.subs = [
+            Subscription.objects.create(price=price, expire_date=date(2050, 1, 1), gym=self.gym)
+            for price in range(5)
+        ]
+
+    def sync(self, cursor: str | None = None, **params) -> dict:
+        """Request one page of changes.
+
+        Args:
+            cursor (str | None): The cursor of the previous sync.
+            params: Other query parameters.
+
+        Returns:
+            dict: The response body.
+        """
+        if cursor:
+            params['since'] = cursor
+        response = self.client.get(URL, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return loads(response.content)
+
+    def changed_ids(self, body: dict, name: str) -> set:
+        """Collect ids of changed rows of a model.
+
+        Args:
+            body (dict): The response body.
+            name (str): The stream name.
+
+        Returns:
+            set: The ids.
+        """
+        return {row['id'] for row in body['changes'][name]}
+
+    def test_changes_and_deletions(self):
+        """Test that only changed rows and tombstones follow a full sync."""
+        body = self.sync()
+        self.assertFalse(body['has_more'])
+        self.assertEqual(self.changed_ids(body, 'subscription'), {str(sub.id) for sub in self.subs})
+        self.assertEqual(body['changes']['gym'][0]['gym_name'], 'Gym')
+        body = self.sync(body['cursor'])
+        self.assertEqual(sum(map(len, body['changes'].values())), 0)
+        self.assertEqual(sum(map(len, body['deleted'].values())), 0)
+
+        self.gym.gym_name = 'Renamed'
+        self.gym.save()
+        Subscription.objects.filter(pk=self.subs[0].pk).update(price=100)
+        coach_id = self.coach.id
+        self.coach.delete()
+        body = self.sync(body['cursor'])
+        self.assertEqual(self.changed_ids(body, 'gym'), {str(self.gym.id)})
+        self.assertEqual(self.changed_ids(body, 'subscription'), {str(self.subs[0].id)})
+        self.assertEqual(body['deleted']['coach'], [str(coach_id)])
+        self.assertEqual(body['deleted']['certificate'], [str(self.certificate.id)])
+        body = self.sync(body['cursor'])
+        self.assertEqual(sum(map(len, body['deleted'].values())), 0)
+
+    def test_bulk_writes(self):
+        """Test that bulk updates and upserts are picked up."""
+        cursor = self.sync()['cursor']
+        self.subs[1].price = 50
+        Subscription.objects.bulk_update([self.subs[1]], ['price'])
+        self.subs[2].price = 60
+        Subscription.objects.bulk_create(
+            [self.subs[2]], update_conflicts=True, unique_fields=['id'], update_fields=['price'],
+        )
+        body = self.sync(cursor)
+        self.assertEqual(
+            self.changed_ids(body, 'subscription'), {str(self.subs[1].id), str(self.subs[2].id)},
+        )
+
+    def test_pages(self):
+        """Test that small pages cover every row exactly once."""
+        seen, cursor, more = [], None, True
+        while more:
+            body = self.sync(cursor, limit=2)
+            seen.extend(row['id'] for row in body['changes']['subscription'])
+            cursor, more = body['cursor'], body['has_more']
+        self.assertEqual(sorted(seen), sorted(str(sub.id) for sub in self.subs))
+        Subscription.objects.filter(pk__in=[sub.pk for sub in self.subs[:3]]).delete()
+        deleted, more = [], True
+        while more:
+            body = self.sync(cursor, limit=2)
+            deleted.extend(body['deleted']['subscription'])
+            cursor, more = body['cursor'], body['has_more']
+        self.assertEqual(sorted(deleted), sorted(str(sub.id) for sub in self.subs[:3]))
+
+    def test_settle_time(self):
+        """Test that rows stamped within the settle time wait for the next sync."""
+        with mock.patch('fitness_app.sync.SYNC_SETTLE_TIME', timedelta(hours=1)):
+            body = self.sync()
+        self.assertEqual(self.changed_ids(body, 'subscription'), set())
+        self.assertEqual(len(self.sync(body['cursor'])['changes']['subscription']), len(self.subs))
+
+    def test_errors(self):
+        """Test invalid cursors and anonymous requests."""
+        response = self.client.get(URL, {'since': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.client.force_authenticate(user=None)
+        self.assertIn(self.client.get(URL).status_code, {status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN})
+
+    def test_deletion_log(self):
+        """Test that every deleted row leaves a tombstone."""
+        self.address.delete()
+        self.assertEqual(
+            set(Tombstone.objects.values_list('model', flat=True)), {'address', 'gym', 'subscription'},
+        )
+
+    def test_index_backed(self):
+        """Test that the streams are read with the modified and deleted indexes."""
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        since = self.subs[0].modified_datetime
+        plan = Subscription.objects.filter(modified_datetime__gt=since).order_by('modified_datetime', 'id')
+        self.assertIn('subscription_modified_id_idx', plan.explain())
+        plan = Tombstone.objects.filter(deleted_datetime__gt=since).order_by('deleted_datetime', 'id')
+        self.assertIn('tombstone_deleted_id_idx', plan.explain())
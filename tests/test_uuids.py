@@ -0,0 +1,52 @@
+"""Module for primary key generation tests."""
+
+from io import StringIO
+from json import loads
+from time import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from fitness_app.models import Coach
+from fitness_app.uuids import RFC_4122_VARIANT, generate_id, uuid7
+
+
+class TestUUID7(TestCase):
+    """Class for time-ordered primary keys."""
+
+    def test_layout(self):
+        """Test the version, variant and timestamp bits."""
+        key = uuid7()
+        self.assertEqual(key.version, 7)
+        self.assertEqual(key.int >> 62 & 0b11, RFC_4122_VARIANT)
+        self.assertAlmostEqual((key.int >> 80) / 1000, time(), delta=5)
+
+    def test_monotonic(self):
+        """Test that keys of one process grow even within a millisecond."""
+        keys = [uuid7() for _ in range(10000)]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(len(set(keys)), len(keys))
+
+    def test_setting(self):
+        """Test that the setting selects the version of new primary keys."""
+        self.assertEqual(generate_id().version, 4)
+        with override_settings(PRIMARY_KEY_UUID_VERSION=7):
+            coaches = [Coach.objects.create(first_name='A', last_name='B', spec='C') for _ in range(3)]
+        self.assertEqual({coach.id.version for coach in coaches}, {7})
+        self.assertEqual(list(Coach.objects.order_by('id')), coaches)
+        with override_settings(PRIMARY_KEY_UUID_VERSION=1), self.assertRaises(ImproperlyConfigured):
+            generate_id()
+
+    def test_benchmark(self):
+        """Test the key benchmark, which needs PostgreSQL."""
+        out = StringIO()
+        if connection.vendor != 'postgresql':
+            with self.assertRaises(CommandError):
+                call_command('bench_uuid_keys', rows=10, stdout=out)
+            return
+        call_command('bench_uuid_keys', rows=50, batch=20, json=True, stdout=out)
+        results = loads(out.getvalue())
+        self.assertEqual([row['version'] for row in results], [4, 7])
+        self.assertTrue(all(row['index_bytes'] > 0 for row in results))
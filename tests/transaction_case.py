@@ -0,0 +1,37 @@
+"""
+Transaction test case emptying the tables of the app between tests.
+
+The models quote their `db_table`, so `manage.py flush` does not match them with the tables
+of the database and leaves them filled, and its `TRUNCATE` of `auth_user` fails on Postgres
+while `client` references it. `AppTransactionTestCase` empties the tables of the app first and
+then flushes the others with `CASCADE`.
+"""
+
+from django.apps import apps
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connections
+from django.test import TransactionTestCase
+
+APP_LABEL = 'fitness_app'
+
+
+class AppTransactionTestCase(TransactionTestCase):
+    """Transaction test case flushing the quoted tables of the app too."""
+
+    def _fixture_teardown(self):
+        """Empty the tables of the app, then every other table."""
+        tables = [model._meta.db_table for model in apps.get_app_config(APP_LABEL).get_models()]
+        for db_name in self._databases_names(include_mirrors=False):
+            operations = connections[db_name].ops
+            operations.execute_sql_flush(
+                operations.sql_flush(no_style(), tables, allow_cascade=True),
+            )
+            call_command(
+                'flush',
+                verbosity=0,
+                interactive=False,
+                database=db_name,
+                reset_sequences=False,
+                allow_cascade=True,
+            )